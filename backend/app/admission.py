@@ -0,0 +1,174 @@
+import os
+import math
+import time
+import asyncio
+from collections import deque
+
+from .responses import json_response
+
+# --- SETTINGS ---
+# Per route: requests handled at once, requests allowed to wait for a slot, and the longest
+# wait (ms) before a request is shed with a 503. A concurrency of 0 turns the limit off.
+ADMISSION_LIMITS = {
+    "predict": (
+        int(os.getenv("PREDICT_CONCURRENCY", 64)),
+        int(os.getenv("PREDICT_QUEUE", 256)),
+        float(os.getenv("PREDICT_MAX_WAIT_MS", 1000)),
+    ),
+    "explain": (
+        int(os.getenv("EXPLAIN_CONCURRENCY", 4)),
+        int(os.getenv("EXPLAIN_QUEUE", 16)),
+        float(os.getenv("EXPLAIN_MAX_WAIT_MS", 2000)),
+    ),
+    "simulate": (
+        int(os.getenv("SIMULATE_CONCURRENCY", 2)),
+        int(os.getenv("SIMULATE_QUEUE", 8)),
+        float(os.getenv("SIMULATE_MAX_WAIT_MS", 5000)),
+    ),
+    "export": (
+        int(os.getenv("EXPORT_CONCURRENCY", 2)),
+        int(os.getenv("EXPORT_QUEUE", 4)),
+        float(os.getenv("EXPORT_MAX_WAIT_MS", 5000)),
+    ),
+}
+SERVICE_TIME_DECAY = 0.1  # Weight of the newest request in the moving average of service time
+
+
+class AdmissionGate:
+    """
+    A bounded front door for one route. Up to `concurrency` requests run at once
+    and up to `queue` wait, first come first served. A request is shed at once
+    when the queue is full, or when the queue ahead of it (at the observed service
+    time) would outlast `max_wait`. A request that does wait is shed when its
+    deadline passes. Shed requests get a fast 503 with a Retry-After, instead of
+    every caller's latency climbing together.
+    """
+
+    def __init__(self, route, concurrency, queue, max_wait_ms):
+        self.route = route
+        self.concurrency = concurrency
+        self.queue = max(0, queue)
+        self.max_wait = max_wait_ms / 1000
+        self.active = 0
+        self.waiters = deque()
+        self.service_time = 0.0
+
+        self.admitted = 0
+        self.shed_queue_full = 0
+        self.shed_deadline = 0
+        self.served_from_cache = 0
+        self.queue_ms_total = 0.0
+        self.queue_ms_max = 0.0
+
+    @property
+    def enabled(self):
+        return self.concurrency > 0
+
+    @property
+    def saturated(self):
+        """No free slot: a new request would have to wait (or be shed)."""
+        return self.enabled and self.active >= self.concurrency
+
+    def expected_wait(self):
+        """Seconds until a request joining the queue now would get a slot."""
+        return (len(self.waiters) + 1) * self.service_time / max(self.concurrency, 1)
+
+    async def acquire(self):
+        """True once the request holds a slot (release it when done), False if it was shed."""
+        if not self.enabled:
+            return True
+        if not self.saturated and not self.waiters:
+            self.active += 1
+            self._admit(0.0)
+            return True
+
+        # 1. Shed up front when waiting cannot help
+        if len(self.waiters) >= self.queue:
+            self.shed_queue_full += 1
+            return False
+        if self.expected_wait() > self.max_wait:
+            self.shed_deadline += 1
+            return False
+
+        # 2. Wait for a slot until the deadline. `release` hands slots over in order.
+        queued = time.perf_counter()
+        future = asyncio.get_running_loop().create_future()
+        self.waiters.append(future)
+        try:
+            await asyncio.wait_for(asyncio.shield(future), self.max_wait)
+        except asyncio.TimeoutError:
+            if future.done() and not future.cancelled():
+                self._admit(time.perf_counter() - queued)  # The slot arrived as the deadline passed
+                return True
+            future.cancel()
+            self._drop(future)
+            self.shed_deadline += 1
+            return False
+        except asyncio.CancelledError:
+            # Client went away: pass on a slot handed over meanwhile
+            if future.done() and not future.cancelled():
+                self.active -= 1
+                self._wake()
+            else:
+                future.cancel()
+                self._drop(future)
+            raise
+
+        self._admit(time.perf_counter() - queued)
+        return True
+
+    def release(self, started=None):
+        if not self.enabled:
+            return
+        if started is not None:
+            elapsed = time.perf_counter() - started
+            self.service_time += SERVICE_TIME_DECAY * (elapsed - self.service_time)
+        self.active -= 1
+        self._wake()
+
+    def _admit(self, waited):
+        # The slot itself is already counted: taken directly, or handed over by _wake
+        self.admitted += 1
+        self.queue_ms_total += waited * 1000
+        self.queue_ms_max = max(self.queue_ms_max, waited * 1000)
+
+    def _wake(self):
+        while self.waiters and self.active < self.concurrency:
+            future = self.waiters.popleft()
+            if not future.done():
+                self.active += 1
+                future.set_result(True)
+
+    def _drop(self, future):
+        try:
+            self.waiters.remove(future)
+        except ValueError:
+            pass
+
+    def overloaded(self):
+        """The 503 for a shed request, with when to retry (the current queue's expected drain time)."""
+        retry_after = max(1, math.ceil(self.expected_wait()))
+        return json_response(
+            {"error": f"Server is busy ({self.route}). Please retry in {retry_after}s."},
+            status_code=503,
+            headers={"Retry-After": str(retry_after)},
+        )
+
+    def metrics(self):
+        return {
+            "concurrency": self.concurrency,
+            "queue_limit": self.queue,
+            "max_wait_ms": self.max_wait * 1000,
+            "active": self.active,
+            "queued": len(self.waiters),
+            "admitted": self.admitted,
+            "shed_queue_full": self.shed_queue_full,
+            "shed_deadline": self.shed_deadline,
+            "served_from_cache": self.served_from_cache,
+            "mean_queue_ms": self.queue_ms_total / self.admitted if self.admitted else 0.0,
+            "max_queue_ms": self.queue_ms_max,
+            "service_time_ms": self.service_time * 1000,
+        }
+
+
+gates = {route: AdmissionGate(route, *limits) for route, limits in ADMISSION_LIMITS.items()}
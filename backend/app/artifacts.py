@@ -0,0 +1,133 @@
+import os
+import json
+import zlib
+import struct
+import hashlib
+
+import numpy as np
+import xgboost as xgb
+from sklearn.preprocessing import LabelEncoder
+
+try:
+    import zstandard
+except ImportError:  # Artifacts fall back to zlib; reading a zstd artifact then needs `pip install zstandard`
+    zstandard = None
+
+# --- SETTINGS ---
+# Artifact layout:  MAGIC | format (u8) | header length (u32) | header JSON | compressed booster
+# The header is plain JSON (schema, classes, teams, params, data hash, metrics), so it can be
+# read without decompressing the model. The booster is XGBoost's own UBJSON format: no pickle.
+MAGIC = b"PLMA"
+ARTIFACT_FORMAT = 1
+ZSTD_LEVEL = 12  # ~7% larger than 19 but >10x faster to write; decompression speed is the same
+ARTIFACT_CACHE_DIR = os.getenv(
+    "ARTIFACT_CACHE_DIR",
+    os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "ml_artifacts", "cache")
+)
+
+
+def content_hash(blob):
+    return hashlib.sha256(blob).hexdigest()
+
+
+def data_hash(X, y):
+    """Fingerprint of the exact training matrix and labels."""
+    digest = hashlib.sha256()
+    digest.update(json.dumps(list(X.columns)).encode())
+    digest.update(np.ascontiguousarray(X.to_numpy()).tobytes())
+    digest.update(np.ascontiguousarray(np.asarray(y, dtype=np.int64)).tobytes())
+    return digest.hexdigest()
+
+
+def compress(raw):
+    """(codec, payload): zstd when installed, zlib otherwise. Also used for the odds store."""
+    if zstandard is not None:
+        return "zstd", zstandard.ZstdCompressor(level=ZSTD_LEVEL).compress(raw)
+    return "zlib", zlib.compress(raw, 9)
+
+
+def decompress(codec, payload):
+    """Inverse of `compress` for a stored codec name."""
+    if codec == "zstd":
+        if zstandard is None:
+            raise RuntimeError("This model artifact is zstd-compressed: pip install zstandard")
+        return zstandard.ZstdDecompressor().decompress(payload)
+    if codec == "zlib":
+        return zlib.decompress(payload)
+    raise ValueError(f"Unknown artifact codec '{codec}'")
+
+
+def _json_params(model):
+    """The model params that survive a JSON round trip (callables and objects are left out)."""
+    params = {}
+    for key, value in model.get_params().items():
+        if value is None or isinstance(value, (bool, int, float, str)):
+            params[key] = value
+    return params
+
+
+def pack_model(model, encoder, manifest, train_hash=None, metrics=None):
+    """One self-describing, compressed artifact (bytes) for a trained model and its team encoder."""
+    codec, payload = compress(bytes(model.get_booster().save_raw("ubj")))
+    header = {
+        "format": ARTIFACT_FORMAT,
+        "codec": codec,
+        "xgboost": xgb.__version__,
+        "manifest": manifest,
+        "teams": [str(team) for team in encoder.classes_],
+        "params": _json_params(model),
+        "data_hash": train_hash,
+        "metrics": metrics or {},
+    }
+    # sort_keys: the same model and data always give the same bytes, so the same hash
+    header_bytes = json.dumps(header, sort_keys=True).encode()
+    return MAGIC + struct.pack("<BI", ARTIFACT_FORMAT, len(header_bytes)) + header_bytes + payload
+
+
+def read_header(blob):
+    if blob[:len(MAGIC)] != MAGIC:
+        raise ValueError("Not a model artifact")
+    offset = len(MAGIC)
+    version, length = struct.unpack_from("<BI", blob, offset)
+    if version != ARTIFACT_FORMAT:
+        raise ValueError(f"Unsupported artifact format {version}")
+    offset += struct.calcsize("<BI")
+    return json.loads(blob[offset:offset + length]), offset + length
+
+
+def unpack_model(blob):
+    """(model, team encoder, manifest, header) from an artifact."""
+    header, offset = read_header(blob)
+
+    model = xgb.XGBClassifier()
+    model.load_model(bytearray(decompress(header["codec"], blob[offset:])))
+
+    encoder = LabelEncoder()
+    encoder.classes_ = np.array(header["teams"], dtype=object)
+    return model, encoder, header["manifest"], header
+
+
+def cache_path(artifact_hash):
+    return os.path.join(ARTIFACT_CACHE_DIR, f"{artifact_hash}.plma")
+
+
+def read_cached(artifact_hash):
+    """The cached artifact for this hash, or None (missing or corrupt)."""
+    try:
+        with open(cache_path(artifact_hash), "rb") as f:
+            blob = f.read()
+    except OSError:
+        return None
+    return blob if content_hash(blob) == artifact_hash else None
+
+
+def write_cached(artifact_hash, blob):
+    """Atomic write, so workers starting together never read half a file."""
+    try:
+        os.makedirs(ARTIFACT_CACHE_DIR, exist_ok=True)
+        tmp_path = f"{cache_path(artifact_hash)}.{os.getpid()}.tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(blob)
+        os.replace(tmp_path, cache_path(artifact_hash))
+    except OSError as e:
+        print(f"⚠️ Could not cache model artifact: {e}")
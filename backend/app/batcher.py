@@ -0,0 +1,130 @@
+import os
+import time
+import asyncio
+from collections import Counter
+
+from . import executor
+
+# --- SETTINGS ---
+# Single /predict calls arriving within BATCH_MAX_LATENCY_MS of each other are scored
+# together (one predict_proba on a stacked matrix), up to BATCH_MAX_SIZE fixtures.
+# BATCH_MAX_LATENCY_MS=0 turns batching off.
+BATCH_MAX_LATENCY_MS = float(os.getenv("BATCH_MAX_LATENCY_MS", 2))
+BATCH_MAX_SIZE = int(os.getenv("BATCH_MAX_SIZE", 64))
+
+
+class PredictionBatcher:
+    """
+    An asyncio queue in front of the prediction executor. Callers await a
+    future; a collector task drains the queue into batches (per league) and
+    resolves every caller's future from one scoring call.
+    """
+
+    def __init__(self, max_latency_ms=BATCH_MAX_LATENCY_MS, max_size=BATCH_MAX_SIZE, max_in_flight=executor.PREDICT_WORKERS):
+        self.max_latency = max_latency_ms / 1000
+        self.max_size = max(1, max_size)
+        self.max_in_flight = max(1, max_in_flight)
+        self.queue = None
+        self.task = None
+        self.scoring = set()  # In-flight _score tasks: the loop only keeps weak references
+
+        self.batch_sizes = Counter()
+        self.items = 0
+        self.batches = 0
+        self.wait_ms_total = 0.0
+
+    @property
+    def running(self):
+        return self.task is not None and not self.task.done()
+
+    def start(self):
+        if self.max_latency <= 0 or self.running:
+            return
+        self.queue = asyncio.Queue()
+        self.in_flight = asyncio.Semaphore(self.max_in_flight)
+        self.task = asyncio.create_task(self._collect())
+
+    async def stop(self):
+        if self.task is None:
+            return
+        self.task.cancel()
+        try:
+            await self.task
+        except asyncio.CancelledError:
+            pass
+        self.task = None
+        # Batches already handed to the executor still answer their callers
+        await asyncio.gather(*self.scoring, return_exceptions=True)
+
+    async def predict(self, league, home_team, away_team, as_of=None):
+        """One fixture's result (or None for unknown teams), scored in whichever batch it lands in."""
+        if not self.running:
+            result, = await executor.score(league, [(home_team, away_team)], as_of)
+            return result
+
+        future = asyncio.get_running_loop().create_future()
+        await self.queue.put((league, (home_team, away_team, as_of), future, time.perf_counter()))
+        return await future
+
+    async def _collect(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            # 1. Block for the first request, then give the burst up to max_latency to fill the batch
+            batch = [await self.queue.get()]
+            deadline = loop.time() + self.max_latency
+            while len(batch) < self.max_size:
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(self.queue.get(), timeout))
+                except asyncio.TimeoutError:
+                    break
+
+            # 2. Score each league's share without blocking the next collection
+            by_league = {}
+            for item in batch:
+                by_league.setdefault(item[0], []).append(item)
+            for league, items in by_league.items():
+                await self.in_flight.acquire()
+                task = asyncio.create_task(self._score(league, items))
+                self.scoring.add(task)
+                task.add_done_callback(self.scoring.discard)
+
+    async def _score(self, league, items):
+        try:
+            started = time.perf_counter()
+            self.batches += 1
+            self.items += len(items)
+            self.batch_sizes[len(items)] += 1
+            self.wait_ms_total += sum(started - queued for *_, queued in items) * 1000
+
+            try:
+                fixtures = [(home, away) for _, (home, away, _), _, _ in items]
+                as_of = [date for _, (_, _, date), _, _ in items]
+                results = await executor.score(league, fixtures, as_of if any(as_of) else None)
+            except Exception as e:
+                for _, _, future, _ in items:
+                    if not future.done():
+                        future.set_exception(e)
+                return
+
+            for (_, _, future, _), result in zip(items, results):
+                if not future.done():  # Caller may have gone away
+                    future.set_result(result)
+        finally:
+            self.in_flight.release()
+
+    def metrics(self):
+        return {
+            "enabled": self.running,
+            "max_latency_ms": self.max_latency * 1000,
+            "max_size": self.max_size,
+            "queued": self.queue.qsize() if self.queue is not None else 0,
+            "batches": self.batches,
+            "items": self.items,
+            "mean_batch_size": self.items / self.batches if self.batches else 0.0,
+            "max_batch_size": max(self.batch_sizes) if self.batch_sizes else 0,
+            "mean_queue_wait_ms": self.wait_ms_total / self.items if self.items else 0.0,
+            "batch_size_histogram": {str(size): count for size, count in sorted(self.batch_sizes.items())},
+        }
@@ -1,8 +1,11 @@
 import os
 from dotenv import load_dotenv
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, inspect, text
 from sqlalchemy.orm import sessionmaker
 from sqlalchemy.ext.declarative import declarative_base
+from starlette.concurrency import run_in_threadpool
+
+from .leagues import DEFAULT_LEAGUE
 
 load_dotenv()
 DATABASE_URL = os.getenv("DATABASE_URL")
@@ -10,6 +13,135 @@ DATABASE_URL = os.getenv("DATABASE_URL")
 if DATABASE_URL and DATABASE_URL.startswith("postgres://"):
     DATABASE_URL = DATABASE_URL.replace("postgres://", "postgresql://", 1)
 
-engine = create_engine(DATABASE_URL if DATABASE_URL else "sqlite:///./test.db")
+if not DATABASE_URL:
+    DATABASE_URL = "sqlite:///./test.db"
+
+IS_SQLITE = DATABASE_URL.startswith("sqlite")
+
+# --- POOL SETTINGS ---
+# Sized for a small managed Postgres: a few warm connections per worker,
+# recycled before the provider's idle timeout, and pinged before reuse.
+POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "5"))
+MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", "10"))
+POOL_TIMEOUT = int(os.getenv("DB_POOL_TIMEOUT", "10"))            # Seconds to wait for a free connection
+POOL_RECYCLE = int(os.getenv("DB_POOL_RECYCLE", "1800"))          # Seconds before a connection is replaced
+STATEMENT_TIMEOUT_MS = int(os.getenv("DB_STATEMENT_TIMEOUT_MS", "5000"))  # API queries on Postgres only
+# SQLite has no statement timeout: this bounds how long an API query waits for
+# a write lock (the daily job holding the file), not how long it runs.
+SQLITE_BUSY_TIMEOUT_MS = int(os.getenv("DB_BUSY_TIMEOUT_MS", "5000"))
+
+
+def pool_options():
+    if IS_SQLITE:
+        return {"pool_pre_ping": True}
+    return {
+        "pool_size": POOL_SIZE,
+        "max_overflow": MAX_OVERFLOW,
+        "pool_timeout": POOL_TIMEOUT,
+        "pool_recycle": POOL_RECYCLE,
+        "pool_pre_ping": True,
+    }
+
+
+# Sync engine: scripts (daily job, retraining) and pandas loads. No statement
+# timeout here, because full rebuilds legitimately run long queries.
+engine = create_engine(DATABASE_URL, **pool_options())
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
-Base = declarative_base()
\ No newline at end of file
+Base = declarative_base()
+
+
+def async_database_url(url):
+    if url.startswith("postgresql://"):
+        return url.replace("postgresql://", "postgresql+asyncpg://", 1)
+    if url.startswith("sqlite://"):
+        return url.replace("sqlite://", "sqlite+aiosqlite://", 1)
+    return url
+
+
+def create_api_engine():
+    """
+    Async engine for the API handlers. On Postgres a statement timeout makes a
+    slow DB fail fast; on SQLite only the wait for a locked file is bounded.
+    """
+    from sqlalchemy.ext.asyncio import create_async_engine
+
+    if IS_SQLITE:
+        connect_args = {"timeout": SQLITE_BUSY_TIMEOUT_MS / 1000}  # sqlite3's busy timeout
+    else:
+        connect_args = {
+            "command_timeout": STATEMENT_TIMEOUT_MS / 1000,
+            "server_settings": {"statement_timeout": str(STATEMENT_TIMEOUT_MS)},
+        }
+    return create_async_engine(async_database_url(DATABASE_URL), connect_args=connect_args, **pool_options())
+
+
+try:
+    async_engine = create_api_engine()
+except ImportError as e:
+    # asyncpg / aiosqlite missing: handlers fall back to the sync engine in the threadpool
+    print(f"⚠️ Async DB driver not available ({e}). Using the sync engine.")
+    async_engine = None
+
+
+def add_column_if_missing(table, column, ddl):
+    """Tiny in-place migration for databases created before `column` existed."""
+    inspector = inspect(engine)
+    if not inspector.has_table(table):
+        return False
+    if column in [c['name'] for c in inspector.get_columns(table)]:
+        return False
+
+    with engine.begin() as conn:
+        conn.execute(text(f"ALTER TABLE {table} ADD COLUMN {column} {ddl}"))
+    print(f"🔧 Added '{column}' column to '{table}'.")
+    return True
+
+
+def ensure_schema():
+    """In-place migrations: league partitions (old rows default to the PL), model manifests, artifacts and stages, team states, head-to-head, odds and the prediction log."""
+    from .models import ModelStore, TeamFormState, HeadToHeadState, OddsState, PredictionRecord
+    from .features import H2H_COLUMNS
+    ModelStore.__table__.create(engine, checkfirst=True)
+    TeamFormState.__table__.create(engine, checkfirst=True)
+    HeadToHeadState.__table__.create(engine, checkfirst=True)
+    OddsState.__table__.create(engine, checkfirst=True)
+    PredictionRecord.__table__.create(engine, checkfirst=True)
+
+    add_column_if_missing("matches", "league", f"VARCHAR DEFAULT '{DEFAULT_LEAGUE}'")
+    add_column_if_missing("model_store", "league", f"VARCHAR DEFAULT '{DEFAULT_LEAGUE}'")
+    add_column_if_missing("model_store", "feature_schema", "TEXT")
+    add_column_if_missing("model_store", "artifact", "BLOB" if IS_SQLITE else "BYTEA")
+    add_column_if_missing("model_store", "artifact_hash", "VARCHAR")
+    add_column_if_missing("model_store", "stage", "VARCHAR")
+    for column in H2H_COLUMNS:
+        add_column_if_missing("matches", column, "FLOAT")
+
+    if inspect(engine).has_table("matches"):
+        with engine.begin() as conn:
+            conn.execute(text("CREATE INDEX IF NOT EXISTS ix_matches_league_date ON matches (league, date)"))
+
+
+async def fetch_one(query, params=None):
+    """Runs a small API query on the async pool, or on the sync pool in a worker thread."""
+    if async_engine is not None:
+        async with async_engine.connect() as conn:
+            result = await conn.execute(query, params or {})
+            return result.fetchone()
+
+    def run_sync():
+        with engine.connect() as conn:
+            return conn.execute(query, params or {}).fetchone()
+
+    return await run_in_threadpool(run_sync)
+
+
+async def warm_up_pool():
+    """Opens the first pooled connection at startup so the first request doesn't pay for it."""
+    if async_engine is None:
+        return
+    try:
+        async with async_engine.connect() as conn:
+            await conn.execute(text("SELECT 1"))
+        print("✅ Async DB pool ready.")
+    except Exception as e:
+        print(f"⚠️ Async DB pool warm-up failed: {e}")
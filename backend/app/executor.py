@@ -0,0 +1,145 @@
+import os
+import asyncio
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+from .prediction_engine import explain_batch, export_batch, predict_batch
+
+# --- SETTINGS ---
+# "thread": score in this process on a small thread pool (XGBoost releases the GIL while predicting).
+# "process": score in PREDICT_WORKERS processes, each with every league's model and team state preloaded,
+#            so feature building and predict_proba scale with cores instead of sharing one GIL.
+PREDICT_EXECUTOR = os.getenv("PREDICT_EXECUTOR", "thread").lower()
+PREDICT_WORKERS = int(os.getenv("PREDICT_WORKERS", os.cpu_count() or 1))
+
+# league -> (model, team_form, registry, layout, head_to_head, scorelines, timelines), what a batch is scored against
+_states = {}
+_pool = None
+_pool_stale = True
+
+# Inside a process worker: the states it was started with
+_worker_states = {}
+
+
+def _init_worker(states):
+    _worker_states.clear()
+    _worker_states.update(states)
+
+
+def _score_state(state, fixtures, as_of=None):
+    model, team_form, registry, layout, head_to_head, scorelines, timelines = state
+    return predict_batch(model, team_form, registry, layout, fixtures, head_to_head, scorelines, timelines, as_of)
+
+
+def _score_in_worker(league, fixtures, as_of=None):
+    return _score_state(_worker_states[league], fixtures, as_of)
+
+
+def _explain_state(state, fixtures, as_of=None):
+    model, team_form, registry, layout, head_to_head, _, timelines = state
+    return explain_batch(model, team_form, registry, layout, fixtures, head_to_head, timelines, as_of)
+
+
+def _explain_in_worker(league, fixtures, as_of=None):
+    return _explain_state(_worker_states[league], fixtures, as_of)
+
+
+def _export_state(state, fixtures, as_of=None):
+    model, team_form, registry, layout, head_to_head, _, timelines = state
+    return export_batch(model, team_form, registry, layout, fixtures, head_to_head, timelines, as_of)
+
+
+def _export_in_worker(league, fixtures, as_of=None):
+    return _export_state(_worker_states[league], fixtures, as_of)
+
+
+def _worker_ready():
+    return os.getpid()
+
+
+def load(states):
+    """New serving state (model or history reload). Process workers are restarted with it on next use."""
+    global _states, _pool_stale
+    _states = dict(states)
+    _pool_stale = True
+
+
+def _get_pool():
+    global _pool, _pool_stale
+    if _pool is not None and not _pool_stale:
+        return _pool
+
+    old = _pool
+    if PREDICT_EXECUTOR == "process":
+        # 'spawn': forking a process that already runs the event loop and DB pools is not safe
+        _pool = ProcessPoolExecutor(
+            max_workers=PREDICT_WORKERS,
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=_init_worker,
+            initargs=(_states,),
+        )
+        print(f"⚙️ Prediction process pool started ({PREDICT_WORKERS} workers).")
+    elif old is None:
+        _pool = ThreadPoolExecutor(max_workers=PREDICT_WORKERS, thread_name_prefix="predict")
+    _pool_stale = False
+
+    # Batches already running on the old workers finish there
+    if old is not None and old is not _pool:
+        old.shutdown(wait=False)
+    return _pool
+
+
+async def score(league, fixtures, as_of=None):
+    """
+    Scores a batch of (home, away) fixtures off the event loop. One result per fixture (None if unknown).
+    `as_of` (a date, or one per fixture) scores them from the team state going into that date.
+    """
+    if league not in _states:
+        return [None] * len(fixtures)
+
+    loop = asyncio.get_running_loop()
+    pool = _get_pool()
+    if PREDICT_EXECUTOR == "process":
+        return await loop.run_in_executor(pool, _score_in_worker, league, list(fixtures), as_of)
+    return await loop.run_in_executor(pool, _score_state, _states[league], list(fixtures), as_of)
+
+
+async def explain(league, fixtures, as_of=None):
+    """Feature contributions for a batch of (home, away) fixtures, like `score`. One per fixture (None if unknown)."""
+    if league not in _states:
+        return [None] * len(fixtures)
+
+    loop = asyncio.get_running_loop()
+    pool = _get_pool()
+    if PREDICT_EXECUTOR == "process":
+        return await loop.run_in_executor(pool, _explain_in_worker, league, list(fixtures), as_of)
+    return await loop.run_in_executor(pool, _explain_state, _states[league], list(fixtures), as_of)
+
+
+async def export(league, fixtures, as_of=None):
+    """(probabilities, model inputs) for a batch of (home, away) fixtures, like `score`. One per fixture (None if unknown)."""
+    if league not in _states:
+        return [None] * len(fixtures)
+
+    loop = asyncio.get_running_loop()
+    pool = _get_pool()
+    if PREDICT_EXECUTOR == "process":
+        return await loop.run_in_executor(pool, _export_in_worker, league, list(fixtures), as_of)
+    return await loop.run_in_executor(pool, _export_state, _states[league], list(fixtures), as_of)
+
+
+async def warm_up():
+    """Starts the workers at startup, so the first requests don't pay for spawning and model loading."""
+    if PREDICT_EXECUTOR != "process" or not _states:
+        return
+    loop = asyncio.get_running_loop()
+    pool = _get_pool()
+    pids = await asyncio.gather(*[loop.run_in_executor(pool, _worker_ready) for _ in range(PREDICT_WORKERS)])
+    print(f"✅ {len(set(pids))} prediction workers ready.")
+
+
+def shutdown():
+    global _pool, _pool_stale
+    if _pool is not None:
+        _pool.shutdown(wait=False, cancel_futures=True)
+    _pool, _pool_stale = None, True
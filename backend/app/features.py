@@ -0,0 +1,417 @@
+import os
+import json
+from collections import deque
+
+import numpy as np
+import pandas as pd
+
+# The one definition of the model's input, in training order.
+# NOTE: The '_last_5' names are historical, the window size lives in the form state.
+FEATURE_COLUMNS = [
+    'home_wins_last_5', 'home_draws_last_5', 'home_losses_last_5',
+    'away_wins_last_5', 'away_draws_last_5', 'away_losses_last_5',
+    'home_goals_scored_avg', 'home_goals_conceded_avg',
+    'away_goals_scored_avg', 'away_goals_conceded_avg',
+    'home_points_last_5', 'away_points_last_5', 'PointsDifference',
+    'HomeElo', 'AwayElo', 'EloDifference', 'HomeTeamCode', 'AwayTeamCode',
+    'home_sot_avg', 'home_corners_avg',
+    'away_sot_avg', 'away_corners_avg'
+]
+
+# Head-to-head features: the fixture's last H2H_WINDOW meetings at the same venue.
+# Optional: models trained before they existed (or without them) are still served.
+H2H_STATS = {
+    'meetings': 'h2h_meetings',
+    'home_wins': 'h2h_home_wins',
+    'draws': 'h2h_draws',
+    'away_wins': 'h2h_away_wins',
+    'home_goals_avg': 'h2h_home_goals_avg',
+    'away_goals_avg': 'h2h_away_goals_avg',
+}
+H2H_COLUMNS = list(H2H_STATS.values())
+
+# Everything the prediction engine produces, in order: required features, then optional ones
+SERVED_FEATURES = FEATURE_COLUMNS + H2H_COLUMNS
+
+# DB columns (snake_case) -> model feature names, where they differ
+DB_TO_FEATURE = {
+    'home_elo': 'HomeElo',
+    'away_elo': 'AwayElo',
+    'elo_difference': 'EloDifference',
+    'points_difference': 'PointsDifference',
+    'home_team_code': 'HomeTeamCode',
+    'away_team_code': 'AwayTeamCode',
+}
+
+# Target classes as the retrain LabelEncoder orders them (alphabetical)
+CLASSES = ['A', 'D', 'H']
+OUTCOME_LABELS = {'A': "Away Win", 'D': "Draw", 'H': "Home Win"}
+OUTCOME_KEYS = {'A': "away", 'D': "draw", 'H': "home"}  # Per-outcome keys in API payloads
+
+MANIFEST_VERSION = 1
+
+# How many past matches the form features cover. Training (daily_job) and
+# serving both read it from here, so they can never disagree.
+FORM_WINDOW = int(os.getenv("FORM_WINDOW", 10))
+
+ELO_START = 1500
+ELO_K = 20
+
+H2H_WINDOW = int(os.getenv("H2H_WINDOW", 6))
+
+# TeamForm stat -> `matches` column, per side ('_last_5' kept for the stored schema)
+FORM_STATS = {
+    'wins': '{side}_wins_last_5',
+    'draws': '{side}_draws_last_5',
+    'losses': '{side}_losses_last_5',
+    'points': '{side}_points_last_5',
+    'goals_scored_avg': '{side}_goals_scored_avg',
+    'goals_conceded_avg': '{side}_goals_conceded_avg',
+    'sot_avg': '{side}_sot_avg',
+    'corners_avg': '{side}_corners_avg',
+}
+
+# A team's state after each match in its timeline, in this order (served_stats reads them by name)
+TIMELINE_STATS = list(FORM_STATS) + ['elo']
+
+# Columns of the `team_form` table (one post-match state per league and team)
+TEAM_FORM_COLUMNS = ['league', 'team', 'form_window', 'games', 'last_date'] + list(FORM_STATS) + ['elo']
+
+# Columns of the `head_to_head` table (one state per league and ordered team pair)
+HEAD_TO_HEAD_COLUMNS = ['league', 'home_team', 'away_team', 'h2h_window', 'total_meetings', 'last_date', 'recent']
+H2H_EMPTY = (0, 0, 0, 0, 0.0, 0.0)
+
+
+def form_columns(side):
+    return [column.format(side=side) for column in FORM_STATS.values()]
+
+
+class TeamForm:
+    """
+    A team's last `window` results. `stats()` is its form going into the next
+    match: the values a training row gets, and what the API serves once the
+    team's latest match is in.
+    """
+
+    def __init__(self, window=FORM_WINDOW):
+        self.games = deque(maxlen=window)
+
+    def add(self, result, goals_for, goals_against, sot, corners):
+        """`result` is 'W', 'D' or 'L' from this team's point of view."""
+        points = 3 if result == 'W' else (1 if result == 'D' else 0)
+        self.games.append((result, points, goals_for, goals_against, sot, corners))
+
+    def stats(self):
+        count = len(self.games)
+        if count == 0:
+            return dict.fromkeys(FORM_STATS, 0.0)
+
+        results = [g[0] for g in self.games]
+        return {
+            'wins': results.count('W'),
+            'draws': results.count('D'),
+            'losses': results.count('L'),
+            'points': sum(g[1] for g in self.games),
+            'goals_scored_avg': sum(g[2] for g in self.games) / count,
+            'goals_conceded_avg': sum(g[3] for g in self.games) / count,
+            'sot_avg': sum(g[4] for g in self.games) / count,
+            'corners_avg': sum(g[5] for g in self.games) / count,
+        }
+
+
+class HeadToHead:
+    """
+    One ordered pair's (home side at home) last `window` meetings. `values` is
+    kept current on every `add`, so the features going into their next meeting
+    are a lookup, not a scan.
+    """
+
+    def __init__(self, window=H2H_WINDOW):
+        self.meetings = deque(maxlen=window)
+        self.total = 0
+        self.values = H2H_EMPTY
+
+    def add(self, date, home_goals, away_goals, ftr):
+        self.meetings.append((date, home_goals, away_goals, ftr))
+        self.total += 1
+
+        count = len(self.meetings)
+        results = [m[3] for m in self.meetings]
+        self.values = (
+            count, results.count('H'), results.count('D'), results.count('A'),
+            float(sum(m[1] for m in self.meetings) / count),
+            float(sum(m[2] for m in self.meetings) / count),
+        )
+
+
+class HeadToHeadIndex:
+    """Every ordered team pair's HeadToHead, in one dict. Unknown pairs have never met."""
+
+    def __init__(self, window=H2H_WINDOW):
+        self.window = window
+        self.pairs = {}
+
+    def add(self, home, away, date, home_goals, away_goals, ftr):
+        pair = self.pairs.get((home, away))
+        if pair is None:
+            pair = self.pairs[(home, away)] = HeadToHead(self.window)
+        pair.add(date, home_goals, away_goals, ftr)
+
+    def get(self, home, away):
+        return self.pairs.get((home, away))
+
+    def values(self, home, away):
+        """Features (in H2H_COLUMNS order) going into the next home v away meeting."""
+        pair = self.pairs.get((home, away))
+        return pair.values if pair is not None else H2H_EMPTY
+
+    def stats(self, home, away):
+        """The same values by H2H_STATS name, as /h2h serves them."""
+        return dict(zip(H2H_STATS, self.values(home, away)))
+
+    def rows(self, league):
+        """The `head_to_head` rows for one league."""
+        rows = []
+        for (home, away), pair in self.pairs.items():
+            recent = [[str(pd.Timestamp(date).date()) if pd.notna(date) else None, float(hg), float(ag), ftr]
+                      for date, hg, ag, ftr in pair.meetings]
+            rows.append({
+                'league': league, 'home_team': home, 'away_team': away,
+                'h2h_window': self.window, 'total_meetings': pair.total,
+                'last_date': pd.Timestamp(pair.meetings[-1][0]).date() if pd.notna(pair.meetings[-1][0]) else None,
+                'recent': json.dumps(recent),
+            })
+        return pd.DataFrame(rows, columns=HEAD_TO_HEAD_COLUMNS)
+
+    @classmethod
+    def from_rows(cls, states, window=H2H_WINDOW):
+        """Rebuilt from stored `head_to_head` rows, ready for more `add`s."""
+        index = cls(window)
+        for state in states.to_dict('records'):
+            for date, hg, ag, ftr in json.loads(state['recent']):
+                index.add(state['home_team'], state['away_team'], pd.Timestamp(date) if date else None, hg, ag, ftr)
+            index.pairs[(state['home_team'], state['away_team'])].total = int(state['total_meetings'])
+        return index
+
+
+def team_result(ftr, is_home):
+    if ftr == 'D':
+        return 'D'
+    return 'W' if (ftr == 'H') == is_home else 'L'
+
+
+def elo_update(h_elo, a_elo, ftr, k_factor=ELO_K):
+    """New (home, away) ratings after a finished match."""
+    prob_h = 1 / (1 + 10 ** ((a_elo - h_elo) / 400))
+
+    # Actual Result (1=Win, 0.5=Draw, 0=Loss)
+    if ftr == 'H': actual = 1
+    elif ftr == 'D': actual = 0.5
+    else: actual = 0
+
+    return h_elo + k_factor * (actual - prob_h), a_elo + k_factor * ((1 - actual) - (1 - prob_h))
+
+
+def replay_team_states(df, window=FORM_WINDOW, h2h_window=H2H_WINDOW, team_rows=None, pair_rows=None):
+    """
+    Each team's post-match form and Elo after replaying a DB-shaped history
+    (snake_case columns), the same way daily_job builds the training features.
+    Given `team_rows`/`pair_rows` dicts, the same pass also records every dated
+    state along the way (see TeamTimelines).
+    """
+    forms, ratings, last_dates = {}, {}, {}
+    head_to_head = HeadToHeadIndex(h2h_window)
+    recording = team_rows is not None
+    df = df.sort_values('date', kind='stable')
+    columns = ['date', 'home_team', 'away_team', 'fthg', 'ftag', 'ftr', 'hst', 'ast', 'hc', 'ac']
+    for date, home, away, fthg, ftag, ftr, hst, ast, hc, ac in df[columns].itertuples(index=False, name=None):
+        for team in (home, away):
+            if team not in forms:
+                forms[team] = TeamForm(window)
+                ratings[team] = ELO_START
+                if recording:
+                    team_rows[team] = ([], [])
+        if pd.isna(fthg) or pd.isna(ftr):
+            continue
+
+        forms[home].add(team_result(ftr, True), fthg, ftag, hst, hc)
+        forms[away].add(team_result(ftr, False), ftag, fthg, ast, ac)
+        ratings[home], ratings[away] = elo_update(ratings[home], ratings[away], ftr)
+        head_to_head.add(home, away, date, fthg, ftag, ftr)
+        last_dates[home] = last_dates[away] = date
+        if not recording or pd.isna(date):
+            continue
+
+        for team in (home, away):
+            dates, states = team_rows[team]
+            dates.append(date)
+            states.append((*forms[team].stats().values(), ratings[team]))
+        dates, values = pair_rows.setdefault((home, away), ([], []))
+        dates.append(date)
+        values.append(head_to_head.values(home, away))
+
+    return forms, ratings, last_dates, head_to_head
+
+
+class TeamTimelines:
+    """
+    Every team's form and Elo after each of its matches, and every ordered pair's
+    head-to-head values after each meeting, as date-sorted arrays. The state going
+    into any date (every match dated before it) is then one binary search instead
+    of a replay over a filtered history. Undated matches can't be placed in time
+    and are left out (they sort last in the replay, so no dated state includes them).
+    """
+
+    def __init__(self, teams, pairs, latest=None):
+        self.teams = teams  # team -> (dates, (matches, TIMELINE_STATS) states)
+        self.pairs = pairs  # (home, away) -> (dates, (meetings, H2H_COLUMNS) values)
+        self.latest = latest  # replay_team_states' result: the states after the whole history
+
+    @classmethod
+    def from_history(cls, df, window=FORM_WINDOW, h2h_window=H2H_WINDOW):
+        """One replay_team_states pass over a DB-shaped history (snake_case columns), recording as it goes."""
+        team_rows, pair_rows = {}, {}
+        latest = replay_team_states(df, window, h2h_window, team_rows, pair_rows)
+
+        def arrays(dates, rows, width):
+            return np.array(dates, dtype='datetime64[ns]'), np.array(rows, dtype=np.float64).reshape(-1, width)
+
+        return cls(
+            {team: arrays(dates, states, len(TIMELINE_STATS)) for team, (dates, states) in team_rows.items()},
+            {pair: arrays(dates, values, len(H2H_COLUMNS)) for pair, (dates, values) in pair_rows.items()},
+            latest,
+        )
+
+    def at(self, as_of):
+        return TimelineSnapshot(self, as_of)
+
+
+class TimelineSnapshot:
+    """
+    Team form and head-to-head going into one date. `get` reads like the served
+    team form dict and `values` like a HeadToHeadIndex, so the prediction engine
+    takes a snapshot in place of the latest state.
+    """
+
+    def __init__(self, timelines, as_of):
+        self.timelines = timelines
+        self.as_of = np.datetime64(pd.Timestamp(as_of), 'ns')
+
+    def get(self, team):
+        timeline = self.timelines.teams.get(team)
+        if timeline is None:
+            return None
+        dates, states = timeline
+        i = int(np.searchsorted(dates, self.as_of, side='left'))
+        if i == 0:
+            return served_stats({**dict.fromkeys(FORM_STATS, 0), 'elo': ELO_START})
+        return served_stats(dict(zip(TIMELINE_STATS, states[i - 1].tolist())))
+
+    def values(self, home, away):
+        pair = self.timelines.pairs.get((home, away))
+        if pair is None:
+            return H2H_EMPTY
+        dates, values = pair
+        i = int(np.searchsorted(dates, self.as_of, side='left'))
+        return tuple(values[i - 1].tolist()) if i else H2H_EMPTY
+
+
+def team_state_rows(league, forms, ratings, last_dates):
+    """The `team_form` rows for one league."""
+    rows = []
+    for team, form in forms.items():
+        rows.append({
+            'league': league, 'team': team,
+            'form_window': form.games.maxlen, 'games': len(form.games),
+            'last_date': last_dates.get(team),
+            **form.stats(),
+            'elo': float(ratings.get(team, ELO_START)),
+        })
+    return pd.DataFrame(rows, columns=TEAM_FORM_COLUMNS)
+
+
+def served_stats(state):
+    """A `team_form` row in the shape /predict returns."""
+    return {
+        'elo': float(state['elo']),
+        'wins': int(state['wins']), 'draws': int(state['draws']), 'losses': int(state['losses']),
+        'pts': int(state['points']),
+        'gs_avg': float(state['goals_scored_avg']), 'gc_avg': float(state['goals_conceded_avg']),
+        'sot_avg': float(state['sot_avg']),
+        'corners_avg': float(state['corners_avg']),
+    }
+
+
+def to_feature_names(df):
+    return df.rename(columns=DB_TO_FEATURE)
+
+
+def build_manifest(X=None, columns=FEATURE_COLUMNS, classes=CLASSES):
+    """Feature names, order and dtypes (from the training matrix when given), plus class order."""
+    dtypes = {c: str(X[c].dtype) for c in columns} if X is not None else {}
+    return {
+        "version": MANIFEST_VERSION,
+        "features": [{"name": c, "dtype": dtypes.get(c, "float32")} for c in columns],
+        "classes": list(classes),
+        "form_window": FORM_WINDOW,
+        "h2h_window": H2H_WINDOW,
+    }
+
+
+def manifest_for_model(model):
+    """Manifest for models stored before manifests existed (bundled pickle, old DB rows)."""
+    # sklearn keeps the names as numpy str_: plain str, so manifests and layouts serialize anywhere
+    columns = [str(c) for c in getattr(model, 'feature_names_in_', FEATURE_COLUMNS)]
+    manifest = build_manifest(columns=columns)
+    manifest.pop("form_window")  # Unknown for these
+    manifest.pop("h2h_window")
+    return manifest
+
+
+def load_manifest(raw, model):
+    if raw:
+        return json.loads(raw) if isinstance(raw, (str, bytes)) else raw
+    return manifest_for_model(model)
+
+
+class FeatureLayout:
+    """
+    A manifest compiled into fixed positions. `positions` maps the order in
+    which the prediction engine produces values (`SERVED_FEATURES`) onto the
+    model's column order, so a request fills one float32 row with a single
+    fancy-index assignment: no DataFrame, no reindex, no silent zero-fill.
+    Optional features the model was not trained with are left out (`sources`).
+    """
+
+    def __init__(self, manifest, model=None):
+        self.names = [f["name"] for f in manifest["features"]]
+        self.classes = list(manifest.get("classes", CLASSES))
+        self.form_window = manifest.get("form_window")
+        self.h2h_window = manifest.get("h2h_window")
+        self.labels = [OUTCOME_LABELS[c] for c in self.classes]
+        self.index = {name: i for i, name in enumerate(self.names)}
+
+        # All validation happens here, once per model load
+        model_names = getattr(model, 'feature_names_in_', None)
+        if model_names is not None and list(model_names) != self.names:
+            raise ValueError(f"Feature manifest does not match the model's columns: {self.names} vs {list(model_names)}")
+
+        missing = [c for c in FEATURE_COLUMNS if c not in self.index]
+        unknown = [c for c in self.names if c not in SERVED_FEATURES]
+        if missing or unknown:
+            raise ValueError(f"Feature manifest mismatch. Missing: {missing}, unknown: {unknown}")
+
+        used = [i for i, c in enumerate(SERVED_FEATURES) if c in self.index]
+        self.uses_h2h = any(c in self.index for c in H2H_COLUMNS)
+        self.sources = None if len(used) == len(SERVED_FEATURES) else np.array(used, dtype=np.intp)
+        self.positions = np.array([self.index[SERVED_FEATURES[i]] for i in used], dtype=np.intp)
+
+    def new_matrix(self, rows=1):
+        return np.empty((rows, len(self.names)), dtype=np.float32)
+
+    def fill(self, matrix, row, values):
+        """`values` in SERVED_FEATURES order."""
+        if self.sources is not None:
+            values = [values[i] for i in self.sources]
+        matrix[row, self.positions] = values
+        return matrix
@@ -0,0 +1,39 @@
+import os
+from dotenv import load_dotenv
+
+load_dotenv()
+
+# League ids are the football-data.org competition codes, so they can be used
+# directly in API URLs. `csv_code` is the football-data.co.uk file name.
+LEAGUES = {
+    "PL":  {"name": "Premier League", "country": "England",     "csv_code": "E0"},
+    "ELC": {"name": "Championship",   "country": "England",     "csv_code": "E1"},
+    "PD":  {"name": "La Liga",        "country": "Spain",       "csv_code": "SP1"},
+    "BL1": {"name": "Bundesliga",     "country": "Germany",     "csv_code": "D1"},
+    "SA":  {"name": "Serie A",        "country": "Italy",       "csv_code": "I1"},
+    "FL1": {"name": "Ligue 1",        "country": "France",      "csv_code": "F1"},
+    "DED": {"name": "Eredivisie",     "country": "Netherlands", "csv_code": "N1"},
+    "PPL": {"name": "Primeira Liga",  "country": "Portugal",    "csv_code": "P1"},
+}
+
+DEFAULT_LEAGUE = "PL"
+
+# Which leagues this deployment ingests and serves, e.g. LEAGUES=PL,PD,BL1
+ENABLED_LEAGUES = [
+    code.strip().upper()
+    for code in os.getenv("LEAGUES", DEFAULT_LEAGUE).split(",")
+    if code.strip()
+]
+
+CSV_BASE_URL = "https://www.football-data.co.uk/mmz4281"
+# Every league's upcoming fixtures with current bookmaker prices (one file, a `Div` column per row)
+FIXTURES_CSV_URL = "https://www.football-data.co.uk/fixtures.csv"
+
+# football-data.co.uk season folders ('1516' = 2015/16)
+HISTORY_SEASONS = ["1516", "1617", "1718", "1819", "1920", "2021", "2122", "2223", "2324", "2425", "2526"]
+CURRENT_SEASON = "2526"
+CURRENT_SEASON_LABEL = "2025-26"
+
+
+def season_csv_url(league, season=CURRENT_SEASON):
+    return f"{CSV_BASE_URL}/{season}/{LEAGUES[league]['csv_code']}.csv"
@@ -1,22 +1,75 @@
-from fastapi import FastAPI, HTTPException, Response
+from contextlib import asynccontextmanager
+from fastapi import FastAPI, HTTPException, Query, Request, Response
 from fastapi.middleware.cors import CORSMiddleware
-from pydantic import BaseModel
+from fastapi.middleware.gzip import GZipMiddleware
+from fastapi.responses import StreamingResponse
+from pydantic import BaseModel, Field
 import requests
 import joblib
 import pandas as pd
+import numpy as np
 import os
 import io
+import csv
+import time
+import json
+import hashlib
+from collections import OrderedDict
+from datetime import date, datetime, timezone
 from dotenv import load_dotenv
 from sqlalchemy import text
 import pickle
 
-from .database import engine
-from .prediction_engine import predict_match_optimized
+from starlette.concurrency import run_in_threadpool
+
+from .database import engine, async_engine, ensure_schema, fetch_one, warm_up_pool
+from . import admission, executor
+from .artifacts import content_hash, read_cached, unpack_model, write_cached
+from .batcher import PredictionBatcher
+from .odds import OUTCOMES, empty_store, load_odds_store, scan_value
+from .prediction_log import PredictionLog
+from .responses import GZIP_MIN_SIZE, FastJSONResponse, cached_json, dumps, json_response
+from .scoreline import fit_scoreline_model
+from .shadow import ShadowScorer
+from .timeseries import HISTORY_PAGE_MAX, HISTORY_PAGE_SIZE, RESOLUTIONS, page, select_points
+from .simulation import SIMULATION_CACHE_SIZE, SIMULATION_DEFAULT, SIMULATION_MAX, current_season, simulate_season
+from .leagues import LEAGUES, DEFAULT_LEAGUE, ENABLED_LEAGUES
+from .teams import TeamRegistry
+from .features import (
+    DB_TO_FEATURE, FORM_WINDOW, H2H_WINDOW, OUTCOME_KEYS, OUTCOME_LABELS, TIMELINE_STATS, FeatureLayout, HeadToHeadIndex, TeamTimelines,
+    load_manifest, manifest_for_model, served_stats, team_state_rows
+)
 from .utils import calculate_elo_ratings, calculate_team_form
 
 load_dotenv()
 
-app = FastAPI()
+
+@asynccontextmanager
+async def lifespan(app):
+    await warm_up_pool()
+    await executor.warm_up()
+    batcher.start()
+    prediction_log.start()
+    shadow.start()
+    yield
+    await batcher.stop()
+    await shadow.stop()
+    await prediction_log.stop()
+    executor.shutdown()
+    if async_engine is not None:
+        await async_engine.dispose()
+
+
+app = FastAPI(lifespan=lifespan, default_response_class=FastJSONResponse)
+if GZIP_MIN_SIZE > 0:
+    app.add_middleware(GZipMiddleware, minimum_size=GZIP_MIN_SIZE)
+
+# Collects concurrent single /predict calls into micro-batches for the executor
+batcher = PredictionBatcher()
+# Every served prediction, bulk-inserted into `predictions` in the background
+prediction_log = PredictionLog()
+# A candidate model scoring the same traffic off the request path, logged next to the served answers
+shadow = ShadowScorer(prediction_log, lambda league: (league_form.get(league, {}), league_h2h.get(league)))
 
 
 API_KEY = os.getenv("API_KEY")
@@ -41,33 +94,80 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-def load_dynamic_model():
-    print("📥 Checking Database for updated model...")
-    try:
-        query = text("SELECT model_binary, encoder_binary FROM model_store ORDER BY id DESC LIMIT 1")
-        with engine.connect() as conn:
-            result = conn.execute(query).fetchone()
-            
+def load_stored_model(league, candidate=False):
+    """
+    The league's latest `model_store` model as (model, encoder, manifest, id): the
+    latest servable one, or with `candidate` the latest candidate (shadow-scored only).
+    """
+    stage = "stage = 'candidate'" if candidate else "(stage IS NULL OR stage != 'candidate')"
+    # 1. Only the id and hash first: the artifact itself may already be on local disk
+    query = text(f"SELECT id, artifact_hash, feature_schema FROM model_store WHERE league = :league AND {stage} ORDER BY id DESC LIMIT 1")
+    with engine.connect() as conn:
+        result = conn.execute(query, {"league": league}).fetchone()
+
+        if result and result[1]:
+            model_id, artifact_hash, _ = result
+            blob = read_cached(artifact_hash)
+            source = "local cache"
+            if blob is None:
+                blob = bytes(conn.execute(text("SELECT artifact FROM model_store WHERE id = :id"), {"id": model_id}).scalar())
+                if content_hash(blob) != artifact_hash:
+                    raise ValueError(f"Artifact {model_id} does not match its hash")
+                write_cached(artifact_hash, blob)
+                source = "Database"
+
+            dyn_model, dyn_le, manifest, _ = unpack_model(blob)
+            print(f"✅ [{league}] Loaded model {artifact_hash[:12]} from {source}!")
+            return dyn_model, dyn_le, manifest, model_id
+
         if result:
-            model_blob, encoder_blob = result
+            # 2. Rows saved before artifacts existed are pickles
+            model_id, _, feature_schema = result
+            model_blob, encoder_blob = conn.execute(
+                text("SELECT model_binary, encoder_binary FROM model_store WHERE id = :id"), {"id": model_id}
+            ).fetchone()
             dyn_model = pickle.loads(model_blob)
             dyn_le = pickle.loads(encoder_blob)
-            print("✅ Loaded latest model from Database!")
-            return dyn_model, dyn_le
+            print(f"✅ [{league}] Loaded latest model from Database!")
+            return dyn_model, dyn_le, load_manifest(feature_schema, dyn_model), model_id
+    return None, None, None, None
+
+
+def load_dynamic_model(league=DEFAULT_LEAGUE):
+    print(f"📥 [{league}] Checking Database for updated model...")
+    try:
+        dyn_model, dyn_le, manifest, model_id = load_stored_model(league)
+        if dyn_model is not None:
+            model_versions[league] = model_id
+            return dyn_model, dyn_le, manifest
     except Exception as e:
-        print(f"⚠️ DB Model Load failed (using fallback): {e}")
-    return None, None
+        print(f"⚠️ [{league}] DB Model Load failed (using fallback): {e}")
+    return None, None, None
+
+
+def load_candidate_model(league):
+    """The latest candidate saved after the served model (retrain.py --candidate), or nothing to shadow."""
+    try:
+        model, le, manifest, model_id = load_stored_model(league, candidate=True)
+    except Exception as e:
+        print(f"⚠️ [{league}] Candidate model load failed (not shadowing): {e}")
+        return None, None, None, None
+    live = model_versions.get(league)
+    if model is None or (isinstance(live, int) and model_id < live):
+        return None, None, None, None
+    return model, le, manifest, model_id
 
-model, le = load_dynamic_model()
 
 BASE_DIR = os.path.dirname(os.path.abspath(__file__))
 model_path = os.path.join(BASE_DIR, "..", "ml_artifacts", "football_model_final.pkl")
 
 
-if model is None:
-
+def load_static_model():
+    """The bundled artifacts are a Premier League model, used until the DB has one."""
+    model, le = None, None
     try:
         model = joblib.load(model_path)
+        model_versions[DEFAULT_LEAGUE] = "static"
         print("Static model loaded")
     except FileNotFoundError:
         print("WARNING: Model file not found. Prediction endpoint will fail.")
@@ -80,6 +180,9 @@ if model is None:
     except FileNotFoundError:
         print("Encoders not Found!!")
 
+    manifest = manifest_for_model(model) if model is not None else None
+    return model, le, manifest
+
 
 # history_path = os.path.join(BASE_DIR, 'match_history.csv')
 # try:
@@ -90,61 +193,383 @@ if model is None:
 # except FileNotFoundError:
 #     print("History csv not found")
 
-def load_data():
-    print("Loading data from Database...")
+# ⚠️ CRITICAL: Rename columns back to what the ML Model expects
+# The DB gives 'home_team', but your model likely wants 'HomeTeam'
+HISTORY_COLUMNS = {
+    'home_team': 'HomeTeam',
+    'away_team': 'AwayTeam',
+    'season': 'Season',
+    'date': 'Date',
+    'fthg': 'FTHG',
+    'ftag': 'FTAG',
+    'ftr': 'FTR',
+    'hst': 'HST', 'ast': 'AST', 'hc': 'HC', 'ac': 'AC',
+    # Feature columns (HomeElo, PointsDifference...) come from the shared schema.
+    # Note: snake_case stats (e.g., home_wins_last_5) are usually fine 
+    # as they were likely snake_case in your training CSV too.
+    **DB_TO_FEATURE
+}
+DB_COLUMNS = {new: old for old, new in HISTORY_COLUMNS.items()}  # The served frame back in the DB shape
+
+
+def load_data(league=DEFAULT_LEAGUE):
+    print(f"Loading {league} data from Database...")
     try:
-        # Read from Database
-        query = "SELECT * FROM matches"
-        df = pd.read_sql(query, engine)
-        
-        # ⚠️ CRITICAL: Rename columns back to what the ML Model expects
-        # The DB gives 'home_team', but your model likely wants 'HomeTeam'
-        rename_map = {
-            'home_team': 'HomeTeam',
-            'away_team': 'AwayTeam',
-            'season': 'Season',
-            'date': 'Date',
-            'fthg': 'FTHG',
-            'ftag': 'FTAG',
-            'ftr': 'FTR',
-            'home_elo': 'HomeElo',
-            'away_elo': 'AwayElo',
-            'elo_difference': 'EloDifference',
-            'points_difference': 'PointsDifference',
-            'home_team_code': 'HomeTeamCode',
-            'away_team_code': 'AwayTeamCode',
-            'hst': 'HST', 'ast': 'AST', 'hc': 'HC', 'ac': 'AC'
-            # Note: snake_case stats (e.g., home_wins_last_5) are usually fine 
-            # as they were likely snake_case in your training CSV too.
-        }
-        df = df.rename(columns=rename_map)
+        # Read only this league's partition from Database
+        query = text("SELECT * FROM matches WHERE league = :league")
+        df = pd.read_sql(query, engine, params={"league": league})
+        df = df.rename(columns=HISTORY_COLUMNS)
         
         # Fix Date format
         df['Date'] = pd.to_datetime(df['Date'])
         
-        print(f"✅ Loaded {len(df)} matches from Database.")
+        print(f"✅ [{league}] Loaded {len(df)} matches from Database.")
         return df
     except Exception as e:
-        print(f"❌ Database Load Error: {e}")
+        print(f"❌ [{league}] Database Load Error: {e}")
         return pd.DataFrame()
 
-df_history = load_data()
 
+def load_team_form(league, replayed):
+    """
+    Every team's latest post-match state (form + Elo), as daily_job stored it with the features.
+    `replayed` (replay_team_states' result for the history, or None without one) stands in when nothing is stored.
+    """
+    try:
+        query = text("SELECT * FROM team_form WHERE league = :league")
+        states = pd.read_sql(query, engine, params={"league": league})
+    except Exception as e:
+        print(f"⚠️ [{league}] Team form load failed: {e}")
+        states = pd.DataFrame()
+
+    # Databases from before the table existed (or built with another window): replay once here
+    if states.empty or (states['form_window'] != FORM_WINDOW).any():
+        if replayed is None:
+            return {}
+        print(f"⚠️ [{league}] No stored {FORM_WINDOW}-match team form, using the replayed history.")
+        forms, ratings, last_dates, _ = replayed
+        states = team_state_rows(league, forms, ratings, last_dates)
+
+    return {state['team']: served_stats(state) for state in states.to_dict('records')}
+
+
+def load_head_to_head(league, replayed):
+    """Every ordered pair's recent meetings, as daily_job stored them with the features (else from `replayed`)."""
+    try:
+        query = text("SELECT * FROM head_to_head WHERE league = :league")
+        states = pd.read_sql(query, engine, params={"league": league})
+    except Exception as e:
+        print(f"⚠️ [{league}] Head-to-head load failed: {e}")
+        states = pd.DataFrame()
+
+    if states.empty or (states['h2h_window'] != H2H_WINDOW).any():
+        if replayed is None:
+            return HeadToHeadIndex()
+        print(f"⚠️ [{league}] No stored {H2H_WINDOW}-meeting head-to-head, using the replayed history.")
+        return replayed[3]
+
+    return HeadToHeadIndex.from_rows(states)
+
+
+try:
+    ensure_schema()
+except Exception as e:
+    print(f"⚠️ Could not check the league schema: {e}")
+
+# Every served league keeps its own model, encoder and history partition
+league_models = {}
+league_history = {}
+league_registries = {}
+league_layouts = {}
+league_form = {}
+league_h2h = {}
+league_scorelines = {}
+league_odds = {}
+league_timelines = {}
+model_versions = {}
+
+# What /last-updated serves, so page views never touch the DB.
+# Recomputed whenever a history snapshot or model is (re)loaded.
+data_state = {"version": None, "leagues": {}}
+LAST_UPDATED_MAX_AGE = 60  # seconds
+
+
+def refresh_data_state():
+    leagues = {}
+    for code, df in league_history.items():
+        last_date = df['Date'].max() if not df.empty else None
+        leagues[code] = {
+            "date": str(last_date.date()) if last_date is not None and pd.notna(last_date) else None,
+            "matches": len(df),
+            "model": model_versions.get(code),
+        }
+
+    fingerprint = json.dumps(leagues, sort_keys=True, default=str)
+    data_state["leagues"] = leagues
+    data_state["version"] = hashlib.sha1(fingerprint.encode()).hexdigest()[:16]
+
+
+def serving_states():
+    """What the prediction executor scores against, for every league with a model."""
+    return {
+        league: (model, league_form.get(league, {}), league_registries[league], league_layouts[league],
+                 league_h2h.get(league), league_scorelines.get(league), league_timelines.get(league))
+        for league, (model, _) in league_models.items()
+        if model is not None and league in league_registries
+    }
+
+
+def reload_history(league):
+    df = load_data(league)
+    league_history[league] = df
+
+    # Name -> (canonical, encoder code), rebuilt with every model/history load
+    _, le = league_models.get(league, (None, None))
+    teams = pd.concat([df['HomeTeam'], df['AwayTeam']]).unique() if not df.empty else []
+    registry = TeamRegistry(le, teams)
+    league_registries[league] = registry
+    # ONE replay of the history: date-sorted team and pair states for predictions as of any
+    # past date, and its final states stand in for team form / head-to-head the DB doesn't hold
+    timelines = TeamTimelines.from_history(df.rename(columns=DB_COLUMNS)) if not df.empty else None
+    league_timelines[league] = timelines
+    replayed = timelines.latest if timelines is not None else None
+    league_form[league] = load_team_form(league, replayed)
+    league_h2h[league] = load_head_to_head(league, replayed)
+    # Poisson strengths from the same snapshot: scorelines, and the fallback without an XGBoost model
+    league_scorelines[league] = fit_scoreline_model(df) if not df.empty else None
+    league_odds[league] = load_odds_store(league)
+
+    executor.load(serving_states())
+    refresh_data_state()
+
+
+def reload_league(league):
+    model, le, manifest = load_dynamic_model(league)
+    if model is None and league == DEFAULT_LEAGUE:
+        model, le, manifest = load_static_model()
+
+    # The manifest is validated (and compiled) here, once, instead of zero-filling per request
+    layout = None
+    if model is not None:
+        try:
+            layout = FeatureLayout(manifest, model)
+        except ValueError as e:
+            print(f"❌ [{league}] Refusing to serve model: {e}")
+            model, le = None, None
+
+    if layout is not None and layout.form_window not in (None, FORM_WINDOW):
+        print(f"⚠️ [{league}] Model was trained on {layout.form_window}-match form but FORM_WINDOW is {FORM_WINDOW}. Rerun daily_job.")
+    if layout is not None and layout.uses_h2h and layout.h2h_window not in (None, H2H_WINDOW):
+        print(f"⚠️ [{league}] Model was trained on {layout.h2h_window}-meeting head-to-head but H2H_WINDOW is {H2H_WINDOW}. Rerun daily_job.")
+
+    league_models[league] = (model, le)
+    league_layouts[league] = layout
+    shadow.load(league, *load_candidate_model(league))
+    reload_history(league)
+
+
+for league in ENABLED_LEAGUES:
+    reload_league(league)
 
-feature_columns = [
-    'home_wins_last_5', 'home_draws_last_5', 'home_losses_last_5',
-    'away_wins_last_5', 'away_draws_last_5', 'away_losses_last_5',
-    'home_goals_scored_avg', 'home_goals_conceded_avg',
-    'away_goals_scored_avg', 'away_goals_conceded_avg',
-    'home_points_last_5', 'away_points_last_5', 'PointsDifference',
-    'HomeElo', 'AwayElo', 'EloDifference', 'HomeTeamCode', 'AwayTeamCode',
-    'home_sot_avg', 'home_corners_avg',
-    'away_sot_avg', 'away_corners_avg'
-]
 
 class MatchPredictionRequest(BaseModel):
     home_team: str
     away_team: str
+    league: str = DEFAULT_LEAGUE
+    explain: bool = False  # Adds per-feature contributions (computed only when asked, then cached)
+    as_of: date | None = None  # Predict from the team state going into this date (matches before it)
+
+
+class TableRow(BaseModel):
+    team: str
+    points: int = 0
+    goal_difference: int = 0
+
+
+class Fixture(BaseModel):
+    home_team: str
+    away_team: str
+
+
+class SeasonSimulationRequest(BaseModel):
+    league: str = DEFAULT_LEAGUE
+    simulations: int = Field(SIMULATION_DEFAULT, ge=1, le=SIMULATION_MAX)
+    # Both default to the latest season in the history: its table and unplayed pairings
+    table: list[TableRow] | None = None
+    fixtures: list[Fixture] | None = None
+    top: int = 4
+    relegated: int = 3
+
+
+class ExplanationRequest(BaseModel):
+    league: str = DEFAULT_LEAGUE
+    fixtures: list[Fixture] | None = None  # Defaults to the latest season's unplayed pairings
+
+
+# Response shapes. Payloads are built from native floats/ints and returned as
+# ready JSON responses, so these document the API without a validation pass.
+class TeamStats(BaseModel):
+    elo: float
+    wins: int
+    draws: int
+    losses: int
+    pts: int
+    gs_avg: float
+    gc_avg: float
+    sot_avg: float
+    corners_avg: float
+
+
+class ExpectedGoals(BaseModel):
+    home: float
+    away: float
+
+
+class OutcomeProbabilities(BaseModel):
+    home: float
+    draw: float
+    away: float
+
+
+class ScoreProbability(BaseModel):
+    score: str
+    probability: float
+
+
+class Scoreline(BaseModel):
+    expected_goals: ExpectedGoals
+    probabilities: OutcomeProbabilities
+    over_2_5: float
+    under_2_5: float
+    both_teams_score: float
+    top_scores: list[ScoreProbability]
+
+
+class OutcomeScores(BaseModel):
+    home: float
+    draw: float
+    away: float
+
+
+class FeatureContribution(BaseModel):
+    name: str
+    value: float
+    contributions: OutcomeScores  # Log-odds each outcome gains or loses from this feature
+
+
+class Explanation(BaseModel):
+    base: OutcomeScores
+    features: list[FeatureContribution]  # Strongest pull on the predicted outcome first
+
+
+class PredictionResponse(BaseModel):
+    home_team: str
+    away_team: str
+    league: str
+    prediction: str
+    confidence: float
+    home_stats: TeamStats | None
+    away_stats: TeamStats | None
+    engine: str  # "xgboost", or "poisson" while no XGBoost model is loaded
+    scoreline: Scoreline | None
+    explanation: Explanation | None = None  # Only with "explain": true
+    as_of: date | None = None  # Only for point-in-time predictions, which have no scoreline
+
+
+class StandingRow(BaseModel):
+    position: int
+    name: str
+    played: int
+    won: int
+    draw: int
+    lost: int
+    points: int
+    goalDifference: int
+
+
+class SimulatedTeam(BaseModel):
+    team: str
+    points: int
+    expected_points: float
+    expected_position: float
+    title: float
+    top: float
+    relegation: float
+
+
+class Meeting(BaseModel):
+    date: str | None
+    home_goals: float
+    away_goals: float
+    result: str
+
+
+class HeadToHeadResponse(BaseModel):
+    home_team: str
+    away_team: str
+    league: str
+    window: int
+    total_meetings: int
+    meetings: int
+    home_wins: int
+    draws: int
+    away_wins: int
+    home_goals_avg: float
+    away_goals_avg: float
+    recent: list[Meeting]
+
+
+class TeamHistoryResponse(BaseModel):
+    team: str
+    league: str
+    resolution: str
+    matches: int  # In the date range, before downsampling
+    points: int  # On this page
+    dates: list[str]
+    series: dict[str, list[float]]  # Metric -> one value per date: the state after that match
+    next_cursor: str | None = None
+
+
+class FixtureExplanation(BaseModel):
+    home_team: str
+    away_team: str
+    explanation: Explanation | None
+
+
+class ExplanationResponse(BaseModel):
+    league: str
+    model_version: str | None
+    data_version: str | None
+    fixtures: list[FixtureExplanation]
+
+
+class ValueBet(BaseModel):
+    date: str
+    home_team: str
+    away_team: str
+    outcome: str               # "home", "draw" or "away"
+    bookmaker: str
+    odds: float
+    fair_probability: float    # The book's implied probability with its margin removed
+    model_probability: float
+    edge: float                # Expected return per unit staked: model probability x odds - 1
+
+
+class ValueBetResponse(BaseModel):
+    league: str
+    model_version: str | None
+    fixtures: int
+    bookmakers: list[str]
+    bets: list[ValueBet]
+
+
+class SeasonSimulationResponse(BaseModel):
+    league: str
+    simulations: int
+    remaining_fixtures: int
+    model_version: str | None
+    data_version: str | None
+    table: list[SimulatedTeam]
 
 
 
@@ -157,12 +582,46 @@ def home():
     return {"message": "Premier League Predictor API is Alive!"}
 
 
+def check_league(league):
+    league = league.upper()
+    if league not in LEAGUES:
+        raise HTTPException(status_code=404, detail=f"Unknown league '{league}'")
+    return league
+
+
+async def serving_league(league, model=True):
+    """
+    The validated league code for a serving route, with its history loaded (reloaded
+    in the threadpool if the partition is empty). Unknown leagues get a 404, and
+    leagues without a model (when the route needs one) a 503.
+    """
+    league = check_league(league)
+    if model and any(part is None for part in league_models.get(league, (None, None))):
+        raise HTTPException(status_code=503, detail=f"Model for {league} is not loaded. Please run the training script or upload .pkl files.")
+    if league_history[league].empty: await run_in_threadpool(reload_history, league)
+    return league
+
+
+@app.get("/leagues")
+def get_leagues():
+    return [
+        {
+            "code": league,
+            "name": LEAGUES.get(league, {}).get("name", league),
+            "country": LEAGUES.get(league, {}).get("country"),
+            "model_loaded": league_models[league][0] is not None,
+        }
+        for league in league_models
+    ]
+
+
 @app.get("/upcoming")
-def get_upcoming_matches():
+def get_upcoming_matches(league: str = DEFAULT_LEAGUE):
+    league = check_league(league)
 
     headers = {"X-Auth-Token": API_KEY}
 
-    url = f"{BASE_URL}/competitions/PL/matches?status=SCHEDULED"
+    url = f"{BASE_URL}/competitions/{league}/matches?status=SCHEDULED"
 
     response = requests.get(url, headers=headers)
 
@@ -177,85 +636,613 @@ def get_upcoming_matches():
             "homeTeam": match['homeTeam']['shortName'],
             "awayTeam": match['awayTeam']['shortName'],
             "date": match['utcDate'],
-            "matchday": match['matchday']
+            "matchday": match['matchday'],
+            "league": league
         })
     return matches
 
-@app.post("/predict")
-def predict_match(match: MatchPredictionRequest):
+def scoreline_prediction(league, home_team, away_team):
+    """The Poisson engine's answer alone (microseconds), for leagues without a loaded XGBoost model."""
+    scorelines = league_scorelines.get(league)
+    registry = league_registries.get(league)
+    if scorelines is None or registry is None:
+        return None
+    home, away = registry.resolve(home_team), registry.resolve(away_team)
+    if home is None or away is None:
+        return json_response({"error": f"Could not predict. Maybe team name was wrong {home_team} or {away_team}?"})
+
+    summary, = scorelines.summaries([home.name], [away.name])
+    probs = summary["probabilities"]
+    outcome = max(probs, key=probs.get)
+    prediction_log.record(league, home.name, away.name, ['H', 'D', 'A'], [probs["home"], probs["draw"], probs["away"]], "poisson")
+
+    form = league_form.get(league, {})
+    return json_response({
+        "home_team": home_team,
+        "away_team": away_team,
+        "league": league,
+        "prediction": OUTCOME_LABELS[{"home": 'H', "draw": 'D', "away": 'A'}[outcome]],
+        "confidence": probs[outcome],
+        "home_stats": form.get(home.name),
+        "away_stats": form.get(away.name),
+        "engine": "poisson",
+        "scoreline": summary,
+    })
+
+
+# (league, data version, home, away as asked, explain) -> serialized response: what an overloaded /predict serves first
+prediction_cache = OrderedDict()
+PREDICTION_CACHE_SIZE = int(os.getenv("PREDICTION_CACHE_SIZE", 4096))
+
+
+@app.post("/predict", response_model=PredictionResponse)
+async def predict_match(match: MatchPredictionRequest):
     
+    league = match.league.upper()
+    model, le = league_models.get(league, (None, None))
     if model is None or le is None:
-        return {"error": "Model is not loaded. Please run the training script or upload .pkl files."}
-    global df_history
-    if df_history.empty: df_history = load_data()
-
-    result = predict_match_optimized(
-        model,
-        match.home_team,
-        match.away_team,
-        df_history,
-        le,
-        feature_columns
-    )
+        fallback = scoreline_prediction(league, match.home_team, match.away_team) if match.as_of is None else None
+        if fallback is not None:
+            return fallback
+        return json_response({"error": f"Model for {league} is not loaded. Please run the training script or upload .pkl files."})
+
+    # Under load a recent identical answer goes out at once instead of joining the queue
+    # (not logged again: the prediction log already has it)
+    gate = admission.gates["predict"]
+    key = (league, data_state["version"], match.home_team, match.away_team, match.explain, match.as_of)
+    if gate.saturated and key in prediction_cache:
+        gate.served_from_cache += 1
+        return cached_json(prediction_cache[key])
+    if not await gate.acquire():
+        return gate.overloaded()
+
+    started = time.perf_counter()
+    try:
+        response = await serve_prediction(match, league)
+    finally:
+        gate.release(started)
+
+    if isinstance(response, bytes):
+        prediction_cache[key] = response
+        while len(prediction_cache) > PREDICTION_CACHE_SIZE:
+            prediction_cache.popitem(last=False)
+        return cached_json(response)
+    return response
+
+
+async def serve_prediction(match, league):
+    """The XGBoost answer as JSON bytes, or an error response."""
+    league = await serving_league(league)
+
+    # Queued for the next micro-batch, which the prediction executor scores off the event loop
+    result = await batcher.predict(league, match.home_team, match.away_team, match.as_of)
 
     if result:
-        winner, probs, h_stats, a_stats = result
+        winner, probs, h_stats, a_stats, scoreline = result
         confidence = max(probs)
 
-        return {
+        registry = league_registries[league]
+        home, away = registry.resolve(match.home_team).name, registry.resolve(match.away_team).name
+        if match.as_of is None:  # A look back is not a forecast: keep it out of the accuracy log
+            # The shadow row gets the same timestamp, which pairs the two answers in the log
+            predicted_at = datetime.now(timezone.utc).replace(tzinfo=None)
+            prediction_log.record(league, home, away, league_layouts[league].classes, probs, model_versions.get(league),
+                                  predicted_at=predicted_at)
+            shadow.submit(league, home, away, predicted_at)
+
+        payload = {
             "home_team": match.home_team,
             "away_team": match.away_team,
+            "league": league,
             "prediction": winner, 
             "confidence": float(confidence),
             "home_stats": h_stats,
-            "away_stats": a_stats
+            "away_stats": a_stats,
+            "engine": "xgboost",
+            "scoreline": scoreline
         }
+        if match.as_of is not None:
+            payload["as_of"] = str(match.as_of)
+        if match.explain:
+            # TreeSHAP costs ~10x the prediction itself, so it only runs when a client asks
+            payload["explanation"], = await explain_fixtures(league, [(home, away)], match.as_of)
+        return dumps(payload)
+    else:
+        return json_response({"error": f"Could not predict. Maybe team name was wrong {match.home_team} or {match.away_team}?"})
+
+
+# (league, model version, data version, as_of, home, away) -> explanation, filled in batches
+explanation_cache = OrderedDict()
+EXPLANATION_CACHE_SIZE = int(os.getenv("EXPLANATION_CACHE_SIZE", 4096))
+
+
+async def explain_fixtures(league, fixtures, as_of=None):
+    """Explanations for (canonical home, away) fixtures: cached ones as they are, all the others in ONE executor batch."""
+    version = (league, model_versions.get(league), data_state["version"], as_of)
+    found = {}
+    for fixture in fixtures:
+        if version + fixture in explanation_cache:
+            explanation_cache.move_to_end(version + fixture)
+            found[fixture] = explanation_cache[version + fixture]
+
+    missing = list(dict.fromkeys(fixture for fixture in fixtures if fixture not in found))
+    if missing:
+        for fixture, explanation in zip(missing, await executor.explain(league, missing, as_of)):
+            found[fixture] = explanation
+            if explanation is not None:
+                explanation_cache[version + fixture] = explanation
+        while len(explanation_cache) > EXPLANATION_CACHE_SIZE:
+            explanation_cache.popitem(last=False)
+
+    return [found[fixture] for fixture in fixtures]
+
+
+@app.post("/explain", response_model=ExplanationResponse)
+async def explain_matches(request: ExplanationRequest):
+    """Per-feature contributions for many fixtures at once, e.g. a whole matchday to cache ahead of /predict."""
+    league = await serving_league(request.league)
+    registry = league_registries[league]
+
+    if request.fixtures is None:
+        _, fixtures = current_season(league_history[league])
     else:
-        return {"error": f"Could not predict. Maybe team name was wrong {match.home_team} or {match.away_team}?"}
+        fixtures = []
+        for fixture in request.fixtures:
+            home, away = registry.resolve(fixture.home_team), registry.resolve(fixture.away_team)
+            if home is None or away is None:
+                return json_response({"error": f"Unknown team '{fixture.home_team if home is None else fixture.away_team}'"})
+            fixtures.append((home.name, away.name))
+
+    # Fully cached batches skip the queue
+    gate = admission.gates["explain"]
+    version = (league, model_versions.get(league), data_state["version"], None)
+    if all(version + fixture in explanation_cache for fixture in fixtures):
+        if gate.saturated:
+            gate.served_from_cache += 1
+        explanations = await explain_fixtures(league, fixtures)
+    else:
+        if not await gate.acquire():
+            return gate.overloaded()
+        started = time.perf_counter()
+        try:
+            explanations = await explain_fixtures(league, fixtures)
+        finally:
+            gate.release(started)
+
+    return json_response({
+        "league": league,
+        "model_version": model_versions.get(league),
+        "data_version": data_state["version"],
+        "fixtures": [
+            {"home_team": home, "away_team": away, "explanation": explanation}
+            for (home, away), explanation in zip(fixtures, explanations)
+        ],
+    })
+
+
+
+@app.get("/h2h/{home_team}/{away_team}", response_model=HeadToHeadResponse)
+def get_head_to_head(home_team: str, away_team: str, league: str = DEFAULT_LEAGUE):
+    """The last H2H_WINDOW meetings with `home_team` at home: one lookup in the pair index."""
+    league = check_league(league)
+    registry = league_registries.get(league)
+    home = registry.resolve(home_team) if registry is not None else None
+    away = registry.resolve(away_team) if registry is not None else None
+    if home is None or away is None:
+        raise HTTPException(status_code=404, detail=f"Unknown team '{home_team if home is None else away_team}'")
+
+    index = league_h2h.get(league) or HeadToHeadIndex()
+    pair = index.get(home.name, away.name)
+    meetings = list(pair.meetings) if pair is not None else []
+    return json_response({
+        "home_team": home.name,
+        "away_team": away.name,
+        "league": league,
+        "window": index.window,
+        "total_meetings": pair.total if pair is not None else 0,
+        **index.stats(home.name, away.name),
+        "recent": [
+            {
+                "date": str(pd.Timestamp(date).date()) if pd.notna(date) else None,
+                "home_goals": float(home_goals), "away_goals": float(away_goals), "result": ftr,
+            }
+            for date, home_goals, away_goals, ftr in reversed(meetings)
+        ],
+    })
+
+
+@app.get("/teams/{team}/history", response_model=TeamHistoryResponse)
+async def get_team_history(team: str, league: str = DEFAULT_LEAGUE, start: date | None = None, end: date | None = None,
+                           metrics: str = "elo,points", resolution: str = "match", points: int | None = Query(None, ge=2),
+                           cursor: date | None = None, limit: int = Query(HISTORY_PAGE_SIZE, ge=1, le=HISTORY_PAGE_MAX)):
+    """
+    A team's Elo and form after each match, straight from its in-memory timeline:
+    range, resolution, LTTB downsampling (on the first metric) and paging are all
+    index selections on the date-sorted arrays. Columnar, so pages stay small.
+    """
+    league = await serving_league(league, model=False)
+    registry = league_registries.get(league)
+    resolved = registry.resolve(team) if registry is not None else None
+    timelines = league_timelines.get(league)
+    if resolved is None or timelines is None:
+        raise HTTPException(status_code=404, detail=f"Unknown team '{team}'")
+
+    names = [m.strip() for m in metrics.split(",") if m.strip()]
+    unknown = [m for m in names if m not in TIMELINE_STATS]
+    if not names or unknown:
+        raise HTTPException(status_code=400, detail=f"Unknown metrics {unknown}. Choose from {TIMELINE_STATS}")
+    if resolution not in RESOLUTIONS:
+        raise HTTPException(status_code=400, detail=f"Unknown resolution '{resolution}'. Choose from {list(RESOLUTIONS)}")
 
+    dates, states = timelines.teams.get(resolved.name, (np.empty(0, dtype='datetime64[ns]'), np.empty((0, len(TIMELINE_STATS)))))
+    columns = [TIMELINE_STATS.index(m) for m in names]
+    rows, matches = select_points(dates, states[:, columns[0]], start, end, resolution, points)
+    rows, next_cursor = page(dates, rows, cursor, limit)
+
+    return json_response({
+        "team": resolved.name,
+        "league": league,
+        "resolution": resolution,
+        "matches": max(matches, 0),  # An end before the start is an empty range
+        "points": len(rows),
+        "dates": np.datetime_as_string(dates[rows], unit='D').tolist(),
+        "series": {name: states[rows, c].tolist() for name, c in zip(names, columns)},
+        "next_cursor": next_cursor,
+    })
+
+
+# (league, data version, request fingerprint) -> serialized response, so repeat projections cost nothing
+simulation_cache = OrderedDict()
+
+
+@app.post("/simulate/season", response_model=SeasonSimulationResponse)
+async def simulate_league_season(request: SeasonSimulationRequest):
+    league = await serving_league(request.league)
+    registry = league_registries[league]
+
+    # 1. The table and fixtures, in canonical names
+    table, fixtures = current_season(league_history[league])
+    if request.table is not None:
+        table = {row.team: {"points": row.points, "goal_difference": row.goal_difference} for row in request.table}
+    if request.fixtures is not None:
+        fixtures = [(fixture.home_team, fixture.away_team) for fixture in request.fixtures]
+
+    names = {}
+    for name in list(table) + [team for fixture in fixtures for team in fixture]:
+        team = registry.resolve(name)
+        if team is None:
+            return json_response({"error": f"Unknown team '{name}'"})
+        names[name] = team.name
+    table = {names[name]: row for name, row in table.items()}
+    fixtures = [(names[home], names[away]) for home, away in fixtures]
+    if not table:
+        return json_response({"error": f"No table to simulate for {league}"})
+    missing = {team for fixture in fixtures for team in fixture} - set(table)
+    if missing:
+        return json_response({"error": f"Teams not in the table: {', '.join(sorted(missing))}"})
+
+    simulations = request.simulations
+    request_key = json.dumps([sorted(table.items()), fixtures, simulations, request.top, request.relegated], default=str)
+    key = (league, data_state["version"], model_versions.get(league), hashlib.sha1(request_key.encode()).hexdigest())
+    # Cached projections never wait behind running simulations
+    gate = admission.gates["simulate"]
+    if key in simulation_cache:
+        simulation_cache.move_to_end(key)
+        if gate.saturated:
+            gate.served_from_cache += 1
+        return cached_json(simulation_cache[key])
+
+    if not await gate.acquire():
+        return gate.overloaded()
+    started = time.perf_counter()
+    try:
+        body = await run_simulation(league, table, fixtures, simulations, request.top, request.relegated)
+    finally:
+        gate.release(started)
+    if isinstance(body, bytes):
+        simulation_cache[key] = body
+        while len(simulation_cache) > SIMULATION_CACHE_SIZE:
+            simulation_cache.popitem(last=False)
+        return cached_json(body)
+    return body
+
+
+async def run_simulation(league, table, fixtures, simulations, top, relegated):
+    """The projection as JSON bytes, or an error response."""
+    # 2. Every remaining fixture's probabilities in one batch
+    results = await executor.score(league, fixtures) if fixtures else []
+    unscored = [f"{home} v {away}" for (home, away), result in zip(fixtures, results) if not result]
+    if unscored:
+        return json_response({"error": f"Could not predict {', '.join(unscored[:5])}"})
+    classes = league_layouts[league].classes
+    columns = [classes.index(code) for code in ('A', 'D', 'H')]
+    probs = [[probs[i] for i in columns] for _, probs, *_ in results]
+
+    # 3. Simulate off the event loop
+    teams = sorted(table)
+    slot = {team: i for i, team in enumerate(teams)}
+    projection = await run_in_threadpool(
+        simulate_season,
+        [table[team]["points"] for team in teams],
+        [table[team]["goal_difference"] for team in teams],
+        [slot[home] for home, _ in fixtures],
+        [slot[away] for _, away in fixtures],
+        probs,
+        simulations,
+        top,
+        relegated,
+    )
+
+    standings = [
+        {
+            "team": team,
+            "points": table[team]["points"],
+            "expected_points": float(projection["expected_points"][i]),
+            "expected_position": float(projection["expected_position"][i]),
+            "title": float(projection["title"][i]),
+            "top": float(projection["top"][i]),
+            "relegation": float(projection["relegation"][i]),
+        }
+        for i, team in enumerate(teams)
+    ]
+    standings.sort(key=lambda row: row["expected_position"])
+    return dumps({
+        "league": league,
+        "simulations": simulations,
+        "remaining_fixtures": len(fixtures),
+        "model_version": model_versions.get(league),
+        "data_version": data_state["version"],
+        "table": standings,
+    })
+
+
+@app.get("/value-bets", response_model=ValueBetResponse)
+async def get_value_bets(league: str = DEFAULT_LEAGUE, min_edge: float = 0.0, limit: int = 50, since: date | None = None):
+    """Every upcoming fixture's bookmaker prices against the model in one vectorized pass, biggest edges first."""
+    league = await serving_league(league)
+
+    # 1. Upcoming fixtures in the odds store, scored in one batch (fixtures with unknown teams drop out)
+    store = league_odds.get(league) or empty_store()
+    rows = store.upcoming(since)
+    results = await executor.score(league, [(store.homes[i], store.aways[i]) for i in rows]) if len(rows) else []
+    known = [j for j, result in enumerate(results) if result]
+    rows = rows[known]
+    classes = league_layouts[league].classes
+    columns = [classes.index(code) for code in OUTCOMES]
+    probs = np.array([[results[j][1][i] for i in columns] for j in known], dtype=np.float32).reshape(-1, 3)
+
+    # 2. (fixtures, books, outcomes) prices against the model probabilities
+    books = store.bookmakers()
+    prices = store.prices(rows, books)
+    (fixture, book, outcome), edge, fair = scan_value(probs, prices, min_edge)
+    top = slice(0, max(limit, 0))
+
+    return json_response({
+        "league": league,
+        "model_version": model_versions.get(league),
+        "fixtures": len(rows),
+        "bookmakers": books,
+        "bets": [
+            {
+                "date": str(store.dates[rows[f]]),
+                "home_team": store.homes[rows[f]],
+                "away_team": store.aways[rows[f]],
+                "outcome": OUTCOME_KEYS[OUTCOMES[o]],
+                "bookmaker": books[b],
+                "odds": round(float(prices[f, b, o]), 3),  # Feeds quote at most 3 decimals; drops the float32 noise
+                "fair_probability": float(fair[f, b, o]),
+                "model_probability": float(probs[f, o]),
+                "edge": float(edge[f, b, o]),
+            }
+            for f, b, o in zip(fixture[top].tolist(), book[top].tolist(), outcome[top].tolist())
+        ],
+    })
+
+
+# --- EXPORT ---
+EXPORT_BATCH = int(os.getenv("EXPORT_BATCH", 500))  # Fixtures per model call while streaming an export
+EXPORT_FORMATS = {"ndjson": "application/x-ndjson", "csv": "text/csv"}
+
+
+def export_rows(league, season=None, team=None, start=None, end=None):
+    """
+    Positions of the dated history matches to export, oldest first: one vectorized mask per filter.
+    Fixtures the model can't score (a team its encoder never saw, e.g. promoted since) are left out
+    here, so X-Export-Fixtures counts exactly the rows the stream will hold.
+    """
+    df = league_history[league]
+    dates = df['Date']
+    registry = league_registries[league]
+    encoded = []
+    for name in pd.unique(df[['HomeTeam', 'AwayTeam']].to_numpy().ravel()):
+        resolved = registry.resolve(name)
+        if resolved is not None and resolved.code is not None:
+            encoded.append(name)
+    mask = dates.notna().to_numpy()
+    mask &= (df['HomeTeam'].isin(encoded) & df['AwayTeam'].isin(encoded)).to_numpy()
+    if season is not None:
+        mask &= ((dates >= pd.Timestamp(season, 7, 1)) & (dates < pd.Timestamp(season + 1, 7, 1))).to_numpy()
+    if team is not None:
+        mask &= ((df['HomeTeam'] == team) | (df['AwayTeam'] == team)).to_numpy()
+    if start is not None:
+        mask &= (dates >= pd.Timestamp(start)).to_numpy()
+    if end is not None:
+        mask &= (dates < pd.Timestamp(end) + pd.Timedelta(days=1)).to_numpy()
+    rows = np.flatnonzero(mask)
+    return rows[np.argsort(dates.to_numpy()[rows], kind='stable')]
+
+
+async def stream_export(league, rows, fmt, with_features, gate, started):
+    """
+    Scores `rows` EXPORT_BATCH fixtures at a time, each as of its own date, and
+    yields every batch as soon as it is serialized: memory stays one batch deep
+    whatever the export size. Releases the admission slot when done or dropped.
+    """
+    try:
+        df = league_history[league]
+        layout = league_layouts[league]
+        keys = [OUTCOME_KEYS[c] for c in layout.classes]
+        names = [str(name) for name in layout.names] if with_features else []  # orjson only takes str keys
+        columns = ['date', 'home_team', 'away_team', 'result', 'home_goals', 'away_goals', 'prediction'] + [f"p_{k}" for k in keys] + names
+        if fmt == "csv":
+            yield (",".join(columns) + "\n").encode()
+
+        for begin in range(0, len(rows), EXPORT_BATCH):
+            batch = df.iloc[rows[begin:begin + EXPORT_BATCH]]
+            dates = list(batch['Date'])
+            results = await executor.export(league, list(zip(batch['HomeTeam'], batch['AwayTeam'])), as_of=dates)
+
+            out = io.StringIO() if fmt == "csv" else None
+            writer = csv.writer(out, lineterminator="\n") if out is not None else None
+            lines = []
+            for (home, away, ftr, hg, ag), date, result in zip(
+                batch[['HomeTeam', 'AwayTeam', 'FTR', 'FTHG', 'FTAG']].itertuples(index=False, name=None), dates, results
+            ):
+                if result is None:
+                    continue
+                probs, values = result
+                fixed = [
+                    str(date.date()), home, away, ftr if isinstance(ftr, str) else None,
+                    None if pd.isna(hg) else int(hg), None if pd.isna(ag) else int(ag),
+                    layout.labels[int(np.argmax(probs))],
+                ]
+                if writer is not None:
+                    writer.writerow(fixed + probs + (values if with_features else []))
+                else:
+                    row = dict(zip(columns, fixed))
+                    row["probabilities"] = dict(zip(keys, probs))
+                    if with_features:
+                        row["features"] = dict(zip(names, values))
+                    lines.append(dumps(row))
+            if writer is not None:
+                yield out.getvalue().encode()
+            elif lines:
+                yield b"\n".join(lines) + b"\n"
+    finally:
+        gate.release(started)
+
+
+@app.get("/export")
+async def export_predictions(league: str = DEFAULT_LEAGUE, season: int | None = None, team: str | None = None,
+                             start: date | None = None, end: date | None = None, format: str = "ndjson",
+                             features: bool = True):
+    """
+    Streams predictions, probabilities and model inputs for a filtered set of
+    history fixtures (season = its start year), each scored as of its own date.
+    """
+    if format not in EXPORT_FORMATS:
+        raise HTTPException(status_code=400, detail=f"Unknown format '{format}'. Choose from {list(EXPORT_FORMATS)}")
+    league = await serving_league(league)
+
+    if team is not None:
+        resolved = league_registries[league].resolve(team)
+        if resolved is None:
+            raise HTTPException(status_code=404, detail=f"Unknown team '{team}'")
+        team = resolved.name
+    rows = export_rows(league, season, team, start, end)
+
+    # The slot is held until the stream ends (stream_export releases it)
+    gate = admission.gates["export"]
+    if not await gate.acquire():
+        return gate.overloaded()
+    return StreamingResponse(
+        stream_export(league, rows, format, features, gate, time.perf_counter()),
+        media_type=EXPORT_FORMATS[format],
+        headers={
+            "Content-Disposition": f'attachment; filename="{league}_predictions.{format}"',
+            "X-Export-Fixtures": str(len(rows)),
+        },
+    )
+
+
+@app.get("/metrics")
+def get_metrics():
+    return {
+        "batching": batcher.metrics(),
+        "prediction_log": prediction_log.metrics(),
+        "shadow": shadow.metrics(),
+        "admission": {route: gate.metrics() for route, gate in admission.gates.items()},
+    }
 
 
 # In backend/main.py
 
+def etag_matches(request, etag):
+    if_none_match = request.headers.get("if-none-match")
+    if not if_none_match:
+        return False
+    tags = [tag.strip().removeprefix("W/") for tag in if_none_match.split(",")]
+    return etag in tags or "*" in tags
+
+
 @app.get("/last-updated")
-def get_latest_update(response: Response):
+async def get_latest_update(request: Request, response: Response, league: str | None = None):
+    scope = league.upper() if league else "all"
+
+    # 1. Serve from memory, with an ETag so repeat visits get a 304
+    dates = [
+        info["date"] for code, info in data_state["leagues"].items()
+        if info["date"] and (not league or code == scope)
+    ]
+    if dates:
+        etag = f'"{data_state["version"]}-{scope}"'
+        headers = {"ETag": etag, "Cache-Control": f"public, max-age={LAST_UPDATED_MAX_AGE}"}
+        if etag_matches(request, etag):
+            return Response(status_code=304, headers=headers)
+
+        response.headers.update(headers)
+        return {
+            "date": max(dates),
+            "source": "MEMORY_CACHE",
+            "version": data_state["version"]
+        }
+
+    # Nothing loaded in memory (DB was down at startup?), so ask the DB itself
     response.headers["Cache-Control"] = "no-cache, no-store, must-revalidate"
+    error_message = None
     
-    # 1. Try Real DB
+    # 2. Try Real DB (async pool, so a slow DB doesn't pin a threadpool worker)
     try:
-        query = "SELECT MAX(date) as last_date FROM matches"
-        with engine.connect() as conn:
-            result = conn.execute(text(query)).fetchone()
+        if league:
+            query = text("SELECT MAX(date) as last_date FROM matches WHERE league = :league")
+            params = {"league": league.upper()}
+        else:
+            query = text("SELECT MAX(date) as last_date FROM matches")
+            params = {}
+        result = await fetch_one(query, params)
+        if result and result[0]:
             clean_date = str(result[0]).split(" ")[0]
-            if result and result[0]:
-                return {
-                    "date": clean_date, 
-                    "source": "LIVE_DATABASE"  # <--- If you see this, DB is connected
-                }
+            return {
+                "date": clean_date, 
+                "source": "LIVE_DATABASE"  # <--- If you see this, DB is connected
+            }
     except Exception as e:
         print(f"DB Error: {e}")
         # Capture the error to send to frontend
         error_message = str(e)
 
-    # 2. Fallback (This is likely where you are landing)
-    if df_history.empty:
-        return {"date": "No Data"}
-    
-    last_date = df_history['Date'].max()
-    
     return {
-        "date": str(last_date.date()), 
-        "source": "FALLBACK_MEMORY",   # <--- You will likely see this
+        "date": "No Data",
         "error_details": error_message # <--- This will tell you WHY the DB failed
     }
 
 # --- LEAGUE TABLE ---
 
-@app.get("/standings")
-def get_standings():
+# league -> (expires at, serialized table): the table only changes after a matchday
+STANDINGS_CACHE_S = int(os.getenv("STANDINGS_CACHE_S", 300))
+standings_cache = {}
+
+
+@app.get("/standings", response_model=list[StandingRow])
+def get_standings(league: str = DEFAULT_LEAGUE):
+    league = check_league(league)
+    cached = standings_cache.get(league)
+    if cached and cached[0] > time.monotonic():
+        return cached_json(cached[1])
+
     headers = {"X-Auth-Token": API_KEY}
 
-    url = f"{BASE_URL}/competitions/PL/standings"
+    url = f"{BASE_URL}/competitions/{league}/standings"
 
     response = requests.get(url, headers=headers)
 
@@ -280,7 +1267,9 @@ def get_standings():
             "goalDifference": team['goalDifference']
         })
 
-    return standings
+    body = dumps(standings)
+    standings_cache[league] = (time.monotonic() + STANDINGS_CACHE_S, body)
+    return cached_json(body)
 # --- AUTOMATIC DATA UPDATED ---
 
 
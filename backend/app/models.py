@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Float, Date
+from sqlalchemy import Column, Integer, String, Float, Date, DateTime, LargeBinary, Text, Index
 from .database import Base  # <--- Clean and robust
 
 class Match(Base):
@@ -8,6 +8,7 @@ class Match(Base):
     id = Column(Integer, primary_key=True, index=True)
     date = Column(Date)
     season = Column(String)
+    league = Column(String, index=True)  # football-data.org competition code, e.g. 'PL'
     home_team = Column(String)
     away_team = Column(String)
     
@@ -48,4 +49,86 @@ class Match(Base):
     home_sot_avg = Column(Float)
     home_corners_avg = Column(Float)
     away_sot_avg = Column(Float)
-    away_corners_avg = Column(Float)
\ No newline at end of file
+    away_corners_avg = Column(Float)
+
+
+class ModelStore(Base):
+    __tablename__ = "model_store"
+
+    id = Column(Integer, primary_key=True, index=True)
+    league = Column(String, index=True)
+    model_binary = Column(LargeBinary)     # Legacy pickles (rows from before artifacts)
+    encoder_binary = Column(LargeBinary)
+    artifact = Column(LargeBinary)         # Compressed model artifact (app/artifacts.py)
+    artifact_hash = Column(String, index=True)  # sha256 of `artifact`, also its local cache key
+    feature_schema = Column(Text)  # JSON manifest: feature names, order, dtypes and class order
+    accuracy = Column(Float)
+    version_note = Column(String)
+    stage = Column(String)  # NULL: servable. 'candidate': only shadow-scored until promoted
+
+
+class TeamFormState(Base):
+    """Every team's form and Elo after its latest match, written by daily_job with the features."""
+    __tablename__ = "team_form"
+
+    id = Column(Integer, primary_key=True, index=True)
+    league = Column(String, index=True)
+    team = Column(String)
+    form_window = Column(Integer)  # Matches the form covers (FORM_WINDOW when it was built)
+    games = Column(Integer)        # Matches actually in the window
+    last_date = Column(Date)
+
+    wins = Column(Integer)
+    draws = Column(Integer)
+    losses = Column(Integer)
+    points = Column(Integer)
+    goals_scored_avg = Column(Float)
+    goals_conceded_avg = Column(Float)
+    sot_avg = Column(Float)
+    corners_avg = Column(Float)
+    elo = Column(Float)
+
+
+class HeadToHeadState(Base):
+    """Every ordered team pair's recent meetings (home side at home), written by daily_job with the features."""
+    __tablename__ = "head_to_head"
+
+    id = Column(Integer, primary_key=True, index=True)
+    league = Column(String, index=True)
+    home_team = Column(String)
+    away_team = Column(String)
+    h2h_window = Column(Integer)      # Meetings kept (H2H_WINDOW when it was built)
+    total_meetings = Column(Integer)  # All meetings at this venue, not just the window
+    last_date = Column(Date)
+    recent = Column(Text)             # JSON: [[date, home goals, away goals, result], ...] oldest first
+
+
+class OddsState(Base):
+    """One league's odds store (app/odds.py): every bookmaker's 1X2 prices as packed float32 columns."""
+    __tablename__ = "odds_store"
+
+    id = Column(Integer, primary_key=True, index=True)
+    league = Column(String, index=True)
+    rows = Column(Integer)         # Fixtures in the store
+    columns = Column(Text)         # JSON: price column names (B365H, PSCA, ...)
+    store = Column(LargeBinary)
+    updated_at = Column(DateTime)
+
+
+class PredictionRecord(Base):
+    """One row per served or precomputed prediction: fixture, model version, time and the three probabilities."""
+    __tablename__ = "predictions"
+    __table_args__ = (Index("ix_predictions_fixture", "league", "home_team", "away_team", "predicted_at"),)
+
+    id = Column(Integer, primary_key=True, index=True)
+    league = Column(String)
+    home_team = Column(String)
+    away_team = Column(String)
+    fixture_date = Column(Date)         # Known for precomputed/backtest rows, NULL for API requests
+    model_version = Column(String)      # model_store id, or 'static'
+    source = Column(String)             # 'served', 'backtest' or 'shadow'
+    predicted_at = Column(DateTime)
+
+    prob_home = Column(Float)
+    prob_draw = Column(Float)
+    prob_away = Column(Float)
@@ -0,0 +1,200 @@
+import re
+import json
+import struct
+from datetime import datetime, timezone
+
+import numpy as np
+import pandas as pd
+from sqlalchemy import text
+
+from .artifacts import compress, decompress
+from .database import engine
+from .leagues import LEAGUES
+from .teams import canonical_name
+
+# --- SETTINGS ---
+# football-data.co.uk 1X2 odds columns: <bookmaker>[C]<H|D|A>, where C marks the closing line
+# (B365H, PSCA, AvgCD). Asian handicap and over/under columns are left out.
+ODDS_BOOKMAKERS = [
+    '1XB', 'B365', 'BF', 'BFD', 'BFE', 'BMGM', 'BS', 'BV', 'BW', 'CL', 'GB', 'IW', 'LB',
+    'PS', 'SB', 'SJ', 'SO', 'SY', 'VC', 'WH', 'Max', 'Avg', 'BbMx', 'BbAv',
+]
+MARKET_SUMMARIES = ('Max', 'Avg', 'BbMx', 'BbAv')  # Best/mean price across books, not a book you can bet with
+ODDS_COLUMN = re.compile(r"^(%s)(C?)([HDA])$" % "|".join(sorted(ODDS_BOOKMAKERS, key=len, reverse=True)))
+OUTCOMES = ('H', 'D', 'A')
+KEY_COLUMNS = ['Div', 'Date', 'HomeTeam', 'AwayTeam']
+
+# Store layout:  MAGIC | header length (u32) | header JSON | compressed (dates i32 | odds f32 | teams JSON)
+ODDS_MAGIC = b"PLOD"
+ODDS_FORMAT = 1
+
+
+def odds_columns(columns):
+    """The 1X2 odds columns among a CSV's headers."""
+    return [c for c in columns if ODDS_COLUMN.match(str(c))]
+
+
+def read_odds_csv(source):
+    """
+    A football-data.co.uk file's fixtures and 1X2 odds in the DB shape (date, home_team,
+    away_team, league + one column per bookmaker price). Works for season files and the
+    upcoming `fixtures.csv` alike. Newer files have ragged trailing fields, so only the
+    needed columns are parsed.
+    """
+    df = pd.read_csv(source, encoding="utf-8-sig", usecols=lambda c: c in KEY_COLUMNS or ODDS_COLUMN.match(c) is not None)
+    df = df.rename(columns={'Date': 'date', 'HomeTeam': 'home_team', 'AwayTeam': 'away_team'})
+    df['date'] = pd.to_datetime(df['date'], dayfirst=True, errors='coerce')
+    df['home_team'] = df['home_team'].map(canonical_name)
+    df['away_team'] = df['away_team'].map(canonical_name)
+    if 'Div' in df.columns:
+        csv_leagues = {info['csv_code']: code for code, info in LEAGUES.items()}
+        df['league'] = df.pop('Div').map(csv_leagues)
+    return df
+
+
+class OddsStore:
+    """
+    One league's 1X2 odds, column-wise: a float32 array per bookmaker column
+    (B365H, PSCA, ...; NaN where a book had no price) next to every row's date,
+    home and away team. Rows are keyed by (date, home, away), and newer feeds
+    replace older rows with the same key. Packed, ~4 bytes per price.
+    """
+
+    def __init__(self, dates, homes, aways, columns):
+        self.dates = np.asarray(dates, dtype='datetime64[D]')
+        self.homes = list(homes)
+        self.aways = list(aways)
+        self.columns = {name: np.asarray(values, dtype=np.float32) for name, values in columns.items()}
+
+    def __len__(self):
+        return len(self.dates)
+
+    @classmethod
+    def from_frame(cls, df):
+        df = df.dropna(subset=['date', 'home_team', 'away_team'])
+        return cls(
+            pd.to_datetime(df['date']).to_numpy(dtype='datetime64[D]'),
+            df['home_team'],
+            df['away_team'],
+            {c: pd.to_numeric(df[c], errors='coerce').to_numpy(dtype=np.float32) for c in odds_columns(df.columns)},
+        )
+
+    def to_frame(self):
+        return pd.DataFrame({'date': self.dates, 'home_team': self.homes, 'away_team': self.aways, **self.columns})
+
+    def merge(self, other):
+        """A store with `other`'s rows added (replacing rows with the same key), in date order."""
+        merged = pd.concat([self.to_frame(), other.to_frame()], ignore_index=True)
+        merged = merged.drop_duplicates(subset=['date', 'home_team', 'away_team'], keep='last')
+        return OddsStore.from_frame(merged.sort_values('date', kind='stable'))
+
+    def bookmakers(self, closing=False, summaries=False):
+        """Books with all three prices, optionally on the closing line or including the Max/Avg summaries."""
+        suffix = 'C' if closing else ''
+        books = {ODDS_COLUMN.match(name).group(1) for name in self.columns}
+        return sorted(
+            book for book in books
+            if all(f"{book}{suffix}{o}" in self.columns for o in OUTCOMES)
+            and (summaries or book not in MARKET_SUMMARIES)
+        )
+
+    def prices(self, rows, books, closing=False):
+        """(rows, books, 3) float32 odds, outcomes in H/D/A order."""
+        suffix = 'C' if closing else ''
+        if not books:
+            return np.empty((len(rows), 0, 3), dtype=np.float32)
+        columns = [self.columns[f"{book}{suffix}{o}"][rows] for book in books for o in OUTCOMES]
+        return np.stack(columns, axis=1).reshape(len(rows), len(books), 3)
+
+    def upcoming(self, since=None):
+        """Rows dated on or after `since` (default: today)."""
+        since = np.datetime64(since if since is not None else datetime.now(timezone.utc).date(), 'D')
+        return np.flatnonzero(self.dates >= since)
+
+    def pack(self):
+        names = list(self.columns)
+        matrix = np.stack([self.columns[name] for name in names]) if names else np.empty((0, len(self)), dtype=np.float32)
+        teams = json.dumps([self.homes, self.aways]).encode()
+        codec, payload = compress(
+            self.dates.astype('<i4').tobytes() + matrix.astype('<f4').tobytes() + teams
+        )
+        header = json.dumps({"format": ODDS_FORMAT, "codec": codec, "rows": len(self), "columns": names}).encode()
+        return ODDS_MAGIC + struct.pack("<I", len(header)) + header + payload
+
+    @classmethod
+    def unpack(cls, blob):
+        if blob[:len(ODDS_MAGIC)] != ODDS_MAGIC:
+            raise ValueError("Not an odds store")
+        offset = len(ODDS_MAGIC)
+        length, = struct.unpack_from("<I", blob, offset)
+        offset += struct.calcsize("<I")
+        header = json.loads(blob[offset:offset + length])
+        if header["format"] != ODDS_FORMAT:
+            raise ValueError(f"Unsupported odds store format {header['format']}")
+
+        raw = decompress(header["codec"], blob[offset + length:])
+        rows, names = header["rows"], header["columns"]
+        dates = np.frombuffer(raw, dtype='<i4', count=rows).astype('datetime64[D]')
+        matrix = np.frombuffer(raw, dtype='<f4', count=rows * len(names), offset=4 * rows).reshape(len(names), rows)
+        homes, aways = json.loads(raw[4 * rows * (1 + len(names)):])
+        return cls(dates, homes, aways, dict(zip(names, matrix)))
+
+
+def empty_store():
+    return OddsStore([], [], [], {})
+
+
+def load_odds_store(league):
+    """
+    The league's stored odds (an empty store when there are none yet). Odds are optional:
+    an unreadable store (a corrupt blob, another ODDS_FORMAT) is logged and served empty.
+    """
+    try:
+        with engine.connect() as conn:
+            row = conn.execute(text("SELECT store FROM odds_store WHERE league = :league"), {"league": league}).fetchone()
+        return OddsStore.unpack(bytes(row[0])) if row is not None else empty_store()
+    except Exception as e:
+        print(f"⚠️ [{league}] Odds store load failed: {e}")
+        return empty_store()
+
+
+def save_odds_store(league, store):
+    with engine.begin() as conn:
+        conn.execute(text("DELETE FROM odds_store WHERE league = :league"), {"league": league})
+        conn.execute(
+            text("INSERT INTO odds_store (league, rows, columns, store, updated_at) VALUES (:league, :rows, :columns, :store, :updated_at)"),
+            {
+                "league": league, "rows": len(store), "columns": json.dumps(list(store.columns)),
+                "store": store.pack(), "updated_at": datetime.now(timezone.utc).replace(tzinfo=None),
+            }
+        )
+
+
+def merge_odds(df):
+    """Merges a frame of odds rows (with a `league` column) into each league's stored odds."""
+    for league, rows in df.groupby('league'):
+        store = load_odds_store(league).merge(OddsStore.from_frame(rows))
+        save_odds_store(league, store)
+        print(f"💰 [{league}] Odds store: {len(store)} fixtures x {len(store.columns)} price columns.")
+
+
+def fair_probabilities(prices):
+    """Overround-free implied probabilities: 1/odds scaled to sum to one per book (NaN for incomplete books)."""
+    implied = 1.0 / prices
+    return implied / implied.sum(axis=-1, keepdims=True)
+
+
+def scan_value(model_probs, prices, min_edge=0.0):
+    """
+    Every (fixture, book, outcome) at once. `model_probs` is (fixtures, 3) and
+    `prices` (fixtures, books, 3), both H/D/A. Edge is the model's expected
+    return per unit staked (p * odds - 1). Returns the indices of prices with
+    an edge of at least `min_edge`, best first, plus the edge and fair
+    probability arrays.
+    """
+    model_probs = np.asarray(model_probs, dtype=np.float32)
+    fair = fair_probabilities(prices)
+    edge = model_probs[:, None, :] * prices - 1
+    candidates = np.flatnonzero(edge >= min_edge)  # NaN prices never qualify
+    best = candidates[np.argsort(-edge.ravel()[candidates], kind='stable')]
+    return np.unravel_index(best, edge.shape), edge, fair
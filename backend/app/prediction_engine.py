@@ -1,130 +1,203 @@
-import pandas as pd
 import numpy as np
+import pandas as pd
+import xgboost as xgb
 
-def predict_match_optimized(model, home_team, away_team, df_history, le, feature_columns):
-    # 1. Team Name Standardization
-    name_map = {
-        'Arsenal': 'Arsenal',
-        'Aston Villa': 'Aston Villa', 'Villa': 'Aston Villa',
-        'Bournemouth': 'Bournemouth',
-        'Brentford': 'Brentford',
-        'Brighton & Hove Albion': 'Brighton', 'Brighton': 'Brighton', 'Brighton Hove': 'Brighton',
-        'Burnley': 'Burnley',
-        'Chelsea': 'Chelsea',
-        'Crystal Palace': 'Crystal Palace', 'Palace': 'Crystal Palace',
-        'Everton': 'Everton',
-        'Fulham': 'Fulham',
-        'Leeds United': 'Leeds', 'Leeds': 'Leeds',
-        'Liverpool': 'Liverpool',
-        'Manchester City': 'Man City', 'Man City': 'Man City',
-        'Manchester United': 'Man United', 'Man Utd': 'Man United', 'Man United': 'Man United',
-        'Newcastle United': 'Newcastle', 'Newcastle': 'Newcastle',
-        'Nottingham Forest': "Nott'm Forest", 'Nottm Forest': "Nott'm Forest", "Nott'm Forest": "Nott'm Forest", 'Forest': "Nott'm Forest", "Nottingham": "Nott'm Forest" ,
-        'Sunderland': 'Sunderland',
-        'Tottenham Hotspur': 'Tottenham', 'Spurs': 'Tottenham', 'Tottenham': 'Tottenham',
-        'West Ham United': 'West Ham', 'West Ham': 'West Ham',
-        'Wolverhampton Wanderers': 'Wolves', 'Wolverhampton': 'Wolves', 'Wolves': 'Wolves'
-    }
-
-    home = name_map.get(home_team, home_team)
-    away = name_map.get(away_team, away_team)
-    
-    # 2. Encode
-    try:
-        h_code = le.transform([home])[0]
-        a_code = le.transform([away])[0]
-    except:
-        print(f"❌ Error: Team not found ({home} or {away})")
-        return None
+from .features import FEATURE_COLUMNS, H2H_EMPTY, OUTCOME_KEYS, FeatureLayout, TeamTimelines, build_manifest
+from .teams import TeamRegistry
 
-    # 3. Get Relevant History
-    # --- CHANGED: Now grabbing LAST 10 matches ---
-    N_MATCHES = 10 
-    
-    games_h = df_history[(df_history['HomeTeam'] == home) | (df_history['AwayTeam'] == home)].sort_values('Date')
-    last_n_h = games_h.tail(N_MATCHES)
-    
-    games_a = df_history[(df_history['HomeTeam'] == away) | (df_history['AwayTeam'] == away)].sort_values('Date')
-    last_n_a = games_a.tail(N_MATCHES)
-    
-    if last_n_h.empty or last_n_a.empty:
+def build_features(home_team, away_team, team_form, registry, head_to_head=None):
+    """One fixture's model inputs in SERVED_FEATURES order, plus both teams' served stats (None if unknown)."""
+    # 1. Team Name Standardization + Encoding (one dict lookup per team)
+    home_team_info = registry.resolve(home_team)
+    away_team_info = registry.resolve(away_team)
+
+    if home_team_info is None or away_team_info is None or home_team_info.code is None or away_team_info.code is None:
+        print(f"❌ Error: Team not found ({home_team} or {away_team})")
         return None
 
-    def get_stats(team, last_games, all_games):
-        pts, wins, draws, losses = 0, 0, 0, 0
-        gs, gc = 0, 0
-        sot, corners = 0, 0
-        
-        count = len(last_games) # Should be 10, but safely handle if less
-        if count == 0: count = 1 # Avoid division by zero
-
-        for _, row in last_games.iterrows():
-            is_home = row['HomeTeam'] == team
-            
-            goals_for = row['FTHG'] if is_home else row['FTAG']
-            goals_against = row['FTAG'] if is_home else row['FTHG']
-            result = row['FTR']
-            
-            # New Stats
-            current_sot = row['HST'] if is_home else row['AST']
-            current_corners = row['HC'] if is_home else row['AC']
-            
-            gs += goals_for
-            gc += goals_against
-            sot += current_sot
-            corners += current_corners
-            
-            if result == 'D':
-                pts += 1; draws += 1
-            elif (is_home and result == 'H') or (not is_home and result == 'A'):
-                pts += 3; wins += 1
-            else:
-                losses += 1
-        
-        last_game = all_games.iloc[-1]
-        elo = last_game['HomeElo'] if last_game['HomeTeam'] == team else last_game['AwayElo']
-        
-        # --- CHANGED: Averaging by actual count (approx 10) ---
-        return {
-            'elo': elo, 'wins': wins, 'draws': draws, 'losses': losses,
-            'pts': pts,
-            'gs_avg': gs / count, 'gc_avg': gc / count,
-            'sot_avg': sot / count, 
-            'corners_avg': corners / count
-        }
+    home, h_code = home_team_info.name, home_team_info.code
+    away, a_code = away_team_info.name, away_team_info.code
 
-    h_stats = get_stats(home, last_n_h, games_h)
-    a_stats = get_stats(away, last_n_a, games_a)
+    # 2. Get Current Form
+    # Each team's post-match state (last FORM_WINDOW games + Elo) is precomputed with
+    # the training features, so serving reads exactly what training saw.
+    h_stats = team_form.get(home)
+    a_stats = team_form.get(away)
 
-    # 4. Construct Data Row
+    if h_stats is None or a_stats is None:
+        return None
+
+    # 3. Construct Data Row
     # NOTE: We keep the keys as '..._last_5' because that is what the Model expects 
-    # (based on the training column names), even though the VALUES are now from 10 games.
-    data = {
-        'HomeTeamCode': h_code, 'AwayTeamCode': a_code,
-        'HomeElo': h_stats['elo'], 'AwayElo': a_stats['elo'],
-        'EloDifference': h_stats['elo'] - a_stats['elo'],
-        
-        'home_wins_last_5': h_stats['wins'], 'home_draws_last_5': h_stats['draws'], 'home_losses_last_5': h_stats['losses'],
-        'away_wins_last_5': a_stats['wins'], 'away_draws_last_5': a_stats['draws'], 'away_losses_last_5': a_stats['losses'],
-        
-        'home_goals_scored_avg': h_stats['gs_avg'], 'home_goals_conceded_avg': h_stats['gc_avg'],
-        'away_goals_scored_avg': a_stats['gs_avg'], 'away_goals_conceded_avg': a_stats['gc_avg'],
-        
-        'home_points_last_5': h_stats['pts'], 'away_points_last_5': a_stats['pts'],
-        'PointsDifference': h_stats['pts'] - a_stats['pts'],
-        
-        'home_sot_avg': h_stats['sot_avg'],
-        'home_corners_avg': h_stats['corners_avg'],
-        'away_sot_avg': a_stats['sot_avg'],
-        'away_corners_avg': a_stats['corners_avg']
-    }
-    
-    input_df = pd.DataFrame([data])
-    input_df = input_df.reindex(columns=feature_columns, fill_value=0)
+    # (based on the training column names), the window itself is FORM_WINDOW.
+    # Values go in SERVED_FEATURES order; the layout places them in the model's order.
+    # The head-to-head values are one lookup in the precomputed pair index.
+    h2h = head_to_head.values(home, away) if head_to_head is not None else H2H_EMPTY
+    values = (
+        h_stats['wins'], h_stats['draws'], h_stats['losses'],
+        a_stats['wins'], a_stats['draws'], a_stats['losses'],
+        h_stats['gs_avg'], h_stats['gc_avg'],
+        a_stats['gs_avg'], a_stats['gc_avg'],
+        h_stats['pts'], a_stats['pts'], h_stats['pts'] - a_stats['pts'],
+        h_stats['elo'], a_stats['elo'], h_stats['elo'] - a_stats['elo'], h_code, a_code,
+        h_stats['sot_avg'], h_stats['corners_avg'],
+        a_stats['sot_avg'], a_stats['corners_avg'],
+        *h2h
+    )
+    return values, h_stats, a_stats
+
+
+def predict_match_optimized(model, home_team, away_team, team_form, registry, layout, head_to_head=None,
+                            timelines=None, as_of=None):
+    if as_of is not None:
+        # What the model would have said before kick-off on `as_of`
+        team_form = head_to_head = timelines.at(as_of)
+    features = build_features(home_team, away_team, team_form, registry, head_to_head)
+    if features is None:
+        return None
+    values, h_stats, a_stats = features
+    X = layout.fill(layout.new_matrix(), 0, values)
     
-    # 5. Predict
-    probs = model.predict_proba(input_df)[0]
-    outcomes = ["Away Win", "Draw", "Home Win"]
-    winner = outcomes[np.argmax(probs)]
+    # 4. Predict
+    probs = model.predict_proba(X)[0]
+    winner = layout.labels[np.argmax(probs)]
     
-    return winner, probs, h_stats, a_stats
\ No newline at end of file
+    return winner, probs, h_stats, a_stats
+
+
+def as_of_dates(as_of, count):
+    """`as_of` per fixture: None (latest state), one date for all, or already one per fixture."""
+    if isinstance(as_of, (list, tuple)):
+        return list(as_of)
+    return [as_of] * count
+
+
+def fixture_states(dates, team_form, head_to_head=None, timelines=None):
+    """
+    The (team form, head-to-head) each fixture is built from: the latest state
+    where its date is None, else the TeamTimelines snapshot going into that date.
+    """
+    latest = (team_form, head_to_head)
+    snapshots = {}
+    for date in dates:
+        if date is not None and date not in snapshots:
+            snapshot = timelines.at(date)
+            snapshots[date] = (snapshot, snapshot)
+    return [latest if date is None else snapshots[date] for date in dates]
+
+
+def feature_matrix(team_form, registry, layout, fixtures, head_to_head=None, timelines=None, as_of=None):
+    """
+    Many fixtures' model inputs as one stacked float32 matrix (`as_of` as in
+    fixture_states), plus (fixture position, home stats, away stats) per row.
+    Fixtures with unknown teams get no row.
+    """
+    X = layout.new_matrix(len(fixtures))
+    scored = []
+    states = fixture_states(as_of_dates(as_of, len(fixtures)), team_form, head_to_head, timelines)
+
+    for i, ((home_team, away_team), (form, h2h)) in enumerate(zip(fixtures, states)):
+        features = build_features(home_team, away_team, form, registry, h2h)
+        if features is None:
+            continue
+        values, h_stats, a_stats = features
+        layout.fill(X, len(scored), values)
+        scored.append((i, h_stats, a_stats))
+
+    return X[:len(scored)], scored
+
+
+def point_in_time_features(history, test_df, encoder, columns=FEATURE_COLUMNS):
+    """
+    Held-out matches' model inputs as of their own dates, built the way /predict
+    builds them with "as_of" (timelines from the league's stored `history`),
+    never from the stored feature columns. Used by the accuracy scripts.
+    """
+    timelines = TeamTimelines.from_history(history)
+    layout = FeatureLayout(build_manifest(columns=columns))
+    fixtures = list(zip(test_df['home_team'], test_df['away_team']))
+    X, _ = feature_matrix({}, TeamRegistry(encoder), layout, fixtures, timelines=timelines, as_of=list(pd.to_datetime(test_df['date'])))
+    return pd.DataFrame(X, columns=layout.names, index=test_df.index)
+
+
+def predict_batch(model, team_form, registry, layout, fixtures, head_to_head=None, scorelines=None,
+                  timelines=None, as_of=None):
+    """
+    Scores many (home, away) fixtures with ONE predict_proba call on a stacked
+    matrix, and (with a ScorelineModel) their score grids in one vectorized pass.
+    With `as_of`, fixtures are built from the team state going into that date
+    (see fixture_states) and get no scoreline, since the Poisson fit has seen the
+    whole history. Returns one (winner, probs, home stats, away stats, scoreline)
+    per fixture, in order (None for unknown teams).
+    """
+    results = [None] * len(fixtures)
+    dates = as_of_dates(as_of, len(fixtures))
+    X, scored = feature_matrix(team_form, registry, layout, fixtures, head_to_head, timelines, dates)
+
+    if scored:
+        probs = model.predict_proba(X)
+        winners = np.argmax(probs, axis=1)
+        summaries = [None] * len(scored)
+        latest = [row for row, (i, _, _) in enumerate(scored) if dates[i] is None]
+        if scorelines is not None and latest:
+            teams = [(registry.resolve(fixtures[scored[row][0]][0]).name, registry.resolve(fixtures[scored[row][0]][1]).name) for row in latest]
+            for row, summary in zip(latest, scorelines.summaries([home for home, _ in teams], [away for _, away in teams])):
+                summaries[row] = summary
+        for (i, h_stats, a_stats), row, winner, summary in zip(scored, probs, winners, summaries):
+            results[i] = (layout.labels[winner], row, h_stats, a_stats, summary)
+
+    return results
+
+
+def explain_batch(model, team_form, registry, layout, fixtures, head_to_head=None, timelines=None, as_of=None):
+    """
+    Why the model leans the way it does: every feature's contribution per outcome
+    (XGBoost's native TreeSHAP, `pred_contribs`), for many fixtures in ONE booster call.
+    Per outcome, `base` plus the contributions is the model's raw score (log-odds
+    before the softmax). Features are ordered by their pull on the predicted outcome.
+    `as_of` works as in predict_batch. Returns one explanation per fixture, in
+    order (None for unknown teams).
+    """
+    results = [None] * len(fixtures)
+    X, scored = feature_matrix(team_form, registry, layout, fixtures, head_to_head, timelines, as_of)
+    if not scored:
+        return results
+
+    contribs = model.get_booster().predict(xgb.DMatrix(X, feature_names=layout.names), pred_contribs=True)
+    contribs = contribs.reshape(len(scored), len(layout.classes), len(layout.names) + 1)
+    keys = [OUTCOME_KEYS[c] for c in layout.classes]
+
+    for (i, _, _), values, rows in zip(scored, X.tolist(), contribs.tolist()):
+        leaning = int(np.argmax([sum(row) for row in rows]))
+        order = sorted(range(len(layout.names)), key=lambda f: -abs(rows[leaning][f]))
+        results[i] = {
+            "base": {key: row[-1] for key, row in zip(keys, rows)},
+            "features": [
+                {
+                    "name": layout.names[f],
+                    "value": values[f],
+                    "contributions": {key: row[f] for key, row in zip(keys, rows)},
+                }
+                for f in order
+            ],
+        }
+
+    return results
+
+
+def export_batch(model, team_form, registry, layout, fixtures, head_to_head=None, timelines=None, as_of=None):
+    """
+    Probabilities and the exact model inputs for many fixtures, from ONE
+    predict_proba call (`as_of` as in predict_batch). Returns one
+    (probabilities, feature values) per fixture, both in the layout's order,
+    in order (None for unknown teams).
+    """
+    results = [None] * len(fixtures)
+    X, scored = feature_matrix(team_form, registry, layout, fixtures, head_to_head, timelines, as_of)
+    if not scored:
+        return results
+
+    probs = model.predict_proba(X)
+    for (i, _, _), row, values in zip(scored, probs.tolist(), X.tolist()):
+        results[i] = (row, values)
+    return results
@@ -0,0 +1,120 @@
+import os
+import asyncio
+from collections import deque
+from datetime import datetime, timezone
+
+from starlette.concurrency import run_in_threadpool
+
+from .database import engine
+
+# --- SETTINGS ---
+PREDICTION_LOG_FLUSH_S = float(os.getenv("PREDICTION_LOG_FLUSH_S", 5))
+PREDICTION_LOG_BATCH = int(os.getenv("PREDICTION_LOG_BATCH", 1000))
+PREDICTION_LOG_MAX_BUFFER = int(os.getenv("PREDICTION_LOG_MAX_BUFFER", 50_000))
+
+
+def probability_columns(classes, probs):
+    """Model probabilities (in `classes` order) as the log's home/draw/away columns."""
+    by_class = dict(zip(classes, probs))
+    return {
+        "prob_home": float(by_class['H']),
+        "prob_draw": float(by_class['D']),
+        "prob_away": float(by_class['A']),
+    }
+
+
+def prediction_row(league, home_team, away_team, classes, probs, model_version,
+                   source='served', fixture_date=None, predicted_at=None):
+    return {
+        "league": league,
+        "home_team": home_team,
+        "away_team": away_team,
+        "fixture_date": fixture_date,
+        "model_version": str(model_version),
+        "source": source,
+        "predicted_at": predicted_at or datetime.now(timezone.utc).replace(tzinfo=None),
+        **probability_columns(classes, probs),
+    }
+
+
+def write_rows(rows, bind=None):
+    """One bulk (executemany) insert into the `predictions` table."""
+    if not rows:
+        return 0
+    from .models import PredictionRecord
+    with (bind or engine).begin() as conn:
+        conn.execute(PredictionRecord.__table__.insert(), rows)
+    return len(rows)
+
+
+class PredictionLog:
+    """
+    Append-only log of served predictions. `record` only appends to an
+    in-memory buffer; a background task bulk-inserts it every
+    PREDICTION_LOG_FLUSH_S seconds (or sooner once PREDICTION_LOG_BATCH rows
+    are waiting), in a worker thread, so requests never wait on the insert.
+    If the DB falls behind the oldest rows are dropped, not the requests.
+    """
+
+    def __init__(self, flush_s=PREDICTION_LOG_FLUSH_S, batch=PREDICTION_LOG_BATCH, max_buffer=PREDICTION_LOG_MAX_BUFFER):
+        self.flush_s = flush_s
+        self.batch = batch
+        self.buffer = deque(maxlen=max_buffer)
+        self.task = None
+        self.wake = None
+
+        self.written = 0
+        self.dropped = 0
+        self.failed_flushes = 0
+
+    def record(self, *args, **kwargs):
+        if len(self.buffer) == self.buffer.maxlen:
+            self.dropped += 1
+        self.buffer.append(prediction_row(*args, **kwargs))
+        if self.wake is not None and len(self.buffer) >= self.batch:
+            self.wake.set()
+
+    def start(self):
+        if self.task is not None:
+            return
+        self.wake = asyncio.Event()
+        self.task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self.task is not None:
+            self.task.cancel()
+            try:
+                await self.task
+            except asyncio.CancelledError:
+                pass
+            self.task, self.wake = None, None
+        await self.flush()
+
+    async def _run(self):
+        while True:
+            try:
+                await asyncio.wait_for(self.wake.wait(), self.flush_s)
+            except asyncio.TimeoutError:
+                pass
+            self.wake.clear()
+            await self.flush()
+
+    async def flush(self):
+        while self.buffer:
+            rows = [self.buffer.popleft() for _ in range(min(self.batch, len(self.buffer)))]
+            try:
+                self.written += await run_in_threadpool(write_rows, rows)
+            except Exception as e:
+                # Put them back for the next flush (the buffer bound still applies)
+                self.failed_flushes += 1
+                self.buffer.extendleft(reversed(rows))
+                print(f"⚠️ Prediction log flush failed: {e}")
+                return
+
+    def metrics(self):
+        return {
+            "buffered": len(self.buffer),
+            "written": self.written,
+            "dropped": self.dropped,
+            "failed_flushes": self.failed_flushes,
+        }
@@ -0,0 +1,48 @@
+import os
+import json
+
+from fastapi.responses import Response
+
+try:
+    import orjson
+except ImportError:  # Falls back to the stdlib encoder (slower, and NaN comes out as NaN, not null)
+    orjson = None
+
+# --- SETTINGS ---
+# Responses at least this large are gzipped for clients that accept it (0 turns gzip off)
+GZIP_MIN_SIZE = int(os.getenv("GZIP_MIN_SIZE", 1000))
+
+
+def _numpy_default(value):
+    # The stdlib's stand-in for OPT_SERIALIZE_NUMPY: numpy scalars and arrays as native values
+    if hasattr(value, 'tolist'):
+        return value.tolist()
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+def dumps(content):
+    """
+    JSON bytes. Payloads are built from native floats/ints, so no jsonable_encoder walk is needed.
+    Without orjson the stdlib encodes them, numpy values included, but writes NaN/Infinity
+    (not valid JSON) where orjson writes null.
+    """
+    if orjson is not None:
+        return orjson.dumps(content, option=orjson.OPT_SERIALIZE_NUMPY)
+    return json.dumps(content, ensure_ascii=False, separators=(",", ":"), default=_numpy_default).encode()
+
+
+class FastJSONResponse(Response):
+    """Renders with orjson when installed. Used as the app's default response class."""
+    media_type = "application/json"
+
+    def render(self, content):
+        return dumps(content)
+
+
+def json_response(content, status_code=200, headers=None):
+    return FastJSONResponse(content, status_code=status_code, headers=headers)
+
+
+def cached_json(body, headers=None):
+    """A response from already serialized bytes (precomputed payloads are encoded once)."""
+    return Response(body, media_type="application/json", headers=headers)
@@ -0,0 +1,189 @@
+import os
+
+import numpy as np
+import pandas as pd
+
+# --- SETTINGS ---
+SCORELINE_MAX_GOALS = 10        # Grids cover 0..10 goals a side (the rest is renormalized away)
+SCORELINE_DECAY = float(os.getenv("SCORELINE_DECAY", 0.0019))  # Per day: a match a year old weighs ~1/2
+SCORELINE_PRIOR = 2.0           # Pseudo-matches of league-average play, so thin histories stay sane
+SCORELINE_ITERATIONS = 100
+SCORELINE_TOP = 3               # Most likely scores returned per fixture
+
+_LOG_FACTORIAL = np.concatenate([[0.0], np.cumsum(np.log(np.arange(1, SCORELINE_MAX_GOALS + 1)))])
+_GOALS = np.arange(SCORELINE_MAX_GOALS + 1)
+_TOTAL_GOALS = _GOALS[:, None] + _GOALS[None, :]
+# Flattened-grid masks, so every summary probability comes out of one matrix product:
+# home win, draw, away win, over 2.5 goals, both teams score
+_SUMMARY_MASKS = np.stack([
+    _GOALS[:, None] > _GOALS[None, :],
+    _GOALS[:, None] == _GOALS[None, :],
+    _GOALS[:, None] < _GOALS[None, :],
+    _TOTAL_GOALS > 2,
+    (_GOALS[:, None] > 0) & (_GOALS[None, :] > 0),
+], axis=-1).reshape(-1, 5).astype(np.float64)
+_RHO_GRID = np.linspace(-0.25, 0.25, 101)
+
+
+def poisson_pmf(rates):
+    """P(0..SCORELINE_MAX_GOALS goals) for every rate, as one (n, goals) array."""
+    rates = np.maximum(np.asarray(rates, dtype=np.float64), 1e-9)[:, None]
+    return np.exp(_GOALS * np.log(rates) - rates - _LOG_FACTORIAL)
+
+
+def dixon_coles_tau(home_rates, away_rates, rho):
+    """The Dixon-Coles low-score correction for 0-0, 0-1, 1-0 and 1-1 (in that order)."""
+    return np.stack([
+        1 - home_rates * away_rates * rho,
+        1 + home_rates * rho,
+        1 + away_rates * rho,
+        np.full_like(home_rates, 1 - rho),
+    ], axis=-1)
+
+
+def fit_strengths(home_idx, away_idx, home_goals, away_goals, n_teams, weights=None,
+                  prior=SCORELINE_PRIOR, iterations=SCORELINE_ITERATIONS):
+    """
+    Multiplicative Poisson strengths: home goals ~ attack[h] * defence[a] * home,
+    away goals ~ attack[a] * defence[h]. Each sweep updates every team at once from
+    weighted bincounts (Maher's fixed point), so a fit is a few dozen vector passes.
+    """
+    w = np.ones(len(home_idx)) if weights is None else np.asarray(weights, dtype=np.float64)
+    hg, ag = w * home_goals, w * away_goals
+    mean_goals = (hg.sum() + ag.sum()) / max(2 * w.sum(), 1e-9)
+    shrink = prior * mean_goals
+
+    attack = np.ones(n_teams)
+    defence = np.ones(n_teams)
+    home = hg.sum() / max(ag.sum(), 1e-9)
+
+    scored = np.bincount(home_idx, hg, n_teams) + np.bincount(away_idx, ag, n_teams)
+    conceded = np.bincount(away_idx, hg, n_teams) + np.bincount(home_idx, ag, n_teams)
+    for _ in range(iterations):
+        previous = attack.copy()
+
+        exposure = np.bincount(home_idx, w * defence[away_idx] * home, n_teams) + np.bincount(away_idx, w * defence[home_idx], n_teams)
+        attack = (scored + shrink) / (exposure + shrink)
+
+        exposure = np.bincount(away_idx, w * attack[home_idx] * home, n_teams) + np.bincount(home_idx, w * attack[away_idx], n_teams)
+        defence = (conceded + shrink) / (exposure + shrink)
+
+        home = hg.sum() / max((w * attack[home_idx] * defence[away_idx]).sum(), 1e-9)
+
+        scale = attack.mean()
+        attack, defence = attack / scale, defence * scale
+        if np.abs(attack - previous).max() < 1e-7:
+            break
+
+    return attack, defence, home
+
+
+def fit_rho(home_rates, away_rates, home_goals, away_goals, weights=None):
+    """The Dixon-Coles rho with the best weighted likelihood over a grid. Only 0-0/0-1/1-0/1-1 results depend on it."""
+    w = np.ones(len(home_rates)) if weights is None else weights
+    low = (home_goals <= 1) & (away_goals <= 1)
+    lh, la, w = home_rates[low], away_rates[low], w[low]
+    cell = (home_goals[low] * 2 + away_goals[low]).astype(np.intp)  # 0-0, 0-1, 1-0, 1-1 -> 0..3
+
+    best, best_likelihood = 0.0, -np.inf
+    for rho in _RHO_GRID:
+        tau = np.take_along_axis(dixon_coles_tau(lh, la, rho), cell[:, None], axis=1)[:, 0]
+        if (tau <= 0).any():
+            continue
+        likelihood = (w * np.log(tau)).sum()
+        if likelihood > best_likelihood:
+            best, best_likelihood = float(rho), likelihood
+    return best
+
+
+class ScorelineModel:
+    """
+    Team attack/defence strengths fitted from a league's goal history. `grids`
+    turns many fixtures into score-probability matrices at once (an outer product
+    of two Poisson distributions, Dixon-Coles corrected); `summaries` reduces
+    them to the numbers the API serves.
+    """
+
+    def __init__(self, teams, attack, defence, home, rho):
+        self.index = {team: i for i, team in enumerate(teams)}
+        self.attack = attack
+        self.defence = defence
+        self.home = home
+        self.rho = rho
+
+    def rates(self, homes, aways):
+        """Expected goals (home, away) per fixture. Teams without history play like the league average."""
+        h = np.array([self.index.get(team, -1) for team in homes], dtype=np.intp)
+        a = np.array([self.index.get(team, -1) for team in aways], dtype=np.intp)
+        attack = np.append(self.attack, 1.0)
+        defence = np.append(self.defence, 1.0)
+        return attack[h] * defence[a] * self.home, attack[a] * defence[h]
+
+    def grids(self, homes, aways):
+        """(fixtures, goals, goals) score probabilities: [i, home goals, away goals]."""
+        home_rates, away_rates = self.rates(homes, aways)
+        pmf = poisson_pmf(np.concatenate([home_rates, away_rates]))
+        grid = pmf[:len(home_rates), :, None] * pmf[len(home_rates):, None, :]
+
+        rho = self.rho
+        grid[:, 0, 0] *= 1 - home_rates * away_rates * rho
+        grid[:, 0, 1] *= 1 + home_rates * rho
+        grid[:, 1, 0] *= 1 + away_rates * rho
+        grid[:, 1, 1] *= 1 - rho
+        grid /= grid.sum(axis=(1, 2), keepdims=True)
+        return grid, home_rates, away_rates
+
+    def summaries(self, homes, aways, top=SCORELINE_TOP):
+        """Per fixture: expected goals, H/D/A, over/under 2.5, both teams to score and the likeliest scores."""
+        if len(homes) == 0:
+            return []
+        grid, home_rates, away_rates = self.grids(homes, aways)
+        flat = grid.reshape(len(grid), -1)
+        home_win, draw, away_win, over, btts = (flat @ _SUMMARY_MASKS).T.tolist()
+
+        best = np.argsort(-flat, axis=1)[:, :top]
+        best_probs = np.take_along_axis(flat, best, axis=1).tolist()
+        side = SCORELINE_MAX_GOALS + 1
+
+        return [
+            {
+                "expected_goals": {"home": float(home_rates[i]), "away": float(away_rates[i])},
+                "probabilities": {"home": home_win[i], "draw": draw[i], "away": away_win[i]},
+                "over_2_5": over[i],
+                "under_2_5": 1 - over[i],
+                "both_teams_score": btts[i],
+                "top_scores": [
+                    {"score": f"{cell // side}-{cell % side}", "probability": p}
+                    for cell, p in zip(best[i].tolist(), best_probs[i])
+                ],
+            }
+            for i in range(len(grid))
+        ]
+
+
+def fit_scoreline_model(df, home_col='HomeTeam', away_col='AwayTeam', home_goals='FTHG', away_goals='FTAG',
+                        date_col='Date', decay=SCORELINE_DECAY):
+    """A ScorelineModel from a history's finished matches (None without any), recent matches weighted up."""
+    played = df[df[home_goals].notna() & df[away_goals].notna()]
+    if played.empty:
+        return None
+
+    teams = sorted(set(played[home_col]) | set(played[away_col]))
+    codes = {team: i for i, team in enumerate(teams)}
+    h = played[home_col].map(codes).to_numpy()
+    a = played[away_col].map(codes).to_numpy()
+    hg = played[home_goals].to_numpy(dtype=np.float64)
+    ag = played[away_goals].to_numpy(dtype=np.float64)
+
+    # Time decay from the latest match; undated rows count as the oldest ones
+    dates = pd.to_datetime(played[date_col]) if date_col in played else pd.Series(pd.NaT, index=played.index)
+    if dates.notna().any():
+        age = (dates.max() - dates).dt.days.to_numpy(dtype=np.float64)
+        age = np.where(np.isnan(age), np.nanmax(age), age)
+        weights = np.exp(-decay * age)
+    else:
+        weights = np.ones(len(played))
+
+    attack, defence, home = fit_strengths(h, a, hg, ag, len(teams), weights)
+    rho = fit_rho(attack[h] * defence[a] * home, attack[a] * defence[h], hg, ag, weights)
+    return ScorelineModel(teams, attack, defence, home, rho)
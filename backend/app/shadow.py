@@ -0,0 +1,133 @@
+import os
+import asyncio
+from collections import deque
+
+from starlette.concurrency import run_in_threadpool
+
+from .features import FeatureLayout
+from .prediction_engine import export_batch
+from .teams import TeamRegistry
+
+# --- SETTINGS ---
+# Fixtures waiting to be shadow-scored. Past this, new ones are dropped rather than queued (0 turns shadowing off).
+SHADOW_QUEUE = int(os.getenv("SHADOW_QUEUE", 1000))
+SHADOW_BATCH = int(os.getenv("SHADOW_BATCH", 256))
+SHADOW_FLUSH_S = float(os.getenv("SHADOW_FLUSH_S", 1))
+
+
+class ShadowScorer:
+    """
+    Scores live /predict traffic with a candidate model (a `model_store` row
+    saved with stage 'candidate') without serving it. `submit` is one append
+    on the request path; a background task scores what has queued up in
+    batches, from the same team state the served model reads, in a worker
+    thread. Answers go to the prediction log as source 'shadow', with the
+    served row's timestamp, so each pair can be compared fixture by fixture.
+    Under load the queue fills and fixtures are dropped, never the requests.
+    """
+
+    def __init__(self, log, states, queue=SHADOW_QUEUE, batch=SHADOW_BATCH, flush_s=SHADOW_FLUSH_S):
+        self.log = log
+        self.states = states  # league -> (team form, head-to-head) the served model currently reads
+        self.candidates = {}  # league -> (model, registry, layout, version)
+        self.limit = max(0, queue)
+        self.batch = batch
+        self.flush_s = flush_s
+        self.queue = deque()
+        self.task = None
+        self.wake = None
+
+        self.submitted = 0
+        self.scored = 0
+        self.dropped = 0
+        self.failed_batches = 0
+
+    def load(self, league, model=None, encoder=None, manifest=None, version=None):
+        """Shadows `league` with a candidate model, or stops shadowing it (no model)."""
+        self.candidates.pop(league, None)
+        if model is None:
+            return
+        try:
+            layout = FeatureLayout(manifest, model)
+        except ValueError as e:
+            print(f"❌ [{league}] Refusing to shadow model {version}: {e}")
+            return
+        self.candidates[league] = (model, TeamRegistry(encoder), layout, version)
+        print(f"👥 [{league}] Shadow scoring candidate model {version}.")
+
+    def submit(self, league, home, away, predicted_at):
+        if league not in self.candidates or self.limit == 0:
+            return
+        if len(self.queue) >= self.limit:
+            self.dropped += 1
+            return
+        self.queue.append((league, home, away, predicted_at))
+        self.submitted += 1
+        if self.wake is not None and len(self.queue) >= self.batch:
+            self.wake.set()
+
+    def start(self):
+        if self.task is not None:
+            return
+        self.wake = asyncio.Event()
+        self.task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self.task is not None:
+            self.task.cancel()
+            try:
+                await self.task
+            except asyncio.CancelledError:
+                pass
+            self.task, self.wake = None, None
+        self.queue.clear()  # Unscored shadow work is not worth holding shutdown for
+
+    async def _run(self):
+        while True:
+            try:
+                await asyncio.wait_for(self.wake.wait(), self.flush_s)
+            except asyncio.TimeoutError:
+                pass
+            self.wake.clear()
+            await self.drain()
+
+    async def drain(self):
+        while self.queue:
+            items = [self.queue.popleft() for _ in range(min(self.batch, len(self.queue)))]
+            by_league = {}
+            for item in items:
+                by_league.setdefault(item[0], []).append(item)
+
+            for league, group in by_league.items():
+                candidate = self.candidates.get(league)
+                if candidate is None:  # Promoted or withdrawn meanwhile
+                    continue
+                try:
+                    results = await run_in_threadpool(self._score, league, candidate, group)
+                except Exception as e:
+                    self.failed_batches += 1
+                    print(f"⚠️ [{league}] Shadow batch failed: {e}")
+                    continue
+
+                _, _, layout, version = candidate
+                for (_, home, away, predicted_at), result in zip(group, results):
+                    if result is not None:
+                        self.log.record(league, home, away, layout.classes, result[0], version,
+                                        source='shadow', predicted_at=predicted_at)
+                        self.scored += 1
+
+    def _score(self, league, candidate, group):
+        # ONE predict_proba for the batch, built like the served model's batches
+        model, registry, layout, _ = candidate
+        team_form, head_to_head = self.states(league)
+        return export_batch(model, team_form, registry, layout, [(home, away) for _, home, away, _ in group], head_to_head)
+
+    def metrics(self):
+        return {
+            "candidates": {league: str(version) for league, (_, _, _, version) in self.candidates.items()},
+            "queued": len(self.queue),
+            "submitted": self.submitted,
+            "scored": self.scored,
+            "dropped": self.dropped,
+            "failed_batches": self.failed_batches,
+        }
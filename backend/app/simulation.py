@@ -0,0 +1,107 @@
+import os
+
+import numpy as np
+import pandas as pd
+
+# --- SETTINGS ---
+SIMULATION_DEFAULT = int(os.getenv("SIMULATION_DEFAULT", 10_000))
+SIMULATION_MAX = int(os.getenv("SIMULATION_MAX", 100_000))
+SIMULATION_CHUNK = 10_000  # Seasons simulated per step, bounds memory at ~chunk x fixtures bytes
+SIMULATION_CACHE_SIZE = int(os.getenv("SIMULATION_CACHE_SIZE", 32))
+SIMULATION_SEED = int(os.getenv("SIMULATION_SEED", 0))  # Fixed, so a cached answer is also the recomputed one
+
+
+def season_start(date):
+    """Seasons run August to May: the current one started on the last July 1st."""
+    return pd.Timestamp(year=date.year if date.month >= 7 else date.year - 1, month=7, day=1)
+
+
+def current_season(df, home_col='HomeTeam', away_col='AwayTeam', date_col='Date',
+                   home_goals='FTHG', away_goals='FTAG', result_col='FTR'):
+    """
+    The table (team -> points, goal difference, played) of the latest season in a
+    history, and its remaining fixtures: every home/away pairing not played yet
+    (a double round robin).
+    """
+    dated = df[df[date_col].notna()]
+    if dated.empty:
+        return {}, []
+    season = dated[dated[date_col] >= season_start(dated[date_col].max())]
+    played = season[season[result_col].notna() & season[home_goals].notna() & season[away_goals].notna()]
+
+    teams = sorted(set(season[home_col]) | set(season[away_col]))
+    table = {team: {"points": 0, "goal_difference": 0, "played": 0} for team in teams}
+    for home, away, hg, ag, ftr in played[[home_col, away_col, home_goals, away_goals, result_col]].itertuples(index=False, name=None):
+        table[home]["points"] += 3 if ftr == 'H' else 1 if ftr == 'D' else 0
+        table[away]["points"] += 3 if ftr == 'A' else 1 if ftr == 'D' else 0
+        table[home]["goal_difference"] += int(hg - ag)
+        table[away]["goal_difference"] += int(ag - hg)
+        table[home]["played"] += 1
+        table[away]["played"] += 1
+
+    done = set(zip(played[home_col], played[away_col]))
+    fixtures = [(home, away) for home in teams for away in teams if home != away and (home, away) not in done]
+    return table, fixtures
+
+
+def simulate_season(points, goal_difference, home_idx, away_idx, probs, simulations,
+                    top=4, relegated=3, seed=SIMULATION_SEED, chunk=SIMULATION_CHUNK):
+    """
+    Monte Carlo of the remaining fixtures. `probs` is (fixtures, 3) in A/D/H order.
+    Every chunk draws one uniform per (season, fixture), turns it into points and
+    sums them per team with two matrix products; ties on points go to the better
+    current goal difference. Returns per-team arrays.
+    """
+    n_teams = len(points)
+    points = np.asarray(points, dtype=np.float32)
+    probs = np.asarray(probs, dtype=np.float32).reshape(-1, 3)
+    p_away = probs[:, 0]
+    p_not_home = probs[:, 0] + probs[:, 1]
+
+    # Fixture -> team incidence, so points per team are one matmul per side
+    home_of = np.zeros((len(home_idx), n_teams), dtype=np.float32)
+    away_of = np.zeros((len(away_idx), n_teams), dtype=np.float32)
+    home_of[np.arange(len(home_idx)), home_idx] = 1
+    away_of[np.arange(len(away_idx)), away_idx] = 1
+
+    # Tie-break: current goal difference rank, as a fraction below one point
+    tiebreak = np.argsort(np.argsort(np.asarray(goal_difference), kind='stable'), kind='stable') / n_teams
+
+    rng = np.random.default_rng(seed)
+    total_points = np.zeros(n_teams)
+    total_position = np.zeros(n_teams)
+    titles = np.zeros(n_teams)
+    tops = np.zeros(n_teams)
+    relegations = np.zeros(n_teams)
+
+    done = 0
+    while done < simulations:
+        size = min(chunk, simulations - done)
+        draws = rng.random((size, len(home_idx)), dtype=np.float32)
+        away_win = draws < p_away
+        draw = (draws >= p_away) & (draws < p_not_home)
+        home_win = ~(away_win | draw)
+
+        home_points = (3 * home_win + draw).astype(np.float32)
+        away_points = (3 * away_win + draw).astype(np.float32)
+        final = points + home_points @ home_of + away_points @ away_of
+
+        # Position 0 = champion
+        order = np.argsort(-(final + tiebreak), axis=1)
+        position = np.empty_like(order)
+        np.put_along_axis(position, order, np.arange(n_teams), axis=1)
+
+        total_points += final.sum(axis=0)
+        total_position += position.sum(axis=0)
+        titles += (position == 0).sum(axis=0)
+        tops += (position < top).sum(axis=0)
+        relegations += (position >= n_teams - relegated).sum(axis=0)
+        done += size
+
+    return {
+        "expected_points": total_points / simulations,
+        "expected_position": total_position / simulations + 1,
+        "title": titles / simulations,
+        "top": tops / simulations,
+        "relegation": relegations / simulations,
+    }
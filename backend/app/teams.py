@@ -0,0 +1,80 @@
+import re
+import unicodedata
+from collections import namedtuple
+
+
+# Canonical names are the football-data.co.uk spellings (what the history and
+# the encoders use). Aliases cover full club names, football-data.org
+# `shortName`s and TLAs, and common nicknames.
+TEAM_ALIASES = {
+    'Arsenal': ['Arsenal FC', 'ARS'],
+    'Aston Villa': ['Aston Villa FC', 'Villa', 'AVL'],
+    'Bournemouth': ['AFC Bournemouth', 'BOU'],
+    'Brentford': ['Brentford FC', 'BRE'],
+    'Brighton': ['Brighton & Hove Albion', 'Brighton & Hove Albion FC', 'Brighton Hove', 'BHA'],
+    'Burnley': ['Burnley FC', 'BUR'],
+    'Chelsea': ['Chelsea FC', 'CHE'],
+    'Crystal Palace': ['Crystal Palace FC', 'Palace', 'CRY'],
+    'Everton': ['Everton FC', 'EVE'],
+    'Fulham': ['Fulham FC', 'FUL'],
+    'Ipswich': ['Ipswich Town', 'Ipswich Town FC', 'IPS'],
+    'Leeds': ['Leeds United', 'Leeds United FC', 'LEE'],
+    'Leicester': ['Leicester City', 'Leicester City FC', 'LEI'],
+    'Liverpool': ['Liverpool FC', 'LIV'],
+    'Luton': ['Luton Town', 'Luton Town FC', 'LUT'],
+    'Man City': ['Manchester City', 'Manchester City FC', 'MCI'],
+    'Man United': ['Manchester United', 'Manchester United FC', 'Man Utd', 'MUN'],
+    'Newcastle': ['Newcastle United', 'Newcastle United FC', 'NEW'],
+    "Nott'm Forest": ['Nottingham Forest', 'Nottingham Forest FC', 'Nottingham', 'Forest', 'NOT'],
+    'Sheffield United': ['Sheffield United FC', 'Sheffield Utd', 'SHU'],
+    'Southampton': ['Southampton FC', 'SOU'],
+    'Sunderland': ['Sunderland AFC', 'SUN'],
+    'Tottenham': ['Tottenham Hotspur', 'Tottenham Hotspur FC', 'Spurs', 'TOT'],
+    'Watford': ['Watford FC', 'WAT'],
+    'West Brom': ['West Bromwich Albion', 'West Bromwich Albion FC', 'WBA'],
+    'West Ham': ['West Ham United', 'West Ham United FC', 'WHU'],
+    'Wolves': ['Wolverhampton Wanderers', 'Wolverhampton Wanderers FC', 'Wolverhampton', 'WOL'],
+}
+
+Team = namedtuple('Team', ['name', 'code'])
+
+
+def normalize(name):
+    """'Nott'm Forest', 'nottm forest' and 'NOTTM-FOREST' all become 'nottmforest'."""
+    name = unicodedata.normalize('NFKD', str(name)).encode('ascii', 'ignore').decode()
+    return re.sub(r'[^a-z0-9]', '', name.lower())
+
+
+# Alias -> canonical name, for ingestion (no encoder needed)
+_CANONICAL = {}
+for _canonical, _aliases in TEAM_ALIASES.items():
+    for _alias in [_canonical] + _aliases:
+        _CANONICAL[normalize(_alias)] = _canonical
+
+
+def canonical_name(name):
+    """Maps any known alias to the football-data.co.uk spelling (unknown names pass through)."""
+    return _CANONICAL.get(normalize(name), name)
+
+
+class TeamRegistry:
+    """
+    Every name a league's teams can be requested by, resolved in one dict lookup
+    to the canonical name and the encoder code.
+    Rebuilt with every model or history load.
+    """
+
+    def __init__(self, encoder=None, teams=()):
+        classes = list(encoder.classes_) if encoder is not None else []
+        # LabelEncoder codes are the positions in its sorted `classes_`
+        self.codes = {name: code for code, name in enumerate(classes)}
+        self.names = sorted(set(classes) | set(teams))
+
+        self._lookup = {}
+        for name in self.names:
+            team = Team(name, self.codes.get(name))
+            for alias in [name] + TEAM_ALIASES.get(name, []):
+                self._lookup[normalize(alias)] = team
+
+    def resolve(self, name):
+        return self._lookup.get(normalize(name))
@@ -0,0 +1,84 @@
+import os
+
+import numpy as np
+
+# --- SETTINGS ---
+HISTORY_PAGE_SIZE = int(os.getenv("HISTORY_PAGE_SIZE", 500))  # Points per /teams/{team}/history page by default
+HISTORY_PAGE_MAX = 5000
+RESOLUTIONS = ('match', 'week', 'month', 'season')
+_DAY = np.timedelta64(1, 'D')
+
+
+def period_ends(dates, resolution):
+    """Positions of the last match of each week/month/season in sorted `dates` (every position for 'match')."""
+    if resolution == 'match' or len(dates) == 0:
+        return np.arange(len(dates))
+    if resolution == 'season':
+        # Seasons run August to May: a match before July belongs to the season that started the year before
+        months = dates.astype('datetime64[M]').astype(np.int64)
+        keys = (months - 6) // 12
+    else:
+        keys = dates.astype('datetime64[W]' if resolution == 'week' else 'datetime64[M]').astype(np.int64)
+    return np.flatnonzero(np.append(keys[1:] != keys[:-1], True))
+
+
+def lttb(x, y, points):
+    """
+    Largest-Triangle-Three-Buckets: the `points` positions that best keep a line's
+    shape. First and last are always kept. Each bucket in between keeps the point
+    with the largest triangle against the previous pick and the next bucket's mean.
+    Each pick depends on the one before, so this runs on plain floats: a numpy
+    call per bucket would cost more than the arithmetic.
+    """
+    n = len(x)
+    if points >= n:
+        return np.arange(n)
+    if points < 3:
+        return np.array([0, n - 1][:max(points, 0)], dtype=np.intp)
+
+    xs, ys = x.tolist(), y.tolist()
+    edges = np.linspace(1, n - 1, points - 1).astype(np.intp).tolist() + [n]
+    picked = [0]
+    for b in range(points - 2):
+        lo, hi, after = edges[b], edges[b + 1], edges[b + 2]
+        next_x = sum(xs[hi:after]) / (after - hi)
+        next_y = sum(ys[hi:after]) / (after - hi)
+        ax, ay = xs[picked[-1]], ys[picked[-1]]
+        best, best_area = lo, -1.0
+        for i in range(lo, hi):
+            area = abs((ax - next_x) * (ys[i] - ay) - (ax - xs[i]) * (next_y - ay))
+            if area > best_area:
+                best, best_area = i, area
+        picked.append(best)
+    picked.append(n - 1)
+    return np.array(picked, dtype=np.intp)
+
+
+def select_points(dates, values, start=None, end=None, resolution='match', points=None):
+    """
+    Positions of a date-sorted series to serve: matches dated within [start, end]
+    (two binary searches), one per period at the chosen resolution (the state
+    after its last match), then LTTB-downsampled on `values` to at most `points`.
+    Also returns how many matches the range holds.
+    """
+    lo = np.searchsorted(dates, np.datetime64(start, 'D'), side='left') if start is not None else 0
+    hi = np.searchsorted(dates, np.datetime64(end, 'D') + _DAY, side='left') if end is not None else len(dates)
+    rows = lo + period_ends(dates[lo:hi], resolution)
+    if points is not None and len(rows) > points:
+        days = (dates[rows] - dates[rows[0]]) / _DAY
+        rows = rows[lttb(days, values[rows], points)]
+    return rows, int(hi - lo)
+
+
+def page(dates, rows, cursor=None, limit=HISTORY_PAGE_SIZE):
+    """
+    One page of `rows` after `cursor` (the last date of the previous page), and the
+    cursor for the next page (None on the last one). Dates are unique per team, so
+    a date is a stable position even as newer matches are appended.
+    """
+    if cursor is not None:
+        rows = rows[np.searchsorted(dates[rows], np.datetime64(cursor, 'D') + _DAY, side='left'):]
+    if len(rows) <= limit:
+        return rows, None
+    rows = rows[:limit]
+    return rows, str(dates[rows[-1]].astype('datetime64[D]'))
@@ -5,31 +5,26 @@ from sqlalchemy import text
 
 # --- PATH SETUP ---
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
-from app.database import engine
+from app.database import engine, ensure_schema
+from app.teams import canonical_name
+from app.leagues import ENABLED_LEAGUES, HISTORY_SEASONS, season_csv_url
+from app.odds import merge_odds, odds_columns
 
 def backfill_history():
-    print("⏳ Starting COMPLETE Historical Backfill (2015 - 2026)...")
+    print(f"⏳ Starting COMPLETE Historical Backfill (2015 - 2026) for {', '.join(ENABLED_LEAGUES)}...")
 
-    # URLs for ALL seasons from 2015/16 to 2023/24
+    # URLs for ALL seasons from 2015/16 onwards, for every enabled league
     # (The Daily Job handles the current 2025 season)
     season_urls = [
-        "https://www.football-data.co.uk/mmz4281/1516/E0.csv",
-        "https://www.football-data.co.uk/mmz4281/1617/E0.csv",
-        "https://www.football-data.co.uk/mmz4281/1718/E0.csv",
-        "https://www.football-data.co.uk/mmz4281/1819/E0.csv",
-        "https://www.football-data.co.uk/mmz4281/1920/E0.csv", # Was missing
-        "https://www.football-data.co.uk/mmz4281/2021/E0.csv", # Was missing
-        "https://www.football-data.co.uk/mmz4281/2122/E0.csv",
-        "https://www.football-data.co.uk/mmz4281/2223/E0.csv",
-        "https://www.football-data.co.uk/mmz4281/2324/E0.csv",
-        "https://www.football-data.co.uk/mmz4281/2425/E0.csv",
-        "https://www.football-data.co.uk/mmz4281/2526/E0.csv"
-
+        (league, season, season_csv_url(league, season))
+        for league in ENABLED_LEAGUES
+        for season in HISTORY_SEASONS
     ]
 
     all_seasons = []
+    all_odds = []
 
-    for url in season_urls:
+    for league, season_str, url in season_urls:
         print(f"⬇️ Downloading: {url}...")
         try:
             df = pd.read_csv(url)
@@ -48,14 +43,23 @@ def backfill_history():
             # Drop rows with no valid date
             df = df.dropna(subset=['date'])
 
+            # Same team spellings everywhere (ingestion, retraining and serving share the registry)
+            df['home_team'] = df['home_team'].map(canonical_name)
+            df['away_team'] = df['away_team'].map(canonical_name)
+
+            # Bookmaker prices go to the odds store, not the matches table
+            odds = df[['date', 'home_team', 'away_team'] + odds_columns(df.columns)].copy()
+            odds['league'] = league
+            all_odds.append(odds)
+
             # Keep only columns we need
             cols = ['date', 'home_team', 'away_team', 'fthg', 'ftag', 'ftr', 'hst', 'ast', 'hc', 'ac']
             available_cols = [c for c in cols if c in df.columns]
             df = df[available_cols]
             
-            # Tag the season for easier debugging later
-            season_str = url.split('/')[-2] # Extracts '1516', '1617' etc.
+            # Tag the season ('1516', '1617' etc.) and the league partition
             df['season'] = season_str
+            df['league'] = league
             
             all_seasons.append(df)
             
@@ -72,7 +76,11 @@ def backfill_history():
     print(f"📥 Inserting {len(history_df)} historical matches into Database...")
     
     # Save to DB
+    ensure_schema()
     history_df.to_sql('matches', engine, if_exists='append', index=False)
+
+    print("💰 Storing bookmaker odds...")
+    merge_odds(pd.concat(all_odds, ignore_index=True))
     
     print("✅ Full History Backfill Complete!")
 
@@ -0,0 +1,406 @@
+import os
+import sys
+import io
+import json
+import time
+import socket
+import argparse
+import platform
+import threading
+import contextlib
+import subprocess
+from datetime import datetime, timezone
+
+import numpy as np
+import pandas as pd
+import requests
+from sqlalchemy import create_engine, text
+from sqlalchemy.pool import StaticPool
+from sqlalchemy.ext.asyncio import create_async_engine
+
+# --- PATH SETUP ---
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(BACKEND_DIR)
+
+# Everything below runs against an in-memory SQLite database, so we swap the
+# shared engines BEFORE importing any module that does `from app.database import engine`.
+# A named shared-cache DB lets the sync (pandas/scripts) and async (API) engines see the same data.
+import app.database as database
+
+BENCH_DB_URL = "sqlite:///file:benchmark?mode=memory&cache=shared&uri=true"
+
+bench_engine = create_engine(
+    BENCH_DB_URL,
+    connect_args={"check_same_thread": False},
+    poolclass=StaticPool,
+)
+database.engine = bench_engine
+database.async_engine = create_async_engine(database.async_database_url(BENCH_DB_URL), poolclass=StaticPool)
+
+from app.leagues import DEFAULT_LEAGUE
+from app.features import HeadToHeadIndex, team_state_rows
+from app.models import HeadToHeadState, ModelStore, TeamFormState
+from app.prediction_engine import predict_batch, predict_match_optimized
+from app.utils import calculate_elo_ratings, calculate_team_form
+from scripts.daily_job import calculate_h2h_stats, calculate_rolling_stats, last_match_dates, update_elo
+from scripts.retrain import retrain_model
+from scripts.synthetic_data import generate_history, matches_for
+
+# --- SETTINGS ---
+DATA_DIR = os.path.join(BACKEND_DIR, "data")
+SEASON_FILES = ["22_23.csv", "23_24.csv", "24_25.csv", "25.csv"]
+RAW_COLUMNS = ['Date', 'HomeTeam', 'AwayTeam', 'FTHG', 'FTAG', 'FTR', 'HST', 'AST', 'HC', 'AC']
+DEFAULT_BASELINE = os.path.join(DATA_DIR, "benchmark_baseline.json")
+
+SYNTHETIC_FACTOR = 10
+LATENCY_SAMPLES = 200
+BATCH_SIZE = 380          # One full season of fixtures
+LOAD_SECONDS = 5
+LOAD_CONCURRENCY = 8
+DEFAULT_TOLERANCE = 0.20  # 20% slower than baseline counts as a regression
+TIMING_REPEATS = 5        # Each *_s timing is the best of this many runs, so one noisy run can't fail the gate
+
+# Metrics where a bigger number is better; everything else is a timing (lower is better)
+HIGHER_IS_BETTER = ("_per_s",)
+
+
+def log(message):
+    """Progress goes to stderr, so stdout carries only the JSON results."""
+    print(message, file=sys.stderr)
+
+
+@contextlib.contextmanager
+def quiet():
+    """Silences the progress prints of the code under test."""
+    with contextlib.redirect_stdout(io.StringIO()):
+        yield
+
+
+def timed(fn, *args, **kwargs):
+    start = time.perf_counter()
+    result = fn(*args, **kwargs)
+    return result, time.perf_counter() - start
+
+
+def best_of(run, repeats=TIMING_REPEATS, setup=None):
+    """
+    Runs `run()` `repeats` times (after `setup()` each time, untimed) and returns
+    the last result with the fastest time: the run least disturbed by the machine.
+    """
+    result, best = None, float('inf')
+    for _ in range(repeats):
+        if setup is not None:
+            setup()
+        result, elapsed = timed(run)
+        best = min(best, elapsed)
+    return result, best
+
+
+# --- DATA ---
+
+def load_bundled_history():
+    """Loads the bundled football-data.co.uk season files in the DB shape."""
+    seasons = []
+    for file_name in SEASON_FILES:
+        # The newest files have ragged odds columns, so only parse what we store
+        df = pd.read_csv(os.path.join(DATA_DIR, file_name), encoding="utf-8-sig", usecols=RAW_COLUMNS)
+        df = df.rename(columns={
+            'Date': 'date', 'HomeTeam': 'home_team', 'AwayTeam': 'away_team',
+            'FTHG': 'fthg', 'FTAG': 'ftag', 'FTR': 'ftr',
+            'HST': 'hst', 'AST': 'ast', 'HC': 'hc', 'AC': 'ac'
+        })
+        df['date'] = pd.to_datetime(df['date'], dayfirst=True, errors='coerce')
+        df = df.dropna(subset=['date'])
+        df = df[['date', 'home_team', 'away_team', 'fthg', 'ftag', 'ftr', 'hst', 'ast', 'hc', 'ac']]
+        df['season'] = file_name.replace(".csv", "")
+        df['league'] = DEFAULT_LEAGUE
+        seasons.append(df)
+
+    return pd.concat(seasons).sort_values('date').reset_index(drop=True)
+
+
+def build_synthetic_history(df, factor=SYNTHETIC_FACTOR):
+    """A generated single-league history `factor` times the size of the bundled one."""
+    seasons = matches_for(len(df) * factor)
+    last_season = df['date'].max().year
+    synthetic = generate_history(seasons=seasons, first_season=last_season - seasons + 1)
+    synthetic['league'] = DEFAULT_LEAGUE
+    return synthetic
+
+
+def reset_database(df, team_form, head_to_head):
+    """Writes a feature-complete history and its team and pair states into the in-memory DB, like daily_job does."""
+    with bench_engine.begin() as conn:
+        conn.execute(text("DROP TABLE IF EXISTS model_store"))
+        conn.execute(text("DROP TABLE IF EXISTS team_form"))
+        conn.execute(text("DROP TABLE IF EXISTS head_to_head"))
+    ModelStore.__table__.create(bench_engine)
+    TeamFormState.__table__.create(bench_engine)
+    HeadToHeadState.__table__.create(bench_engine)
+    df.to_sql('matches', bench_engine, if_exists='replace', index=False)
+    team_form.to_sql('team_form', bench_engine, if_exists='append', index=False)
+    head_to_head.to_sql('head_to_head', bench_engine, if_exists='append', index=False)
+
+
+# --- BENCHMARKS ---
+
+def bench_pipeline(raw_df, include_legacy):
+    """Feature rebuild, Elo replay and retrain timings for one dataset."""
+    results = {"rows": len(raw_df)}
+
+    # Every repeat replays from fresh team/pair states; the steps return new frames
+    def rolling():
+        forms = {}
+        return calculate_rolling_stats(raw_df.copy(), forms), forms
+
+    def elo():
+        ratings = {}
+        return update_elo(featured, ratings), ratings
+
+    def h2h():
+        head_to_head = HeadToHeadIndex()
+        return calculate_h2h_stats(featured, head_to_head), head_to_head
+
+    with quiet():
+        (featured, forms), results["feature_rebuild_s"] = best_of(rolling)
+        (featured, ratings), results["elo_replay_s"] = best_of(elo)
+        (featured, head_to_head), results["h2h_replay_s"] = best_of(h2h)
+        featured['points_difference'] = featured['home_points_last_5'] - featured['away_points_last_5']
+
+        elo_input = raw_df.dropna(subset=['ftr'])
+        _, results["utils_elo_replay_s"] = best_of(lambda: calculate_elo_ratings(elo_input))
+        if include_legacy:
+            # utils.calculate_team_form is quadratic (seconds per run), so only the small dataset runs it, once
+            _, results["utils_feature_rebuild_s"] = timed(calculate_team_form, raw_df.copy())
+
+        team_form = team_state_rows(DEFAULT_LEAGUE, forms, ratings, last_match_dates(featured))
+        # A fresh DB per repeat: a retrain finding its own artifact already deployed would skip the save
+        _, results["retrain_s"] = best_of(
+            retrain_model, setup=lambda: reset_database(featured, team_form, head_to_head.rows(DEFAULT_LEAGUE))
+        )
+
+    return results
+
+
+def load_serving_state():
+    """Imports (or refreshes) app.main against the freshly populated DB."""
+    with quiet():
+        import app.main as main
+        main.reload_league(DEFAULT_LEAGUE)
+    return main
+
+
+def bench_predictions(main, raw_df):
+    fixtures = raw_df[['home_team', 'away_team']].tail(max(LATENCY_SAMPLES, BATCH_SIZE))
+    fixtures = list(fixtures.itertuples(index=False, name=None))
+
+    model, _ = main.league_models[DEFAULT_LEAGUE]
+    team_form = main.league_form[DEFAULT_LEAGUE]
+    registry = main.league_registries[DEFAULT_LEAGUE]
+    layout = main.league_layouts[DEFAULT_LEAGUE]
+    head_to_head = main.league_h2h[DEFAULT_LEAGUE]
+
+    def predict(home, away):
+        return predict_match_optimized(model, home, away, team_form, registry, layout, head_to_head)
+
+    with quiet():
+        for home, away in fixtures[:5]:
+            predict(home, away)
+
+        latencies = []
+        for home, away in fixtures[-LATENCY_SAMPLES:]:
+            _, elapsed = timed(predict, home, away)
+            latencies.append(elapsed * 1000)
+
+        # The whole season in ONE predict_batch call (one predict_proba on a stacked matrix)
+        batch = fixtures[-BATCH_SIZE:]
+        _, batch_elapsed = best_of(lambda: predict_batch(model, team_form, registry, layout, batch, head_to_head))
+
+    return {
+        "predict_p50_ms": float(np.percentile(latencies, 50)),
+        "predict_p95_ms": float(np.percentile(latencies, 95)),
+        "predict_mean_ms": float(np.mean(latencies)),
+        "batch_predictions_per_s": len(batch) / batch_elapsed,
+    }
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def generate_load(method, url, payloads, seconds, concurrency):
+    """Hammers one endpoint from `concurrency` threads and returns successful requests/sec."""
+    counts = [0] * concurrency
+    errors = [0] * concurrency
+    deadline = time.perf_counter() + seconds
+
+    def worker(slot):
+        session = requests.Session()
+        i = slot
+        while time.perf_counter() < deadline:
+            payload = payloads[i % len(payloads)] if payloads else None
+            i += concurrency
+            try:
+                res = session.request(method, url, json=payload, timeout=10)
+                if res.status_code < 400:
+                    counts[slot] += 1
+                else:
+                    errors[slot] += 1
+            except requests.RequestException:
+                errors[slot] += 1
+
+    threads = [threading.Thread(target=worker, args=(slot,)) for slot in range(concurrency)]
+    start = time.perf_counter()
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    elapsed = time.perf_counter() - start
+
+    return sum(counts) / elapsed, sum(errors)
+
+
+def bench_api(main, raw_df, seconds, concurrency):
+    import uvicorn
+
+    port = free_port()
+    config = uvicorn.Config(main.app, host="127.0.0.1", port=port, log_level="warning")
+    server = uvicorn.Server(config)
+    thread = threading.Thread(target=server.run, daemon=True)
+    thread.start()
+    while not server.started:
+        time.sleep(0.05)
+
+    base = f"http://127.0.0.1:{port}"
+    payloads = [
+        {"home_team": home, "away_team": away}
+        for home, away in raw_df[['home_team', 'away_team']].tail(LATENCY_SAMPLES).itertuples(index=False, name=None)
+    ]
+
+    try:
+        with quiet():
+            predict_rps, predict_errors = generate_load("POST", f"{base}/predict", payloads, seconds, concurrency)
+            batching = main.batcher.metrics()
+            updated_rps, updated_errors = generate_load("GET", f"{base}/last-updated", None, seconds, concurrency)
+    finally:
+        server.should_exit = True
+        thread.join()
+
+    return {
+        "api_predict_requests_per_s": predict_rps,
+        "api_last_updated_requests_per_s": updated_rps,
+        "api_errors": predict_errors + updated_errors,
+        "api_predict_mean_batch_size": batching["mean_batch_size"],
+    }
+
+
+def run_dataset(name, raw_df, args, include_legacy=False):
+    log(f"⏱️ [{name}] {len(raw_df)} matches: pipeline...")
+    results = bench_pipeline(raw_df, include_legacy)
+
+    log(f"⏱️ [{name}] predictions...")
+    main = load_serving_state()
+    results.update(bench_predictions(main, raw_df))
+
+    if not args.skip_api:
+        log(f"⏱️ [{name}] API load ({args.concurrency} clients, {args.seconds}s per endpoint)...")
+        results.update(bench_api(main, raw_df, args.seconds, args.concurrency))
+
+    return results
+
+
+# --- REPORTING ---
+
+def git_commit():
+    try:
+        out = subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=BACKEND_DIR,
+                             capture_output=True, text=True, check=True)
+        return out.stdout.strip()
+    except Exception:
+        return None
+
+
+def compare(current, baseline, tolerance):
+    """Returns a list of (dataset, metric, baseline, current, change) regressions."""
+    regressions = []
+    for dataset, metrics in current["results"].items():
+        base_metrics = baseline.get("results", {}).get(dataset, {})
+        for metric, value in metrics.items():
+            base_value = base_metrics.get(metric)
+            if metric in ("rows", "api_errors", "api_predict_mean_batch_size") or not base_value or value is None:
+                continue
+
+            change = (value - base_value) / base_value
+            higher_is_better = metric.endswith(HIGHER_IS_BETTER)
+            worse = -change if higher_is_better else change
+            marker = "❌" if worse > tolerance else "  "
+            log(f"{marker} {dataset:<14} {metric:<34} {base_value:>12.4f} -> {value:>12.4f} ({change:+.1%})")
+            if worse > tolerance:
+                regressions.append((dataset, metric, base_value, value, change))
+
+    return regressions
+
+
+def main_cli():
+    parser = argparse.ArgumentParser(description="Benchmark prediction, feature engineering, Elo, retraining and the API.")
+    parser.add_argument("--output", help="Write the JSON results to this file (default: stdout)")
+    parser.add_argument("--baseline", help="Compare against this stored baseline JSON")
+    parser.add_argument("--save-baseline", action="store_true", help=f"Store the results as {DEFAULT_BASELINE}")
+    parser.add_argument("--tolerance", type=float, default=DEFAULT_TOLERANCE, help="Allowed slowdown before failing (0.2 = 20%%)")
+    parser.add_argument("--factor", type=int, default=SYNTHETIC_FACTOR, help="Size multiplier of the synthetic history")
+    parser.add_argument("--seconds", type=float, default=LOAD_SECONDS, help="Load generator duration per endpoint")
+    parser.add_argument("--concurrency", type=int, default=LOAD_CONCURRENCY, help="Load generator client threads")
+    parser.add_argument("--skip-api", action="store_true", help="Skip the HTTP load test")
+    parser.add_argument("--skip-synthetic", action="store_true", help="Only benchmark the bundled CSVs")
+    args = parser.parse_args()
+
+    log("🏁 Starting benchmark suite (in-memory SQLite)...")
+    stdout = sys.stdout
+    # Prints of the code under test that `quiet` doesn't cover (the API server's startup) go to stderr too
+    with contextlib.redirect_stdout(sys.stderr):
+        bundled = load_bundled_history()
+
+        results = {"bundled": run_dataset("bundled", bundled, args, include_legacy=True)}
+        if not args.skip_synthetic:
+            synthetic = build_synthetic_history(bundled, args.factor)
+            results[f"synthetic_{args.factor}x"] = run_dataset(f"synthetic_{args.factor}x", synthetic, args)
+
+    report = {
+        "meta": {
+            "timestamp": datetime.now(timezone.utc).isoformat(),
+            "commit": git_commit(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpus": os.cpu_count(),
+        },
+        "results": results,
+    }
+
+    payload = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(payload)
+        log(f"💾 Results written to {args.output}")
+    else:
+        print(payload, file=stdout)
+
+    if args.save_baseline:
+        with open(DEFAULT_BASELINE, "w") as f:
+            f.write(payload)
+        log(f"💾 Baseline stored at {DEFAULT_BASELINE}")
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        log(f"\n📊 Comparing against {args.baseline} (tolerance {args.tolerance:.0%})")
+        regressions = compare(report, baseline, args.tolerance)
+        if regressions:
+            log(f"❌ {len(regressions)} metric(s) regressed.")
+            sys.exit(1)
+        log("✅ No regressions.")
+
+
+if __name__ == "__main__":
+    main_cli()
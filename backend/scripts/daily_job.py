@@ -1,212 +1,420 @@
 import os
 import sys
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
 import pandas as pd
 import numpy as np
-from sqlalchemy import text
+from sqlalchemy import text, inspect, bindparam
 from datetime import datetime
 import requests
 
 # --- PATH SETUP ---
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
-from app.database import engine
+from app.database import engine, ensure_schema
+from app.teams import canonical_name
+from app.leagues import ENABLED_LEAGUES, CURRENT_SEASON_LABEL, FIXTURES_CSV_URL, season_csv_url
+from app.odds import merge_odds, read_odds_csv
+from app.features import (
+    FORM_WINDOW, ELO_START, H2H_COLUMNS, H2H_WINDOW, HeadToHeadIndex, TeamForm, elo_update, form_columns, team_result, team_state_rows
+)
 
 # --- SETTINGS ---
-CSV_URL = "https://www.football-data.co.uk/mmz4281/2526/E0.csv"
-
 DEPLOY_HOOK_URL = "https://api.render.com/deploy/srv-d5991715pdvs73a8hd80?key=D7LRfQUb7bc"
+# Processes for the form rebuild, one (league, season) partition at a time. 1 = serial.
+FEATURE_WORKERS = int(os.getenv("FEATURE_WORKERS", 1))
 
-def calculate_rolling_stats(df):
-    """Calculates rolling averages for Shots, Corners, and Form."""
-    df = df.sort_values('date')
-    
-    # Initialize columns with 0
-    cols_to_init = [
-        'home_wins_last_5', 'home_draws_last_5', 'home_losses_last_5',
-        'away_wins_last_5', 'away_draws_last_5', 'away_losses_last_5',
-        'home_goals_scored_avg', 'home_goals_conceded_avg',
-        'away_goals_scored_avg', 'away_goals_conceded_avg',
-        'home_points_last_5', 'away_points_last_5',
-        'home_sot_avg', 'home_corners_avg',
-        'away_sot_avg', 'away_corners_avg'
-    ]
-    
-    for col in cols_to_init:
-        df[col] = 0.0
+def calculate_rolling_stats(df, team_stats=None, window=FORM_WINDOW):
+    """
+    Calculates rolling averages for Shots, Corners, and Form.
+    `team_stats` (team -> TeamForm) carries state in, and holds every team's
+    post-match form afterwards.
+    """
+    # Stable: a partition cut from a sorted frame keeps exactly the same order
+    df = df.sort_values('date', kind='stable')
+    if team_stats is None:
+        team_stats = {}
 
-    # We need a dictionary to track team history
-    team_stats = {}
+    home_cols, away_cols = form_columns('home'), form_columns('away')
+    # Rows without history keep 0
+    home_values = np.zeros((len(df), len(home_cols)))
+    away_values = np.zeros((len(df), len(away_cols)))
 
-    for index, row in df.iterrows():
-        home = row['home_team']
-        away = row['away_team']
-        
+    columns = ['home_team', 'away_team', 'fthg', 'ftag', 'ftr', 'hst', 'ast', 'hc', 'ac']
+    for i, (home, away, fthg, ftag, ftr, hst, ast, hc, ac) in enumerate(df[columns].itertuples(index=False, name=None)):
         # Initialize team if new
-        if home not in team_stats: team_stats[home] = []
-        if away not in team_stats: team_stats[away] = []
-        
-        # --- 1. GET HISTORY FOR HOME TEAM ---
-        history = team_stats[home]
-        if len(history) > 0:
-            last_5 = history[-5:]
-            df.at[index, 'home_wins_last_5'] = sum(1 for m in last_5 if m['result'] == 'W')
-            df.at[index, 'home_draws_last_5'] = sum(1 for m in last_5 if m['result'] == 'D')
-            df.at[index, 'home_losses_last_5'] = sum(1 for m in last_5 if m['result'] == 'L')
-            df.at[index, 'home_points_last_5'] = sum(m['points'] for m in last_5)
-            
-            # Advanced Stats (SOT, Corners, Goals)
-            df.at[index, 'home_goals_scored_avg'] = np.mean([m['goals_for'] for m in last_5])
-            df.at[index, 'home_goals_conceded_avg'] = np.mean([m['goals_against'] for m in last_5])
-            df.at[index, 'home_sot_avg'] = np.mean([m['sot'] for m in last_5])
-            df.at[index, 'home_corners_avg'] = np.mean([m['corners'] for m in last_5])
-        
-        # --- 2. GET HISTORY FOR AWAY TEAM ---
-        history = team_stats[away]
-        if len(history) > 0:
-            last_5 = history[-5:]
-            df.at[index, 'away_wins_last_5'] = sum(1 for m in last_5 if m['result'] == 'W')
-            df.at[index, 'away_draws_last_5'] = sum(1 for m in last_5 if m['result'] == 'D')
-            df.at[index, 'away_losses_last_5'] = sum(1 for m in last_5 if m['result'] == 'L')
-            df.at[index, 'away_points_last_5'] = sum(m['points'] for m in last_5)
-            
-            # Advanced Stats
-            df.at[index, 'away_goals_scored_avg'] = np.mean([m['goals_for'] for m in last_5])
-            df.at[index, 'away_goals_conceded_avg'] = np.mean([m['goals_against'] for m in last_5])
-            df.at[index, 'away_sot_avg'] = np.mean([m['sot'] for m in last_5])
-            df.at[index, 'away_corners_avg'] = np.mean([m['corners'] for m in last_5])
-
-        # --- 3. UPDATE HISTORY AFTER MATCH ---
+        if home not in team_stats: team_stats[home] = TeamForm(window)
+        if away not in team_stats: team_stats[away] = TeamForm(window)
+
+        # --- 1. FORM GOING INTO THE MATCH ---
+        home_values[i] = list(team_stats[home].stats().values())
+        away_values[i] = list(team_stats[away].stats().values())
+
+        # --- 2. UPDATE HISTORY AFTER MATCH ---
         # Skip updating if match hasn't happened yet (Result is None)
-        if pd.isna(row['fthg']) or pd.isna(row['ftr']):
+        if pd.isna(fthg) or pd.isna(ftr):
             continue
 
-        # Home Perspective
-        h_res = 'W' if row['ftr'] == 'H' else ('D' if row['ftr'] == 'D' else 'L')
-        h_pts = 3 if h_res == 'W' else (1 if h_res == 'D' else 0)
-        
-        team_stats[home].append({
-            'result': h_res, 'points': h_pts,
-            'goals_for': row['fthg'], 'goals_against': row['ftag'],
-            'sot': row['hst'], 'corners': row['hc']
-        })
-
-        # Away Perspective
-        a_res = 'W' if row['ftr'] == 'A' else ('D' if row['ftr'] == 'D' else 'L')
-        a_pts = 3 if a_res == 'W' else (1 if a_res == 'D' else 0)
-        
-        team_stats[away].append({
-            'result': a_res, 'points': a_pts,
-            'goals_for': row['ftag'], 'goals_against': row['fthg'],
-            'sot': row['ast'], 'corners': row['ac']
-        })
-        
+        team_stats[home].add(team_result(ftr, True), fthg, ftag, hst, hc)
+        team_stats[away].add(team_result(ftr, False), ftag, fthg, ast, ac)
+
+    df[home_cols] = home_values
+    df[away_cols] = away_values
     return df
 
-def update_elo(df):
-    """Calculates Elo ratings for the whole dataset."""
-    df = df.sort_values('date')
-    elo_dict = {team: 1500 for team in pd.concat([df['home_team'], df['away_team']]).unique()}
-    
-    df['home_elo'] = 0.0
-    df['away_elo'] = 0.0
-    df['elo_difference'] = 0.0
-    
-    k_factor = 20
-
-    for index, row in df.iterrows():
-        home = row['home_team']
-        away = row['away_team']
-        
-        h_elo = elo_dict[home]
-        a_elo = elo_dict[away]
-        
-        df.at[index, 'home_elo'] = h_elo
-        df.at[index, 'away_elo'] = a_elo
-        df.at[index, 'elo_difference'] = h_elo - a_elo
+def update_elo(df, elo_dict=None):
+    """Calculates Elo ratings for the whole dataset. `elo_dict` carries ratings in and out."""
+    df = df.sort_values('date', kind='stable')
+    if elo_dict is None:
+        elo_dict = {}
+    for team in pd.concat([df['home_team'], df['away_team']]).unique():
+        elo_dict.setdefault(team, ELO_START)
+
+    home_elo = np.zeros(len(df))
+    away_elo = np.zeros(len(df))
+
+    for i, (home, away, ftr) in enumerate(df[['home_team', 'away_team', 'ftr']].itertuples(index=False, name=None)):
+        home_elo[i] = elo_dict[home]
+        away_elo[i] = elo_dict[away]
 
         # If match not played, skip update
-        if pd.isna(row['ftr']): continue
-
-        # Calculate Expected Result
-        prob_h = 1 / (1 + 10 ** ((a_elo - h_elo) / 400))
-        
-        # Actual Result (1=Win, 0.5=Draw, 0=Loss)
-        if row['ftr'] == 'H': actual = 1
-        elif row['ftr'] == 'D': actual = 0.5
-        else: actual = 0
-        
-        # New Ratings
-        new_h_elo = h_elo + k_factor * (actual - prob_h)
-        new_a_elo = a_elo + k_factor * ((1 - actual) - (1 - prob_h))
-        
-        elo_dict[home] = new_h_elo
-        elo_dict[away] = new_a_elo
-        
+        if pd.isna(ftr): continue
+
+        elo_dict[home], elo_dict[away] = elo_update(home_elo[i], away_elo[i], ftr)
+
+    df['home_elo'] = home_elo
+    df['away_elo'] = away_elo
+    df['elo_difference'] = home_elo - away_elo
     return df
 
-def run_daily_job():
-    print("🤖 Starting Daily Update Job...")
-    
-    # 1. Download New Data
-    print(f"⬇️ Downloading latest data from {CSV_URL}...")
+def calculate_h2h_stats(df, head_to_head=None):
+    """Head-to-head features going into every match. `head_to_head` (a HeadToHeadIndex) carries the pairs in and out."""
+    df = df.sort_values('date', kind='stable')
+    if head_to_head is None:
+        head_to_head = HeadToHeadIndex()
+
+    values = np.zeros((len(df), len(H2H_COLUMNS)))
+    columns = ['date', 'home_team', 'away_team', 'fthg', 'ftag', 'ftr']
+    for i, (date, home, away, fthg, ftag, ftr) in enumerate(df[columns].itertuples(index=False, name=None)):
+        values[i] = head_to_head.values(home, away)
+        if pd.isna(fthg) or pd.isna(ftr):
+            continue
+        head_to_head.add(home, away, date, fthg, ftag, ftr)
+
+    df[H2H_COLUMNS] = values
+    return df
+
+def download_league(league):
+    """Downloads the current season CSV for one league in the DB shape."""
+    url = season_csv_url(league)
+    print(f"⬇️ [{league}] Downloading latest data from {url}...")
+    new_data = pd.read_csv(url)
+    # Rename Cols
+    new_data = new_data.rename(columns={
+        'Date': 'date', 'HomeTeam': 'home_team', 'AwayTeam': 'away_team',
+        'FTHG': 'fthg', 'FTAG': 'ftag', 'FTR': 'ftr',
+        'HST': 'hst', 'AST': 'ast', 'HC': 'hc', 'AC': 'ac'
+    })
+    # Standardize Date and team names
+    new_data['date'] = pd.to_datetime(new_data['date'], dayfirst=True)
+    new_data['home_team'] = new_data['home_team'].map(canonical_name)
+    new_data['away_team'] = new_data['away_team'].map(canonical_name)
+    new_data['season'] = CURRENT_SEASON_LABEL
+    new_data['league'] = league
+    return new_data
+
+def update_odds(downloads):
+    """Keeps every bookmaker price: the season files' rows plus the upcoming fixtures' current prices."""
+    frames = list(downloads)
+    try:
+        fixtures = read_odds_csv(FIXTURES_CSV_URL)
+        frames.append(fixtures[fixtures['league'].isin(ENABLED_LEAGUES)])
+    except Exception as e:
+        print(f"⚠️ Could not download upcoming fixture odds: {e}")
+    try:
+        merge_odds(pd.concat(frames, ignore_index=True))
+    except Exception as e:
+        print(f"❌ Odds update failed: {e}")
+
+def last_match_dates(df):
+    """Date of each team's latest finished match."""
+    finished = df[df['ftr'].notna()]
+    dates = pd.concat([
+        finished[['home_team', 'date']].rename(columns={'home_team': 'team'}),
+        finished[['away_team', 'date']].rename(columns={'away_team': 'team'}),
+    ])
+    return dates.groupby('team')['date'].max().to_dict()
+
+def season_bounds(dates):
+    """(start, end) row positions of each season in date-sorted rows. A season starts on July 1st."""
+    dates = pd.to_datetime(pd.Series(dates))
+    # Undated rows (sorted last) make one final partition
+    seasons = (dates.dt.year - (dates.dt.month < 7)).fillna(-1).to_numpy()
+    cuts = [0, *(np.flatnonzero(seasons[1:] != seasons[:-1]) + 1), len(seasons)]
+    return list(zip(cuts[:-1], cuts[1:]))
+
+def team_perspectives(df):
+    """
+    Every finished match as two team rows (home first), in replay order: exactly the
+    arguments calculate_rolling_stats passes to TeamForm.add.
+    """
+    position = np.arange(len(df))
+    finished = (df['fthg'].notna() & df['ftr'].notna()).to_numpy()
+    ftr = df['ftr'].to_numpy()
+    home = pd.DataFrame({
+        'position': position, 'order': 2 * position, 'team': df['home_team'].to_numpy(),
+        'result': np.where(ftr == 'H', 'W', np.where(ftr == 'D', 'D', 'L')),
+        'goals_for': df['fthg'].to_numpy(), 'goals_against': df['ftag'].to_numpy(),
+        'sot': df['hst'].to_numpy(), 'corners': df['hc'].to_numpy(),
+    })[finished]
+    away = pd.DataFrame({
+        'position': position, 'order': 2 * position + 1, 'team': df['away_team'].to_numpy(),
+        'result': np.where(ftr == 'H', 'L', np.where(ftr == 'D', 'D', 'W')),
+        'goals_for': df['ftag'].to_numpy(), 'goals_against': df['fthg'].to_numpy(),
+        'sot': df['ast'].to_numpy(), 'corners': df['ac'].to_numpy(),
+    })[finished]
+    return pd.concat([home, away]).sort_values('order', kind='stable')
+
+def form_snapshots(df, bounds, window=FORM_WINDOW):
+    """
+    Every team's TeamForm going into each partition, plus the one after the last.
+    Only each team's last `window` finished matches matter, so a snapshot is the
+    previous one plus the partition in between, cut to `window` per team: no replay.
+    """
+    rows = team_perspectives(df)
+    carried = rows.iloc[:0]
+    snapshots, previous = [], 0
+    for start in [start for start, _ in bounds] + [len(df)]:
+        between = rows[(rows['position'] >= previous) & (rows['position'] < start)]
+        carried = pd.concat([carried, between]).groupby('team', sort=False).tail(window)
+        previous = start
+
+        forms = {}
+        columns = ['team', 'result', 'goals_for', 'goals_against', 'sot', 'corners']
+        for team, result, goals_for, goals_against, sot, corners in carried[columns].itertuples(index=False, name=None):
+            forms.setdefault(team, TeamForm(window)).add(result, goals_for, goals_against, sot, corners)
+        snapshots.append(forms)
+    return snapshots
+
+def incremental_h2h(part, old_part, stored):
+    """
+    Head-to-head for one league on top of its stored pair states: matches already
+    finished at the last run keep their stored values, and only the matches since
+    are replayed into the index (seeded with HeadToHeadIndex.from_rows). Returns
+    (part, index), or None when the stored state can't be extended and the league
+    needs a full replay: no or other-window state, undated results (they replay
+    last), or a new result dated before the latest stored meeting.
+    """
+    if stored is None or stored.empty or (stored['h2h_window'] != H2H_WINDOW).any():
+        return None
+    if not all(c in old_part.columns for c in H2H_COLUMNS):
+        return None
+    keys = ['date', 'home_team', 'away_team']
+    old_done = old_part[old_part['ftr'].notna()]
+    if old_done.empty or old_done['date'].isna().any() or old_done[H2H_COLUMNS].isna().any().any():
+        return None
+
+    part = part.sort_values('date', kind='stable')
+    # Stored values by match; rows the feed re-sent lost them in the merge, so they come from the old rows
+    known_values = part[keys].merge(old_done[keys + H2H_COLUMNS], on=keys, how='left')[H2H_COLUMNS].to_numpy()
+    known = ~np.isnan(known_values[:, 0])
+    new = part[~known]
+    finished = new[new['ftr'].notna() & new['fthg'].notna()]
+    if finished['date'].isna().any() or (not finished.empty and finished['date'].min() < pd.to_datetime(stored['last_date']).max()):
+        return None
+
+    head_to_head = HeadToHeadIndex.from_rows(stored)
+    known_values[~known] = calculate_h2h_stats(new.copy(), head_to_head)[H2H_COLUMNS].to_numpy()
+    part[H2H_COLUMNS] = known_values
+    print(f"🤝 Head-to-head: {len(new)} new matches on top of {len(stored)} stored pairs.")
+    return part, head_to_head
+
+def finish_league(league, part, forms, ratings, previous=None):
+    """
+    Elo and head-to-head (cheap, kept serial), points diff and the team and pair states for one league.
+    `previous` ((old rows, stored head_to_head rows)) lets the head-to-head extend the stored state.
+    """
+    part = update_elo(part, ratings)
+    incremental = incremental_h2h(part, *previous) if previous is not None else None
+    if incremental is not None:
+        part, head_to_head = incremental
+    else:
+        head_to_head = HeadToHeadIndex()
+        part = calculate_h2h_stats(part, head_to_head)
+    part['points_difference'] = part['home_points_last_5'] - part['away_points_last_5']
+    return part, team_state_rows(league, forms, ratings, last_match_dates(part)), head_to_head.rows(league)
+
+def build_league_features(df, workers=FEATURE_WORKERS, previous=None):
+    """
+    Recalculates Form and Elo independently for every league partition, and the
+    head-to-head too unless `previous` (league -> (old rows, stored head_to_head
+    rows)) lets it extend the stored pair states. Also returns every team's
+    post-match state and every pair's meetings (the `team_form` and
+    `head_to_head` rows) the API serves from.
+    With workers > 1 the form is rebuilt per (league, season) in a process pool instead.
+    """
+    previous = previous or {}
+    if workers > 1:
+        return build_league_features_parallel(df, workers, previous)
+
+    partitions, states, pairs = [], [], []
+    for league, part in df.groupby('league', sort=False):
+        print(f"⚙️ [{league}] Recalculating {len(part)} matches (Elo, Form, Corners, Shots, H2H)...")
+        forms = {}
+        part = calculate_rolling_stats(part.reset_index(drop=True), forms)
+        part, state, pair_rows = finish_league(league, part, forms, {}, previous.get(league))
+        partitions.append(part)
+        states.append(state)
+        pairs.append(pair_rows)
+
+    return pd.concat(partitions, ignore_index=True), pd.concat(states, ignore_index=True), pd.concat(pairs, ignore_index=True)
+
+def build_league_features_parallel(df, workers, previous=None):
+    """
+    Same output as the serial run, byte for byte. Each season starts from the exact
+    team form the serial replay would have reached there (see form_snapshots), so
+    seasons of every league are independent tasks.
+    """
+    # 1. Cut every league into seasons, each with the form snapshot it starts from
+    leagues, tasks = [], []
+    for league, part in df.groupby('league', sort=False):
+        part = part.reset_index(drop=True).sort_values('date', kind='stable')
+        bounds = season_bounds(part['date'])
+        snapshots = form_snapshots(part, bounds)
+
+        # Teams in first-seen order (as the serial replay meets them), untouched ones with empty form
+        teams = pd.unique(part[['home_team', 'away_team']].to_numpy().ravel())
+        final = {team: snapshots[-1].get(team) or TeamForm(FORM_WINDOW) for team in teams}
+        leagues.append((league, final, len(bounds)))
+        tasks += [(part.iloc[start:end], snapshots[i]) for i, (start, end) in enumerate(bounds)]
+
+    print(f"⚙️ Recalculating {len(df)} matches in {len(tasks)} season partitions ({workers} workers)...")
+
+    # 2. Form for every season in parallel ('spawn': same as the prediction pool)
+    with ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn")) as pool:
+        results = list(pool.map(calculate_rolling_stats, *zip(*tasks))) if tasks else []
+
+    # 3. Stitch seasons back together in order; Elo and head-to-head per league
+    partitions, states, pairs = [], [], []
+    for league, forms, seasons in leagues:
+        part = pd.concat(results[:seasons])
+        results = results[seasons:]
+        part, state, pair_rows = finish_league(league, part, forms, {}, (previous or {}).get(league))
+        partitions.append(part)
+        states.append(state)
+        pairs.append(pair_rows)
+
+    return pd.concat(partitions, ignore_index=True), pd.concat(states, ignore_index=True), pd.concat(pairs, ignore_index=True)
+
+def load_head_to_head_states(leagues):
+    """The stored `head_to_head` rows of these leagues (none on a fresh database)."""
     try:
-        new_data = pd.read_csv(CSV_URL)
-        # Rename Cols
-        new_data = new_data.rename(columns={
-            'Date': 'date', 'HomeTeam': 'home_team', 'AwayTeam': 'away_team',
-            'FTHG': 'fthg', 'FTAG': 'ftag', 'FTR': 'ftr',
-            'HST': 'hst', 'AST': 'ast', 'HC': 'hc', 'AC': 'ac'
-        })
-        # Standardize Date
-        new_data['date'] = pd.to_datetime(new_data['date'], dayfirst=True)
-        new_data['season'] = '2025-26'
+        query = text("SELECT * FROM head_to_head WHERE league IN :leagues").bindparams(bindparam('leagues', expanding=True))
+        return pd.read_sql(query, engine, params={"leagues": list(leagues)})
     except Exception as e:
-        print(f"❌ Failed to download: {e}")
+        print(f"⚠️ Head-to-head state read failed (replaying in full): {e}")
+        return pd.DataFrame(columns=['league'])
+
+def save_league_partitions(df, leagues, team_form=None, head_to_head=None):
+    """Replaces only the given leagues' rows (and their team and pair states), in one transaction."""
+    states = {'team_form': team_form, 'head_to_head': head_to_head}
+    inspector = inspect(engine)
+    if not inspector.has_table('matches'):
+        with engine.begin() as conn:
+            df.to_sql('matches', conn, if_exists='replace', index=False)
+            for table, rows in states.items():
+                if rows is not None:
+                    rows.to_sql(table, conn, if_exists='append', index=False)
         return
 
-    # 2. Load Old Data from DB
+    # Appending needs the existing table layout (CSV feeds add/drop odds columns over time)
+    table_cols = [c['name'] for c in inspector.get_columns('matches')]
+    df = df[[c for c in df.columns if c in table_cols]]
+
+    delete = "DELETE FROM {table} WHERE league IN :leagues"
+    with engine.begin() as conn:
+        conn.execute(
+            text(delete.format(table='matches')).bindparams(bindparam('leagues', expanding=True)),
+            {"leagues": list(leagues)}
+        )
+        df.to_sql('matches', conn, if_exists='append', index=False)
+
+        for table, rows in states.items():
+            if rows is None:
+                continue
+            conn.execute(
+                text(delete.format(table=table)).bindparams(bindparam('leagues', expanding=True)),
+                {"leagues": list(leagues)}
+            )
+            rows.to_sql(table, conn, if_exists='append', index=False)
+
+def run_daily_job():
+    print(f"🤖 Starting Daily Update Job for {', '.join(ENABLED_LEAGUES)}...")
+    ensure_schema()
+
+    # 1. Download New Data
+    downloads = []
+    for league in ENABLED_LEAGUES:
+        try:
+            downloads.append(download_league(league))
+        except Exception as e:
+            print(f"❌ [{league}] Failed to download: {e}")
+
+    if not downloads:
+        print("❌ No data downloaded.")
+        return
+    new_data = pd.concat(downloads)
+
+    # Odds move daily, results or not
+    print("💰 Updating odds...")
+    update_odds(downloads)
+
+    # 2. Load Old Data from DB (only the partitions we are updating)
     print("📥 Loading current database...")
     try:
-        old_data = pd.read_sql("SELECT * FROM matches", engine)
+        query = text("SELECT * FROM matches WHERE league IN :leagues").bindparams(bindparam('leagues', expanding=True))
+        old_data = pd.read_sql(query, engine, params={"leagues": list(new_data['league'].unique())})
         old_data['date'] = pd.to_datetime(old_data['date'])
     except Exception as e:
         print(f"⚠️ DB Read Error (Might be empty): {e}")
-        old_data = pd.DataFrame()
+        old_data = pd.DataFrame(columns=['league', 'ftr'])
 
     # 3. Merge & Deduplicate
     print("🔄 Merging datasets...")
     # We combine them to ensure we have the FULL history for Elo/Form calculations
-    full_df = pd.concat([old_data, new_data]).drop_duplicates(subset=['date', 'home_team', 'away_team'], keep='last')
+    full_df = pd.concat([old_data, new_data]).drop_duplicates(subset=['league', 'date', 'home_team', 'away_team'], keep='last')
 
-    if not old_data.empty:
-        old_finished_count = len(old_data[old_data['ftr'].notna()])
-    else:
-        old_finished_count = 0
-        
-    # Count finished matches in New Merged Data
-    new_finished_count = len(full_df[full_df['ftr'].notna()])
-    
-    print(f"📊 Old Finished Matches: {old_finished_count} | New Finished Matches: {new_finished_count}")
+    # Count finished matches per league, before and after the merge
+    old_finished = old_data[old_data['ftr'].notna()].groupby('league').size()
+    new_finished = full_df[full_df['ftr'].notna()].groupby('league').size()
+
+    changed_leagues = []
+    for league, new_count in new_finished.items():
+        old_count = int(old_finished.get(league, 0))
+        print(f"📊 [{league}] Old Finished Matches: {old_count} | New Finished Matches: {new_count}")
+        if new_count != old_count:
+            changed_leagues.append(league)
 
-    if new_finished_count == old_finished_count:
+    if not changed_leagues:
         print("💤 No new match results found. Database is up to date.")
         print("🛑 Skipping Recalculation, Retraining, and Deploy.")
         return
     else:
-        print(f"✅ Found {new_finished_count - old_finished_count} new finished matches! Proceeding with update...")
+        print(f"✅ New finished matches in {', '.join(changed_leagues)}! Proceeding with update...")
     
-    # 4. Recalculate EVERYTHING (Elo, Form, Corners, Shots)
+    # 4. Recalculate Elo, Form, Corners and Shots for the changed leagues; head-to-head extends the stored pairs
     print("⚙️ Recalculating Full History (Elo, Form, Corners, Shots)...")
-    full_df = calculate_rolling_stats(full_df)
-    full_df = update_elo(full_df)
-    
-    # Calculate Points Diff
-    full_df['points_difference'] = full_df['home_points_last_5'] - full_df['away_points_last_5']
+    previous = {
+        league: (old_data[old_data['league'] == league], stored)
+        for league, stored in load_head_to_head_states(changed_leagues).groupby('league')
+    }
+    updated_df, team_form, head_to_head = build_league_features(full_df[full_df['league'].isin(changed_leagues)], previous=previous)
 
     print("✅ Feature engineering complete!")
 
     # 5. Save Back to DB
-    print("💾 Overwriting Database with updated stats...")
-    full_df.to_sql('matches', engine, if_exists='replace', index=False)
+    print("💾 Overwriting updated league partitions...")
+    save_league_partitions(updated_df, changed_leagues, team_form, head_to_head)
+    ensure_schema()
     
     print("✅ Daily Update Complete!")
     
@@ -214,7 +422,8 @@ def run_daily_job():
     print("🔄 Triggering Auto-Retraining...")
     # We import here to avoid circular imports
     from scripts.retrain import retrain_model
-    retrain_model()
+    for league in changed_leagues:
+        retrain_model(league)
 
     print("🚀 Triggering API Auto-Deployment...")
     if "api.render.com" in DEPLOY_HOOK_URL:
@@ -9,33 +9,24 @@ from sqlalchemy import text
 
 # --- PATH SETUP ---
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
-from app.database import engine
-
-def check_model_accuracy():
-    print("⏳ Connecting to Database...")
+from app.database import engine, ensure_schema
+from app.features import FEATURE_COLUMNS, to_feature_names
+from app.leagues import DEFAULT_LEAGUE
+from app.prediction_engine import point_in_time_features
+
+def check_model_accuracy(league=DEFAULT_LEAGUE):
+    print(f"⏳ Connecting to Database... [{league}]")
+    ensure_schema()
     
     # 1. Load Match Data
-    query = "SELECT * FROM matches WHERE date > '2015-08-01' ORDER BY date ASC"
-    df = pd.read_sql(query, engine)
+    query = text("SELECT * FROM matches WHERE league = :league AND date > '2015-08-01' ORDER BY date ASC")
+    df = pd.read_sql(query, engine, params={"league": league})
     
     # Rename columns to match what the model expects
-    rename_map = {
-        'home_elo': 'HomeElo', 'away_elo': 'AwayElo', 
-        'elo_difference': 'EloDifference', 'points_difference': 'PointsDifference'
-    }
-    df = df.rename(columns=rename_map)
+    df = to_feature_names(df)
 
     # 2. Define Features
-    features = [
-        'home_wins_last_5', 'home_draws_last_5', 'home_losses_last_5',
-        'away_wins_last_5', 'away_draws_last_5', 'away_losses_last_5',
-        'home_goals_scored_avg', 'home_goals_conceded_avg',
-        'away_goals_scored_avg', 'away_goals_conceded_avg',
-        'home_points_last_5', 'away_points_last_5', 'PointsDifference',
-        'HomeElo', 'AwayElo', 'EloDifference', 'HomeTeamCode', 'AwayTeamCode',
-        'home_sot_avg', 'home_corners_avg',
-        'away_sot_avg', 'away_corners_avg'
-    ]
+    features = FEATURE_COLUMNS
 
     # --- FIX START: ROBUST NAN HANDLING ---
     cols_to_check = [f for f in features if f not in ['HomeTeamCode', 'AwayTeamCode']]
@@ -66,7 +57,10 @@ def check_model_accuracy():
     X_train = train_df[features]
     y_train = train_df['ftr'].map({'A': 0, 'D': 1, 'H': 2})
 
-    X_test = test_df[features]
+    # Test rows are built the way /predict builds them with "as_of": from each team's
+    # state going into the match date (a binary search in the timelines), not stored columns
+    history = pd.read_sql(text("SELECT * FROM matches WHERE league = :league"), engine, params={"league": league}, parse_dates=['date'])
+    X_test = point_in_time_features(history, test_df, le)
     y_test = test_df['ftr'].map({'A': 0, 'D': 1, 'H': 2})
 
     # 5. Train Model
@@ -152,4 +146,4 @@ def check_model_accuracy():
     print("="*60)
 
 if __name__ == "__main__":
-    check_model_accuracy()
\ No newline at end of file
+    check_model_accuracy(sys.argv[1].upper() if len(sys.argv) > 1 else DEFAULT_LEAGUE)
\ No newline at end of file
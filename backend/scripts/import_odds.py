@@ -0,0 +1,47 @@
+import os
+import sys
+import argparse
+
+import pandas as pd
+
+# --- PATH SETUP ---
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from app.database import ensure_schema
+from app.leagues import DEFAULT_LEAGUE, ENABLED_LEAGUES, FIXTURES_CSV_URL
+from app.odds import merge_odds, read_odds_csv
+
+
+def import_odds(sources, league=None, upcoming=False):
+    """Loads football-data.co.uk files (paths or URLs) into the odds store. Rows without a `Div` go to `league`."""
+    print(f"⏳ Importing odds from {len(sources) + upcoming} file(s)...")
+    ensure_schema()
+
+    frames = []
+    for source in sources:
+        try:
+            df = read_odds_csv(source)
+        except Exception as e:
+            print(f"❌ Failed to read {source}: {e}")
+            continue
+        if league or 'league' not in df.columns:
+            df['league'] = league or DEFAULT_LEAGUE
+        frames.append(df)
+
+    if upcoming:
+        df = read_odds_csv(FIXTURES_CSV_URL)
+        frames.append(df[df['league'].isin(ENABLED_LEAGUES)])
+
+    if not frames:
+        print("❌ No odds read.")
+        return
+    merge_odds(pd.concat(frames, ignore_index=True))
+    print("✅ Odds import complete!")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Import bookmaker odds from football-data.co.uk CSVs into the odds store.")
+    parser.add_argument("sources", nargs="*", help="Season or fixtures CSVs, e.g. data/24_25.csv")
+    parser.add_argument("--league", help="League for every row (default: from the files' Div column)")
+    parser.add_argument("--upcoming", action="store_true", help=f"Also download the upcoming fixtures' prices ({FIXTURES_CSV_URL})")
+    args = parser.parse_args()
+    import_odds(args.sources, args.league.upper() if args.league else None, args.upcoming)
@@ -0,0 +1,190 @@
+import os
+import sys
+import argparse
+
+import numpy as np
+import pandas as pd
+from sqlalchemy import text
+
+# --- PATH SETUP ---
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from app.database import engine, ensure_schema
+from app.leagues import DEFAULT_LEAGUE
+
+# --- SETTINGS ---
+PROB_COLUMNS = ['prob_away', 'prob_draw', 'prob_home']  # Same order as the A/D/H class codes
+OUTCOME_INDEX = {'A': 0, 'D': 1, 'H': 2}
+
+
+def load_predictions(league, source=None):
+    query = "SELECT * FROM predictions WHERE league = :league"
+    params = {"league": league}
+    if source:
+        query += " AND source = :source"
+        params["source"] = source
+    df = pd.read_sql(text(query), engine, params=params)
+    df['predicted_at'] = pd.to_datetime(df['predicted_at'], format='ISO8601')
+    df['fixture_date'] = pd.to_datetime(df['fixture_date'], format='ISO8601')
+    return df
+
+
+def load_results(league):
+    query = text("SELECT league, date, home_team, away_team, ftr FROM matches WHERE league = :league AND ftr IS NOT NULL AND date IS NOT NULL")
+    df = pd.read_sql(query, engine, params={"league": league})
+    df['date'] = pd.to_datetime(df['date'])
+    return df
+
+
+def attach_outcomes(preds, results):
+    """
+    Joins every prediction to its match result. Dated rows join exactly; served
+    rows (no fixture date) join to the first meeting on or after the request.
+    """
+    keys = ['league', 'home_team', 'away_team']
+
+    dated = preds[preds['fixture_date'].notna()].merge(
+        results, left_on=keys + ['fixture_date'], right_on=keys + ['date'], how='inner'
+    )
+
+    served = preds[preds['fixture_date'].isna()].copy()
+    if not served.empty:
+        served['request_date'] = served['predicted_at'].dt.normalize()
+        served = pd.merge_asof(
+            served.sort_values('request_date'), results.sort_values('date'),
+            left_on='request_date', right_on='date', by=keys, direction='forward'
+        ).dropna(subset=['ftr']).drop(columns='request_date')
+
+    return pd.concat([dated, served], ignore_index=True)
+
+
+def score(df):
+    """Per-row vectorized scores: correct, confidence, log loss and Brier score."""
+    probs = df[PROB_COLUMNS].to_numpy(dtype=np.float64)
+    actual = df['ftr'].map(OUTCOME_INDEX).to_numpy()
+    rows = np.arange(len(df))
+
+    onehot = np.zeros_like(probs)
+    onehot[rows, actual] = 1
+
+    return df.assign(
+        correct=probs.argmax(axis=1) == actual,
+        confidence=probs.max(axis=1),
+        log_loss=-np.log(np.clip(probs[rows, actual], 1e-15, 1)),
+        brier=((probs - onehot) ** 2).sum(axis=1),
+    )
+
+
+def summarize(scored):
+    return scored.groupby(['model_version', 'source']).agg(
+        matches=('correct', 'size'),
+        accuracy=('correct', 'mean'),
+        log_loss=('log_loss', 'mean'),
+        brier=('brier', 'mean'),
+    )
+
+
+def calibration(scored, bins=10):
+    """Mean confidence vs hit rate per confidence bucket (a calibrated model has them equal)."""
+    edges = np.linspace(1 / 3, 1, bins + 1)
+    buckets = pd.cut(scored['confidence'], edges, include_lowest=True)
+    return scored.groupby(buckets, observed=True).agg(
+        matches=('correct', 'size'),
+        confidence=('confidence', 'mean'),
+        accuracy=('correct', 'mean'),
+    )
+
+
+def compare_models(scored):
+    """Model-vs-model log loss, pairwise on the fixtures both models scored."""
+    fixture = ['league', 'home_team', 'away_team', 'date']
+    losses = scored.pivot_table(index=fixture, columns='model_version', values='log_loss', aggfunc='mean')
+
+    rows = []
+    versions = list(losses.columns)
+    for i, a in enumerate(versions):
+        for b in versions[i + 1:]:
+            shared = losses[[a, b]].dropna()
+            if shared.empty:
+                continue
+            rows.append({
+                "model_a": a, "model_b": b, "matches": len(shared),
+                "log_loss_a": shared[a].mean(), "log_loss_b": shared[b].mean(),
+                "a_better_share": (shared[a] < shared[b]).mean(),
+            })
+    return pd.DataFrame(rows)
+
+
+def compare_shadow(preds, scored):
+    """
+    Served vs shadow answers to the same requests, paired on fixture and timestamp:
+    how often they agree and how far apart they are (all pairs), and their log
+    loss on the pairs whose result is known.
+    """
+    pair = ['league', 'home_team', 'away_team', 'predicted_at']
+    served = preds[preds['source'] == 'served']
+    shadow = preds[preds['source'] == 'shadow']
+    pairs = served.merge(shadow, on=pair, suffixes=('_served', '_shadow'))
+    if pairs.empty:
+        return pd.DataFrame()
+
+    live = pairs[[f"{c}_served" for c in PROB_COLUMNS]].to_numpy(dtype=np.float64)
+    candidate = pairs[[f"{c}_shadow" for c in PROB_COLUMNS]].to_numpy(dtype=np.float64)
+    pairs = pairs.assign(
+        agree=live.argmax(axis=1) == candidate.argmax(axis=1),
+        gap=np.abs(live - candidate).max(axis=1),
+    )
+
+    losses = pd.DataFrame(columns=pair + ['served', 'shadow'])
+    if not scored.empty:
+        losses = scored[scored['source'].isin(['served', 'shadow'])].pivot_table(index=pair, columns='source', values='log_loss')
+        losses = losses.reindex(columns=['served', 'shadow']).dropna().reset_index()
+    settled = pairs.merge(losses, on=pair)
+
+    return pairs.groupby(['model_version_served', 'model_version_shadow']).agg(
+        requests=('agree', 'size'),
+        agreement=('agree', 'mean'),
+        mean_max_gap=('gap', 'mean'),
+    ).join(settled.groupby(['model_version_served', 'model_version_shadow']).agg(
+        settled=('agree', 'size'),
+        log_loss_served=('served', 'mean'),
+        log_loss_shadow=('shadow', 'mean'),
+    )).fillna({'settled': 0})
+
+
+def prediction_report(league=DEFAULT_LEAGUE, source=None):
+    print(f"⏳ Scanning logged predictions... [{league}]")
+    ensure_schema()
+
+    preds = load_predictions(league, source)
+    if preds.empty:
+        print("⚠️ No logged predictions yet. Retrain or serve some predictions first.")
+        return
+
+    scored = score(attach_outcomes(preds, load_results(league)))
+    print(f"📊 {len(preds)} predictions logged, {len(scored)} with a known result.")
+
+    # Before any result is in, a shadow run already shows how often the candidate disagrees
+    shadowed = compare_shadow(preds, scored)
+    if not shadowed.empty:
+        print("\n=== 👥 Served vs Shadow (same requests) ===")
+        print(shadowed.to_string(float_format=lambda v: f"{v:.4f}"))
+    if scored.empty:
+        return
+
+    print("\n=== 🎯 Accuracy by Model ===")
+    print(summarize(scored).to_string(float_format=lambda v: f"{v:.4f}"))
+
+    print("\n=== ⚖️ Calibration ===")
+    print(calibration(scored).to_string(float_format=lambda v: f"{v:.4f}"))
+
+    if scored['model_version'].nunique() > 1:
+        print("\n=== 🆚 Model vs Model (shared fixtures) ===")
+        print(compare_models(scored).to_string(index=False, float_format=lambda v: f"{v:.4f}"))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Accuracy, calibration and model comparison from the prediction log.")
+    parser.add_argument("league", nargs="?", default=DEFAULT_LEAGUE)
+    parser.add_argument("--source", choices=["served", "backtest", "shadow"], help="Only this kind of prediction")
+    args = parser.parse_args()
+    prediction_report(args.league.upper(), args.source)
@@ -1,75 +1,167 @@
 import sys
 import os
+import numpy as np
 import pandas as pd
-import pickle
+import json
+import argparse
 import xgboost as xgb  # <-- NEW IMPORT
 from sklearn.preprocessing import LabelEncoder
-from sklearn.model_selection import train_test_split
 from sklearn.metrics import accuracy_score
-from sqlalchemy import text
+from sqlalchemy import text, inspect
 
 # --- PATH SETUP ---
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
-from app.database import engine
+from app.artifacts import content_hash, data_hash, pack_model
+from app.database import engine, ensure_schema
+from app.features import CLASSES, DB_TO_FEATURE, FEATURE_COLUMNS, H2H_COLUMNS, build_manifest
+from app.prediction_log import prediction_row, write_rows
+from app.teams import TeamRegistry, canonical_name
 
-def retrain_model():
-    print("🧠 Starting XGBoost Model Retraining... [V3 - XGBoost Upgrade]")
+# --- SETTINGS ---
+TRAIN_SINCE = '2015-08-01'
+TRAIN_CHUNK_ROWS = int(os.getenv("TRAIN_CHUNK_ROWS", 20_000))
+TEST_FRACTION = 0.2  # The latest matches, held out for the accuracy check and the backtest log
+OUTCOME_CODES = {outcome: code for code, outcome in enumerate(CLASSES)}
+
+def retrain_model(league=None, candidate=False):
+    """
+    Retrains one league's model, or every league in the DB when `league` is None.
+    A `candidate` is stored but not served: the API shadow-scores it on live
+    traffic until it is promoted.
+    """
+    ensure_schema()
+    if league is None:
+        with engine.connect() as conn:
+            leagues = [row[0] for row in conn.execute(text("SELECT DISTINCT league FROM matches"))]
+        for league in leagues:
+            retrain_league(league, candidate)
+        return
+
+    retrain_league(league, candidate)
+
+def promote_model(model_id):
+    """Makes a candidate servable. The API serves it from its next reload (deploy) on, if it is the latest."""
+    ensure_schema()
+    with engine.begin() as conn:
+        promoted = conn.execute(
+            text("UPDATE model_store SET stage = NULL WHERE id = :id AND stage = 'candidate'"), {"id": model_id}
+        ).rowcount
+    print(f"🚀 Model {model_id} promoted." if promoted else f"⚠️ Model {model_id} is not a candidate.")
+
+def canonical_names(names):
+    """canonical_name over a column, resolving each distinct name once."""
+    names = pd.Series(names, dtype=object)
+    return names.map({name: canonical_name(name) for name in names.unique()}).to_numpy()
+
+def training_filter(columns):
+    """Finished matches with every stored feature present ("ghost matches" and gaps are filtered in SQL)."""
+    not_null = " AND ".join(f"{c} IS NOT NULL" for c in columns)
+    return f"league = :league AND date > '{TRAIN_SINCE}' AND ftr IN ('H', 'D', 'A') AND {not_null}"
+
+def training_features(league):
+    """FEATURE_COLUMNS, plus the head-to-head features once daily_job has filled them in for this league."""
+    stored = {c['name'] for c in inspect(engine).get_columns('matches')}
+    if not all(c in stored for c in H2H_COLUMNS):
+        return FEATURE_COLUMNS
+    with engine.connect() as conn:
+        filled = conn.execute(
+            text(f"SELECT 1 FROM matches WHERE league = :league AND {H2H_COLUMNS[0]} IS NOT NULL LIMIT 1"), {"league": league}
+        ).first()
+    return FEATURE_COLUMNS + H2H_COLUMNS if filled else FEATURE_COLUMNS
+
+def load_training_data(league, features=FEATURE_COLUMNS):
+    """
+    Streams only the training columns, in TRAIN_CHUNK_ROWS chunks over a server-side
+    cursor, straight into a preallocated float32 matrix. Peak memory is the matrix
+    plus one chunk, not a full `SELECT *` DataFrame and its copies.
+    Returns (X as a zero-copy DataFrame view, y codes, [home_team, away_team, date], team encoder).
+    """
+    # DB column for every stored feature (team codes are derived from the names below)
+    to_db = {feature: column for column, feature in DB_TO_FEATURE.items()}
+    stored = [f for f in features if f not in ('HomeTeamCode', 'AwayTeamCode')]
+    columns = [to_db.get(f, f) for f in stored]
+    positions = [features.index(f) for f in stored]
+    home_pos, away_pos = features.index('HomeTeamCode'), features.index('AwayTeamCode')
+    params = {"league": league}
+
+    with engine.connect() as conn:
+        # 1. Team encoder over the whole partition (codes are positions in the sorted names)
+        names = conn.execute(text(
+            f"SELECT DISTINCT home_team FROM matches WHERE league = :league AND date > '{TRAIN_SINCE}' "
+            f"UNION SELECT DISTINCT away_team FROM matches WHERE league = :league AND date > '{TRAIN_SINCE}'"
+        ), params).scalars().all()
+        le = LabelEncoder().fit(pd.unique(canonical_names(pd.Series(names).dropna())))
+        # Same codes the API will resolve through its TeamRegistry
+        codes = TeamRegistry(le).codes
+
+        # 2. Preallocate
+        where = training_filter(columns)
+        n_rows = conn.execute(text(f"SELECT COUNT(*) FROM matches WHERE {where}"), params).scalar()
+        X = np.empty((n_rows, len(features)), dtype=np.float32)
+        y = np.empty(n_rows, dtype=np.int8)
+        homes = np.empty(n_rows, dtype=object)
+        aways = np.empty(n_rows, dtype=object)
+        dates = np.empty(n_rows, dtype=object)
+
+        # 3. Stream (server-side cursor on Postgres), one chunk in memory at a time
+        select = ", ".join(["home_team", "away_team", "date", "ftr"] + columns)
+        result = conn.execution_options(stream_results=True, max_row_buffer=TRAIN_CHUNK_ROWS).execute(
+            text(f"SELECT {select} FROM matches WHERE {where}"), params
+        )
+        filled = 0
+        for rows in result.partitions(TRAIN_CHUNK_ROWS):
+            # Rows written since the COUNT: stop at the preallocated size
+            rows = rows[:n_rows - filled]
+            end = filled + len(rows)
+            columns_data = list(zip(*rows))
+
+            chunk_homes = canonical_names(columns_data[0])
+            chunk_aways = canonical_names(columns_data[1])
+            homes[filled:end], aways[filled:end] = chunk_homes, chunk_aways
+            dates[filled:end] = columns_data[2]
+            y[filled:end] = pd.Series(columns_data[3]).map(OUTCOME_CODES).to_numpy()
+
+            X[filled:end, positions] = np.array(columns_data[4:], dtype=np.float32).T
+            X[filled:end, home_pos] = pd.Series(chunk_homes).map(codes).to_numpy(dtype=np.float32)
+            X[filled:end, away_pos] = pd.Series(chunk_aways).map(codes).to_numpy(dtype=np.float32)
+
+            filled = end
+            if filled == n_rows:
+                break
+
+    X, y = X[:filled], y[:filled]
+    meta = pd.DataFrame({'home_team': homes[:filled], 'away_team': aways[:filled], 'date': dates[:filled]})
+    # A DataFrame over the matrix without copying it, so the model keeps its feature names
+    return pd.DataFrame(X, columns=features, copy=False), y, meta, le
+
+def time_split(X, y, dates, test_fraction=TEST_FRACTION):
+    """
+    Trains on the oldest matches and tests on the latest ones, so no test match
+    is scored by a model that has seen matches played after it (a shuffled split
+    leaks the future into the accuracy, and into the logged backtest).
+    """
+    order = np.argsort(pd.to_datetime(pd.Series(dates)).to_numpy(), kind='stable')
+    cut = int(len(order) * (1 - test_fraction))
+    train, test = order[:cut], order[cut:]
+    return X.iloc[train], X.iloc[test], y[train], y[test]
+
+def retrain_league(league, candidate=False):
+    print(f"🧠 [{league}] Starting XGBoost Model Retraining... [V3 - XGBoost Upgrade]")
     
     # 1. Load Data (Memory Safe)
+    features = training_features(league)
     try:
-        # Loading matches from 2019 onwards to save RAM
-        query = "SELECT * FROM matches WHERE date > '2015-08-01'"
-        df = pd.read_sql(query, engine)
-        print(f"📊 Loaded {len(df)} matches from Database.")
+        X, y_encoded, df, le = load_training_data(league, features)
+        print(f"📊 Streamed {len(df)} matches from Database.")
     except Exception as e:
         print(f"❌ Failed to load data: {e}")
         return
 
-    # Rename columns to match what the model expects
-    rename_map = {
-        'home_elo': 'HomeElo',
-        'away_elo': 'AwayElo',
-        'elo_difference': 'EloDifference',
-        'points_difference': 'PointsDifference',
-        'home_team_code': 'HomeTeamCode',
-        'away_team_code': 'AwayTeamCode'
-    }
-    df = df.rename(columns=rename_map)
-
-    # 2. Preprocessing
-    # We must encode teams because the model needs numbers, not names
-    le = LabelEncoder()
-    all_teams = pd.concat([df['home_team'], df['away_team']]).unique()
-    le.fit(all_teams)
-    
-    df['HomeTeamCode'] = le.transform(df['home_team'])
-    df['AwayTeamCode'] = le.transform(df['away_team'])
-    
-    features = [
-        'home_wins_last_5', 'home_draws_last_5', 'home_losses_last_5',
-        'away_wins_last_5', 'away_draws_last_5', 'away_losses_last_5',
-        'home_goals_scored_avg', 'home_goals_conceded_avg',
-        'away_goals_scored_avg', 'away_goals_conceded_avg',
-        'home_points_last_5', 'away_points_last_5', 'PointsDifference',
-        'HomeElo', 'AwayElo', 'EloDifference', 'HomeTeamCode', 'AwayTeamCode',
-        'home_sot_avg', 'home_corners_avg',
-        'away_sot_avg', 'away_corners_avg'
-    ]
-    
-    # Clean data & Remove "Ghost Matches"
-    df = df.dropna(subset=features)
-    df = df[df['ftr'].isin(['H', 'D', 'A'])]
-    
     print(f"🧹 Training on {len(df)} valid, finished matches.")
 
-    X = df[features]
-    y = df['ftr']
-
-    # XGBoost requires target classes to be 0, 1, 2 (Integers)
-    # We use a LabelEncoder for the Target (Result) too
-    target_encoder = LabelEncoder()
-    y_encoded = target_encoder.fit_transform(y)
+    # XGBoost requires target classes to be 0, 1, 2 (Integers), in the LabelEncoder's (alphabetical) order
+    target_encoder = LabelEncoder().fit(CLASSES)
     # Important: Save this mapping so we know 0=Away, 1=Draw, etc.
     print(f"🔤 Class Mapping: {dict(zip(target_encoder.classes_, target_encoder.transform(target_encoder.classes_)))}")
 
@@ -78,7 +170,7 @@ def retrain_model():
         print("⚠️ Not enough data to train! Skipping.")
         return
 
-    X_train, X_test, y_train, y_test = train_test_split(X, y_encoded, test_size=0.2, random_state=42)
+    X_train, X_test, y_train, y_test = time_split(X, y_encoded, df['date'])
 
     # --- XGBOOST CONFIGURATION ---
     # We use the parameters from your grid search, but HARDCODED.
@@ -102,32 +194,70 @@ def retrain_model():
     print(f"🎯 New XGBoost Accuracy: {acc:.2%}")
 
     # 4. Save to Database
-    # We need to save BOTH the model AND the team encoder AND the target encoder
-    # But currently your DB only expects 'model' and 'encoder'. 
-    # For now, we will stick to saving the team encoder as 'encoder_binary'.
-    # The API will just need to know the standard H=Home mapping or we rely on XGBoost's default.
-    
+    # One compressed artifact: native booster + header (schema, classes, teams, params, data hash, metrics).
+    # The manifest also goes in `feature_schema`, so it can be queried without the artifact.
     print("💾 Saving to Database...")
-    model_bytes = pickle.dumps(model)
-    encoder_bytes = pickle.dumps(le)
+    manifest = build_manifest(X, features, target_encoder.classes_)
+    metrics = {"accuracy": float(acc), "train_rows": len(X_train), "test_rows": len(X_test)}
+    artifact = pack_model(model, le, manifest, data_hash(X, y_encoded), metrics)
+    artifact_hash = content_hash(artifact)
+    print(f"📦 Artifact {artifact_hash[:12]}: {len(artifact) / 1024:.0f} KB")
     
     query = text("""
-        INSERT INTO model_store (model_binary, encoder_binary, accuracy, version_note)
-        VALUES (:m, :e, :a, 'Daily XGBoost Retrain');
+        INSERT INTO model_store (league, artifact, artifact_hash, feature_schema, accuracy, version_note, stage)
+        VALUES (:l, :b, :h, :f, :a, :n, :s);
     """)
     
+    # Keep the 5 latest models per league, and separately the 5 latest candidates
+    # (a run of candidates must not push the served model out)
     cleanup_query = text("""
         DELETE FROM model_store 
-        WHERE id NOT IN (
-            SELECT id FROM model_store ORDER BY id DESC LIMIT 5
+        WHERE league = :l AND id NOT IN (
+            SELECT id FROM model_store WHERE league = :l AND stage IS NULL ORDER BY id DESC LIMIT 5
+        ) AND id NOT IN (
+            SELECT id FROM model_store WHERE league = :l AND stage = 'candidate' ORDER BY id DESC LIMIT 5
         );
     """)
 
     with engine.begin() as conn:
-        conn.execute(query, {"m": model_bytes, "e": encoder_bytes, "a": float(acc)})
-        conn.execute(cleanup_query) 
+        # Against the latest model of the same kind: a candidate with these bytes doesn't make them servable
+        stage = "stage = 'candidate'" if candidate else "(stage IS NULL OR stage != 'candidate')"
+        latest = conn.execute(
+            text(f"SELECT id, artifact_hash FROM model_store WHERE league = :l AND {stage} ORDER BY id DESC LIMIT 1"), {"l": league}
+        ).fetchone()
+        if latest and latest[1] == artifact_hash:
+            # Same data + params give the same bytes: nothing new to deploy (or to log)
+            print(f"♻️ [{league}] Identical model already {'stored as a candidate' if candidate else 'deployed'} (id {latest[0]}).")
+            return
+        conn.execute(query, {
+            "l": league, "b": artifact, "h": artifact_hash, "f": json.dumps(manifest), "a": float(acc),
+            "n": "Candidate XGBoost Retrain" if candidate else "Daily XGBoost Retrain",
+            "s": "candidate" if candidate else None,
+        })
+        model_id = conn.execute(text("SELECT MAX(id) FROM model_store WHERE league = :l"), {"l": league}).scalar()
+        conn.execute(cleanup_query, {"l": league}) 
         
-    print("✅ XGBoost Model saved successfully!")
+    print(f"✅ [{league}] XGBoost {'candidate (shadow only) ' if candidate else ''}model {model_id} saved successfully!")
+
+    # 5. Log the held-out probabilities, so accuracy/calibration reports don't need a retrain
+    log_backtest(league, df.loc[X_test.index], model.predict_proba(X_test), target_encoder.classes_, model_id)
+
+def log_backtest(league, test_df, probs, classes, model_id):
+    rows = [
+        prediction_row(league, home, away, classes, row_probs, model_id,
+                       source='backtest', fixture_date=pd.Timestamp(date).date())
+        for home, away, date, row_probs in zip(test_df['home_team'], test_df['away_team'], test_df['date'], probs)
+    ]
+    write_rows(rows)
+    print(f"📝 [{league}] Logged {len(rows)} held-out predictions for model {model_id}.")
 
 if __name__ == "__main__":
-    retrain_model()
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="Retrains and stores the XGBoost models.")
+    parser.add_argument("league", nargs="?", help="One league (default: every league in the DB)")
+    parser.add_argument("--candidate", action="store_true", help="Store as a candidate: shadow-scored by the API, not served")
+    parser.add_argument("--promote", type=int, metavar="MODEL_ID", help="Make a stored candidate servable instead of training")
+    args = parser.parse_args()
+    if args.promote is not None:
+        promote_model(args.promote)
+    else:
+        retrain_model(args.league.upper() if args.league else None, args.candidate)
\ No newline at end of file
@@ -2,6 +2,7 @@ import pandas as pd
 import os
 from backend.app.database import engine, Base
 from backend.app.models import Match
+from backend.app.leagues import DEFAULT_LEAGUE
 
 # Maps CSV Header -> Database Column Name
 column_mapping = {
@@ -34,6 +35,8 @@ def seed_data():
     
     print("Translating columns...")
     df = df.rename(columns=column_mapping)
+    if 'league' not in df.columns:
+        df['league'] = DEFAULT_LEAGUE
     
     # Filter for only valid columns
     valid_cols = [c.name for c in Match.__table__.columns if c.name != 'id']
@@ -0,0 +1,227 @@
+import os
+import sys
+import argparse
+import importlib.util
+
+import numpy as np
+import pandas as pd
+
+# --- PATH SETUP ---
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# --- SETTINGS ---
+# Defaults are roughly Premier League shaped: ~45% home wins, ~23% draws, ~32% away wins
+DEFAULT_CONFIG = {
+    "leagues": 1,
+    "teams": 20,
+    "seasons": 10,
+    "first_season": 2000,
+    "home_goals_mean": 1.55,
+    "away_goals_mean": 1.20,
+    "strength_spread": 0.25,   # Std of team attack/defence log-strengths
+    "strength_drift": 0.05,    # Season-to-season random walk of those strengths
+    "sot_per_goal": 2.6,
+    "corners_mean": 5.2,
+    "seed": 42,
+}
+# Generated leagues are named L01, L02, ... which are not in app.leagues.LEAGUES: the data is for
+# benchmarks and scale tests (scripts, a scratch table or Parquet), the API does not serve it.
+SCRATCH_TABLE = "synthetic_matches"
+
+
+def round_robin(n_teams):
+    """Double round robin (circle method): a list of matchdays of (home, away) index pairs."""
+    teams = list(range(n_teams))
+    if n_teams % 2:
+        teams.append(None)  # Bye
+    n = len(teams)
+
+    first_half = []
+    for _ in range(n - 1):
+        pairs = [(teams[i], teams[n - 1 - i]) for i in range(n // 2)]
+        first_half.append([(h, a) for h, a in pairs if h is not None and a is not None])
+        teams = [teams[0]] + [teams[-1]] + teams[1:-1]
+
+    second_half = [[(a, h) for h, a in matchday] for matchday in first_half]
+    return first_half + second_half
+
+
+def league_name(index):
+    """Synthetic league codes (L01, ...). Not registered leagues: the API's routes 404 on them."""
+    return f"L{index + 1:02d}"
+
+
+def team_names(league, n_teams):
+    return np.array([f"{league} Team {i + 1:02d}" for i in range(n_teams)])
+
+
+def generate_season(rng, config, league, names, attack, defence, year, fixtures):
+    """Simulates one season of one league as a DataFrame shaped like the `matches` table."""
+    home_idx = np.array([h for matchday in fixtures for h, _ in matchday])
+    away_idx = np.array([a for matchday in fixtures for _, a in matchday])
+    matchday = np.repeat(np.arange(len(fixtures)), [len(m) for m in fixtures])
+
+    # Poisson goals driven by attack vs defence strengths
+    home_rate = config["home_goals_mean"] * np.exp(attack[home_idx] - defence[away_idx])
+    away_rate = config["away_goals_mean"] * np.exp(attack[away_idx] - defence[home_idx])
+    fthg = rng.poisson(home_rate)
+    ftag = rng.poisson(away_rate)
+
+    # Shots on target always cover the goals; corners loosely follow attacking strength
+    hst = fthg + rng.poisson(home_rate * (config["sot_per_goal"] - 1))
+    ast = ftag + rng.poisson(away_rate * (config["sot_per_goal"] - 1))
+    hc = rng.poisson(config["corners_mean"] * np.exp(attack[home_idx] * 0.5))
+    ac = rng.poisson(config["corners_mean"] * 0.85 * np.exp(attack[away_idx] * 0.5))
+
+    ftr = np.where(fthg > ftag, 'H', np.where(fthg < ftag, 'A', 'D'))
+
+    # One matchday per week from mid-August, a few kick-off days per weekend
+    season_start = pd.Timestamp(year=year, month=8, day=10)
+    dates = season_start + pd.to_timedelta(matchday * 7 + rng.integers(0, 3, len(matchday)), unit='D')
+
+    return pd.DataFrame({
+        'date': dates,
+        'season': f"{year}-{str(year + 1)[-2:]}",
+        'league': league,
+        'home_team': names[home_idx],
+        'away_team': names[away_idx],
+        'fthg': fthg.astype(np.int16),
+        'ftag': ftag.astype(np.int16),
+        'ftr': ftr,
+        'hst': hst.astype(np.int16),
+        'ast': ast.astype(np.int16),
+        'hc': hc.astype(np.int16),
+        'ac': ac.astype(np.int16),
+    }).sort_values('date', kind='stable')
+
+
+def iter_matches(chunk_size=100_000, **overrides):
+    """
+    Streams a synthetic match history as DataFrames of at most `chunk_size` rows.
+    Seasons are generated in time order (all leagues per season), so only one
+    season per league is ever held in memory on top of the current chunk.
+    """
+    config = {**DEFAULT_CONFIG, **overrides}
+    rng = np.random.default_rng(config["seed"])
+    fixtures = round_robin(config["teams"])
+
+    leagues = [league_name(i) for i in range(config["leagues"])]
+    names = {league: team_names(league, config["teams"]) for league in leagues}
+    attack = {league: rng.normal(0, config["strength_spread"], config["teams"]) for league in leagues}
+    defence = {league: rng.normal(0, config["strength_spread"], config["teams"]) for league in leagues}
+
+    buffer, buffered = [], 0
+    for season in range(config["seasons"]):
+        year = config["first_season"] + season
+        for league in leagues:
+            df = generate_season(rng, config, league, names[league], attack[league], defence[league], year, fixtures)
+            buffer.append(df)
+            buffered += len(df)
+
+            attack[league] = attack[league] + rng.normal(0, config["strength_drift"], config["teams"])
+            defence[league] = defence[league] + rng.normal(0, config["strength_drift"], config["teams"])
+
+            while buffered >= chunk_size:
+                merged = pd.concat(buffer, ignore_index=True)
+                yield merged.iloc[:chunk_size]
+                rest = merged.iloc[chunk_size:]
+                buffer, buffered = [rest], len(rest)
+
+    if buffered:
+        yield pd.concat(buffer, ignore_index=True)
+
+
+def generate_history(**overrides):
+    """Convenience wrapper returning the whole history as one DataFrame (small configs only)."""
+    return pd.concat(iter_matches(**overrides), ignore_index=True)
+
+
+def matches_for(target_matches, teams=DEFAULT_CONFIG["teams"], leagues=DEFAULT_CONFIG["leagues"]):
+    """Number of seasons needed to reach roughly `target_matches` rows."""
+    per_season = teams * (teams - 1) * leagues
+    return max(1, int(np.ceil(target_matches / per_season)))
+
+
+def write_to_db(chunks, engine, table=SCRATCH_TABLE, if_exists='replace', sql_chunksize=5000):
+    """Streams chunks into the DB. The first chunk honours `if_exists`, the rest append."""
+    total = 0
+    for i, chunk in enumerate(chunks):
+        chunk.to_sql(table, engine, if_exists=if_exists if i == 0 else 'append',
+                     index=False, chunksize=sql_chunksize)
+        total += len(chunk)
+        print(f"💾 {total} matches written to '{table}'...")
+    return total
+
+
+def write_to_parquet(chunks, path):
+    """Streams chunks into one Parquet file, one row group per chunk (needs pyarrow)."""
+    try:
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+    except ImportError:
+        raise RuntimeError("Writing Parquet needs pyarrow: pip install pyarrow")
+
+    writer = None
+    total = 0
+    try:
+        for chunk in chunks:
+            table = pa.Table.from_pandas(chunk, preserve_index=False)
+            if writer is None:
+                writer = pq.ParquetWriter(path, table.schema, compression='zstd')
+            writer.write_table(table)
+            total += len(chunk)
+            print(f"💾 {total} matches written to {path}...")
+    finally:
+        if writer is not None:
+            writer.close()
+    return total
+
+
+def main_cli():
+    parser = argparse.ArgumentParser(description="Generate a synthetic multi-league match history.")
+    parser.add_argument("--leagues", type=int, default=DEFAULT_CONFIG["leagues"])
+    parser.add_argument("--teams", type=int, default=DEFAULT_CONFIG["teams"])
+    parser.add_argument("--seasons", type=int, default=DEFAULT_CONFIG["seasons"])
+    parser.add_argument("--matches", type=int, help="Target total matches (overrides --seasons)")
+    parser.add_argument("--first-season", type=int, default=DEFAULT_CONFIG["first_season"])
+    parser.add_argument("--home-goals", type=float, default=DEFAULT_CONFIG["home_goals_mean"])
+    parser.add_argument("--away-goals", type=float, default=DEFAULT_CONFIG["away_goals_mean"])
+    parser.add_argument("--spread", type=float, default=DEFAULT_CONFIG["strength_spread"])
+    parser.add_argument("--seed", type=int, default=DEFAULT_CONFIG["seed"])
+    parser.add_argument("--chunk-size", type=int, default=100_000)
+    parser.add_argument("--parquet", help="Write to this Parquet file instead of the database "
+                                          "(needs pyarrow, an optional dependency not in requirements.txt)")
+    parser.add_argument("--table", default=SCRATCH_TABLE, help=f"Target DB table (default: {SCRATCH_TABLE})")
+    parser.add_argument("--append", action="store_true", help="Append to the DB table instead of replacing it")
+    parser.add_argument("--replace", action="store_true", help="Allow replacing the real `matches` table")
+    args = parser.parse_args()
+    if args.table == "matches" and not (args.replace or args.append) and not args.parquet:
+        # The real history lives there: never wipe it without being told to
+        parser.error("Writing to 'matches' replaces the match history. Pass --replace (or --append) to do it anyway.")
+    if args.parquet and importlib.util.find_spec("pyarrow") is None:
+        parser.error("--parquet needs pyarrow, which requirements.txt leaves out: pip install pyarrow")
+
+    seasons = args.seasons
+    if args.matches:
+        seasons = matches_for(args.matches, args.teams, args.leagues)
+
+    chunks = iter_matches(
+        chunk_size=args.chunk_size,
+        leagues=args.leagues, teams=args.teams, seasons=seasons,
+        first_season=args.first_season,
+        home_goals_mean=args.home_goals, away_goals_mean=args.away_goals,
+        strength_spread=args.spread, seed=args.seed,
+    )
+
+    print(f"🎲 Generating {args.leagues} league(s) x {seasons} season(s) x {args.teams} teams...")
+    if args.parquet:
+        total = write_to_parquet(chunks, args.parquet)
+    else:
+        from app.database import engine
+        total = write_to_db(chunks, engine, args.table, 'append' if args.append else 'replace')
+
+    print(f"✅ Generated {total} synthetic matches.")
+
+
+if __name__ == "__main__":
+    main_cli()
@@ -0,0 +1,26 @@
+import os
+import sys
+import shutil
+import tempfile
+
+import pandas as pd
+import pytest
+
+# The app and the scripts bind their engines at import: point them at a scratch copy of the bundled DB first
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SCRATCH_DB = os.path.join(tempfile.mkdtemp(), "test.db")
+shutil.copy(os.path.join(BACKEND_DIR, "data", "test.db"), SCRATCH_DB)
+os.environ["DATABASE_URL"] = f"sqlite:///{SCRATCH_DB}"
+sys.path.insert(0, BACKEND_DIR)
+
+
+@pytest.fixture
+def dated_history():
+    """The bundled DB's dated matches in the DB shape, raw columns only (no stored features)."""
+    from sqlalchemy import create_engine
+
+    columns = ['date', 'season', 'home_team', 'away_team', 'fthg', 'ftag', 'ftr', 'hst', 'ast', 'hc', 'ac']
+    df = pd.read_sql(f"SELECT {', '.join(columns)} FROM matches WHERE date IS NOT NULL",
+                     create_engine(f"sqlite:///{SCRATCH_DB}"), parse_dates=['date'])
+    df['league'] = 'PL'
+    return df.sort_values('date', kind='stable').reset_index(drop=True)
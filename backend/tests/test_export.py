@@ -0,0 +1,34 @@
+import json
+
+import pandas as pd
+from fastapi.testclient import TestClient
+
+from app import main
+
+
+def test_ndjson_export_with_bundled_model():
+    """The whole default export (NDJSON with features) parses, served by the bundled pickle."""
+    assert main.model_versions.get("PL") == "static"
+    with TestClient(main.app) as client:
+        response = client.get("/export")
+        assert response.status_code == 200
+        rows = [json.loads(line) for line in response.text.splitlines()]
+
+    assert len(rows) == int(response.headers["X-Export-Fixtures"]) > 0
+    names = main.league_layouts["PL"].names
+    for row in rows:
+        assert list(row["features"]) == names
+        assert abs(sum(row["probabilities"].values()) - 1) < 1e-4
+
+
+def test_export_count_leaves_out_unscorable_fixtures(monkeypatch):
+    """A team the model's encoder never saw (promoted since) is dropped before X-Export-Fixtures is counted."""
+    history = main.league_history["PL"]
+    promoted = history.iloc[[-1]].assign(HomeTeam="Promoted Town")
+    monkeypatch.setitem(main.league_history, "PL", pd.concat([history, promoted], ignore_index=True))
+    with TestClient(main.app) as client:
+        response = client.get("/export", params={"features": "false"})
+        rows = [json.loads(line) for line in response.text.splitlines()]
+
+    assert len(rows) == int(response.headers["X-Export-Fixtures"]) == history['Date'].notna().sum()
+    assert all(row["home_team"] != "Promoted Town" for row in rows)
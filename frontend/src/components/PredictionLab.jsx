@@ -106,7 +106,15 @@ function PredictionLab(){
                     <p>Confidence: <span style={{ color: getConfColor(prediction.confidence), fontWeight: "bold" }}>
                         {(prediction.confidence * 100).toFixed(1)}%
                     </span></p>
-                    
+
+                    {prediction.scoreline && (
+                        <div className="lab-scorelines">
+                            <p>Likely scores: {prediction.scoreline.top_scores.map(s =>
+                                `${s.score} (${(s.probability * 100).toFixed(0)}%)`
+                            ).join(", ")}</p>
+                            <p>Over 2.5 goals: {(prediction.scoreline.over_2_5 * 100).toFixed(0)}% · Both teams score: {(prediction.scoreline.both_teams_score * 100).toFixed(0)}%</p>
+                        </div>
+                    )}
                 </div>
             )}
             
@@ -11,7 +11,7 @@ function UpdateMatches(){
 
     const fetchLastMatch = async () => {
         try {
-            const response = await axios.get(`${API_URL}/last-updated?t=${Date.now()}`);
+            const response = await axios.get(`${API_URL}/last-updated`);
             setLastMatch(response.data.date)
             
         } catch (error) {